@@ -0,0 +1,75 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+Developer Notes:
+Runs slow work (reading extracts, filtering, aggregating, exporting) off the Tk main thread.
+The task runs on a worker thread and reports progress and its result through a queue; the Tk
+event loop polls that queue with after(), so every callback runs on the main thread and the
+window stays responsive while the task is running.
+'''
+
+
+class BackgroundLoader:
+    """
+    Runs task(progress) on a worker and hands progress messages and the result back to Tk.
+
+    widget is any Tk widget (only its after() method is used). on_done(result) runs when the task
+    returns, on_error(exception) when it raises and on_progress(message) for every progress(message)
+    call made by the task.
+    """
+
+    def __init__(self, widget, task, on_done, on_error=None, on_progress=None, poll_ms=50, executor=None):
+        self.widget = widget
+        self.task = task
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+        self.executor = executor
+        self.messages = queue.Queue()
+        self.finished = False
+
+    def Start(self):
+        """
+        Function submits the task to the worker and starts polling for its messages.
+        """
+
+        executor = self.executor or ThreadPoolExecutor(max_workers=1)
+        executor.submit(self._Run)
+        if self.executor is None:
+            executor.shutdown(wait=False)
+        self.widget.after(self.poll_ms, self._Poll)
+
+        return self
+
+    def _Run(self):
+        try:
+            result = self.task(lambda message: self.messages.put(('progress', message)))
+        except Exception as error:
+            self.messages.put(('error', error))
+        else:
+            self.messages.put(('done', result))
+
+    def _Poll(self):
+        # Drain Everything the Worker Has Posted Since the Last Poll
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'progress':
+                if self.on_progress is not None:
+                    self.on_progress(payload)
+            elif kind == 'done':
+                self.finished = True
+                self.on_done(payload)
+            else:
+                self.finished = True
+                if self.on_error is None:
+                    raise payload
+                self.on_error(payload)
+
+        if not self.finished:
+            self.widget.after(self.poll_ms, self._Poll)
@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+from BackgroundLoader import BackgroundLoader
+
+class FakeWindow:
+    # Stands in for Tk: after() callbacks are run by Pump() instead of a mainloop
+    def __init__(self):
+        self.pending = []
+        self.thread = threading.get_ident()
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def Pump(self):
+        while self.pending:
+            self.pending.pop(0)()
+            time.sleep(0.001)
+
+class BackgroundLoader_Test(unittest.TestCase):
+    def setUp(self):
+        self.window = FakeWindow()
+        self.events = []
+
+    def test_result_and_progress_reach_the_main_thread(self):
+        release = threading.Event()
+        def task(progress):
+            progress('half way')
+            release.wait(5)
+            return 42
+
+        loader = BackgroundLoader(self.window, task, lambda result: self.events.append(('done', result, threading.get_ident())),
+                                  on_progress=lambda message: self.events.append(('progress', message)))
+        loader.Start()
+
+        # The Window Keeps Polling While the Task Runs
+        self.assertFalse(loader.finished)
+        self.assertEqual(len(self.window.pending), 1)
+        release.set()
+        self.window.Pump()
+
+        self.assertEqual(self.events, [('progress', 'half way'), ('done', 42, self.window.thread)])
+        self.assertTrue(loader.finished)
+
+    def test_errors_are_reported(self):
+        def task(progress):
+            raise FileNotFoundError('missing.csv')
+
+        BackgroundLoader(self.window, task, self.events.append, on_error=self.events.append).Start()
+        self.window.Pump()
+
+        self.assertEqual(len(self.events), 1)
+        self.assertIsInstance(self.events[0], FileNotFoundError)
+
+if __name__ == '__main__':
+    unittest.main()
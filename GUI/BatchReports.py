@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
+from ChartPanel import BarChart
+from EventData import EVENT_COLUMNS, FIRST_YEAR, LAST_YEAR, LoadData, ValidateInputYears
+from Export import EXPORT_DIR, FORMATS, ExportEvents
+from Instrumentation import DumpReport, StageTotals
+from Schemas import EVENTS
+
+'''
+Developer Notes:
+Headless batch runs of the GUI's charts and DOWNLOAD DATA extracts, for regenerating report images
+without clicking through Tk. The data is loaded once (through the typed cache and the count cube) and
+handed to a pool of worker processes; every worker keeps one Agg BarChart and redraws it per chart.
+Extract jobs are grouped per event type so the year partitions written for one range are reused by the next.
+
+Usage (from the repo root):
+    python GUI/BatchReports.py --ranges 2000-2010 2005-2020 --extracts
+    python GUI/BatchReports.py --all-ranges --events Failures Liquidations --workers 8
+    python GUI/BatchReports.py --workers 1 --profile results/profile.txt
+--profile writes the run's timers and counters (Instrumentation.py); jobs run on worker processes are
+only profiled with --workers 1.
+'''
+
+CHART_DIR = os.path.join('results', 'reports')
+
+# Per-Process State (set by the pool initializer)
+_DATA = {}
+_CHART = []
+
+
+def _InitWorker(data):
+    _DATA.clear()
+    _DATA.update(data)
+
+
+def ParseRange(text):
+    """
+    Function parses a year range such as '2000-2010' (or a single year) for argparse.
+    """
+
+    start_year, _, end_year = text.partition('-')
+    try:
+        return ValidateInputYears(start_year, end_year or start_year)
+    except (TypeError, ValueError) as error:
+        raise argparse.ArgumentTypeError(f'{text}: {error}')
+
+
+def AllRanges(first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """
+    Function returns every (start year, end year) pair within first_year-last_year.
+    """
+
+    return [(start_year, end_year) for start_year in range(first_year, last_year + 1)
+            for end_year in range(start_year, last_year + 1)]
+
+
+def RenderChart(event, start_year, end_year, chart_dir=CHART_DIR):
+    """
+    Function saves the GUI bar chart of one event type and year range as a PNG and returns its path.
+    """
+
+    if not _CHART:
+        _CHART.append(BarChart(blit=False))
+    chart = _CHART[0]
+
+    chart.Draw(_DATA['cube'].Counts(event, start_year, end_year), EVENTS[event]['label'])
+    path = os.path.join(chart_dir, f'{event}_{start_year}_to_{end_year}.png')
+    chart.Save(path)
+
+    return path
+
+
+def WriteExtracts(event, ranges, fmt='csv', export_dir=EXPORT_DIR):
+    """
+    Function writes the DOWNLOAD DATA extract of one event type for every year range.
+    """
+
+    return [ExportEvents(_DATA[event], event, start_year, end_year, fmt, export_dir)
+            for start_year, end_year in ranges]
+
+
+def RunBatch(data, events, ranges, charts=True, extracts=False, fmt='csv', chart_dir=CHART_DIR,
+             export_dir=EXPORT_DIR, workers=None):
+    """
+    Function renders the chart and / or extract of every (event type x year range).
+
+    data is what EventData.LoadData returns. Jobs run on workers processes (all cores by default,
+    in this process when workers is 1). Returns the paths written.
+    """
+
+    os.makedirs(chart_dir, exist_ok=True)
+    os.makedirs(export_dir, exist_ok=True)
+
+    jobs = []
+    if charts:
+        jobs += [(RenderChart, (event, start_year, end_year, chart_dir))
+                 for event in events for start_year, end_year in ranges]
+    if extracts:
+        # One Job per Event Type (its ranges share the year partitions)
+        jobs += [(WriteExtracts, (event, ranges, fmt, export_dir)) for event in events]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        _InitWorker(data)
+        results = [job(*args) for job, args in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_InitWorker, initargs=(data,)) as pool:
+            futures = [pool.submit(job, *args) for job, args in jobs]
+            results = [future.result() for future in futures]
+
+    return [path for result in results for path in (result if isinstance(result, list) else [result])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render FDIC event charts and extracts without the GUI.')
+    parser.add_argument('--events', nargs='+', choices=list(EVENT_COLUMNS), default=list(EVENT_COLUMNS))
+    parser.add_argument('--ranges', nargs='+', type=ParseRange, default=[(FIRST_YEAR, LAST_YEAR)],
+                        help='year ranges such as 2000-2010 (default 2000-2020)')
+    parser.add_argument('--all-ranges', action='store_true', help=f'every range within {FIRST_YEAR}-{LAST_YEAR}')
+    parser.add_argument('--no-charts', action='store_true', help='skip the PNG charts')
+    parser.add_argument('--extracts', action='store_true', help='also write the DOWNLOAD DATA extracts')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='extract format')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--chart-dir', default=CHART_DIR)
+    parser.add_argument('--export-dir', default=EXPORT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--profile', help='write a profile report (.txt, or .json for the raw snapshot)')
+    args = parser.parse_args(argv)
+
+    ranges = AllRanges() if args.all_ranges else args.ranges
+
+    # Charts Only Need the Cube; Extracts Need the Filtered Event Frames
+    start = time.perf_counter()
+    data = LoadData(progress=print, data_dir=args.data_dir, events=args.events if args.extracts else [])
+    paths = RunBatch(data, args.events, ranges, charts=not args.no_charts, extracts=args.extracts,
+                     fmt=args.format, chart_dir=args.chart_dir, export_dir=args.export_dir, workers=args.workers)
+    print(f'Wrote {len(paths)} files in {time.perf_counter() - start:.1f}s')
+
+    if args.profile:
+        stages = ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in StageTotals().items() if seconds)
+        print(f'Profile ({stages}) written to {DumpReport(args.profile)}')
+
+
+if __name__ == '__main__':
+    main()
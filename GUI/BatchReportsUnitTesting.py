@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from BatchReports import AllRanges, RunBatch, main
+from EventData import PrepareData
+
+class BatchReports_Test(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(5)
+        n = 500
+        def Events(class_col):
+            return pd.DataFrame({'CERT': rng.integers(1, 90000, n),
+                                 class_col: rng.choice(['Commercial', 'Savings'], n),
+                                 'EFFDATE': pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 7600, n), unit='D'),
+                                 'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'})
+        self.data = PrepareData(Events('FRM_CLASS_TYPE_DESC'), Events('FRM_CLASS_TYPE_DESC'),
+                                Events('ACQ_CLASS_TYPE_DESC'), Events('ACQ_CLASS_TYPE_DESC'))
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def test_charts_and_extracts(self):
+        chart_dir = os.path.join(self.out_dir, 'charts')
+        export_dir = os.path.join(self.out_dir, 'extracts')
+        for workers in [1, 2]:
+            paths = RunBatch(self.data, ['Failures', 'Liquidations'], [(2000, 2010), (2005, 2020)], extracts=True,
+                             chart_dir=chart_dir, export_dir=export_dir, workers=workers)
+
+            self.assertEqual(len(paths), 8)
+            self.assertTrue(os.path.exists(os.path.join(chart_dir, 'Failures_2005_to_2020.png')))
+            extract = pd.read_csv(os.path.join(export_dir, 'Liquidations_2000_to_2010.csv'))
+            self.assertEqual(len(extract), ((self.data['Liquidations']['EFFDATE'].dt.year <= 2010)).sum())
+
+    def test_all_ranges(self):
+        self.assertEqual(len(AllRanges()), 231)
+        self.assertEqual(AllRanges(2000, 2001), [(2000, 2000), (2000, 2001), (2001, 2001)])
+
+    def test_bad_range_rejected(self):
+        with self.assertRaises(SystemExit):
+            main(['--ranges', '2010-2005'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from EventData import EVENT_COLUMNS, CountByYear, FilterDF
+from EventStore import LoadPartitions, QueryEvents
+from FailureCosts import CleanFailedBanks, ImputeCost
+from Schemas import DATA_DIR, EVENTS, SCHEMAS, DatasetPath, LoadDataset, ReadDataset
+
+'''
+Developer Notes:
+Benchmark suite of the data-prep hot paths: FilterDF / CountByYear, reading every CSV in data/ (raw and
+typed, plus synthetic extracts written at scale), narrow QueryEvents over the year partitions
+(EventStore.py), the failed_banks cleaning and FFIEC_Client calls
+against the local MockFFIECServer. Synthetic data resamples the real extracts (dates jittered, CERTs
+redrawn) so every column keeps its real dtype and value mix; extracts that are not shipped borrow the
+rows of one with the same schema (SUBSTITUTES).
+Each case records the best wall time of a few runs, then the peak memory traced during one more run
+(tracemalloc sees Python and numpy / pandas buffers, not pyarrow's own pool). Results are saved as
+JSON; comparing against a saved baseline flags cases slower or larger than the tolerance and exits 1.
+Run from the parent folder:
+
+    python GUI/Benchmarks.py --max-rows 10000000 --save benchmarks.json
+    python GUI/Benchmarks.py --baseline benchmarks.json --only FilterDF
+'''
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+SOAP_CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebooks', 'soap_client')
+
+# Extracts Not Shipped in data/ -> Shipped Extract With the Same Schema
+SUBSTITUTES = {'NewInstitutions': 'Liquidations', 'Combinations': 'Failures'}
+
+# Shipped CSVs That Are Not UTF-8
+CSV_ENCODINGS = {'banklist.csv': 'latin-1'}
+
+# FFIEC_Client Calls per Case
+FFIEC_CALLS = 20
+
+
+def ScaleDataset(name, n_rows, columns=None, data_dir=DATA_DIR, seed=0):
+    """
+    Function returns n_rows of synthetic data for a dataset by resampling its real (or substitute) extract.
+
+    Dates are shifted by up to half a year and CERT is redrawn; every other column keeps its real values.
+    """
+
+    source = name if os.path.exists(DatasetPath(name, data_dir)) else SUBSTITUTES[name]
+    base = ReadDataset(source, columns, data_dir)
+
+    rng = np.random.default_rng(seed)
+    df = base.take(rng.integers(0, len(base), n_rows)).reset_index(drop=True)
+    for col in SCHEMAS[name]['dates']:
+        if col in df.columns:
+            df[col] = df[col] + pd.to_timedelta(rng.integers(-182, 183, n_rows), unit='D')
+    if 'CERT' in df.columns:
+        df['CERT'] = rng.integers(1, 60000, n_rows).astype(df['CERT'].dtype)
+
+    return df
+
+
+def Measure(func, repeats=3):
+    """
+    Function returns the best wall clock seconds of repeats runs and the peak traced bytes of one more run.
+    """
+
+    best = float('inf')
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def _CountLines(path):
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b'')) - 1
+
+
+def EventCases(sizes, data_dir=DATA_DIR):
+    """
+    Function yields (case, rows, setup) for FilterDF and CountByYear on every event type at each size.
+    """
+
+    def FilterSetup(event, n_rows):
+        spec, columns = EVENTS[event], EVENT_COLUMNS[event]
+        df = ScaleDataset(spec['dataset'], n_rows, columns, data_dir)
+        return lambda: FilterDF(df, columns, spec['date_col'], spec['class_col'], spec['filter_criteria'])
+
+    def CountSetup(event, n_rows):
+        spec = EVENTS[event]
+        filtered = FilterSetup(event, n_rows)()
+        return lambda: CountByYear(filtered, spec['class_col'], spec['date_col'], 'CERT')
+
+    for n_rows in sizes:
+        for event in EVENT_COLUMNS:
+            yield f'FilterDF/{event}/{n_rows}', n_rows, lambda event=event, n_rows=n_rows: FilterSetup(event, n_rows)
+            yield f'CountByYear/{event}/{n_rows}', n_rows, lambda event=event, n_rows=n_rows: CountSetup(event, n_rows)
+
+
+def CSVCases(sizes, data_dir=DATA_DIR, work_dir=None):
+    """
+    Function yields (case, rows, setup) for reading every CSV in data_dir and synthetic extracts at each size.
+    """
+
+    # Every Shipped CSV, Untyped
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        encoding = CSV_ENCODINGS.get(os.path.basename(path), 'utf-8-sig')
+        yield (f'read_csv/{os.path.basename(path)}', _CountLines(path),
+               lambda path=path, encoding=encoding: lambda: pd.read_csv(path, encoding=encoding))
+
+    # Schema Datasets, Typed Read and Warm Cache Load
+    cache_dir = os.path.join(work_dir, '.cache')
+
+    def LoadSetup(name):
+        LoadDataset(name, data_dir=data_dir, cache_dir=cache_dir)
+        return lambda: LoadDataset(name, data_dir=data_dir, cache_dir=cache_dir)
+
+    for name in SCHEMAS:
+        if os.path.exists(DatasetPath(name, data_dir)):
+            rows = _CountLines(DatasetPath(name, data_dir))
+            yield f'ReadDataset/{name}', rows, lambda name=name: lambda: ReadDataset(name, data_dir=data_dir)
+            yield f'LoadDataset/{name}', rows, lambda name=name: LoadSetup(name)
+
+    # Event Extracts Written at Scale (the columns the GUI reads)
+    synthetic_dir = os.path.join(work_dir, 'synthetic')
+
+    def WriteSetup(name, columns, n_rows):
+        os.makedirs(synthetic_dir, exist_ok=True)
+        ScaleDataset(name, n_rows, columns, data_dir).to_csv(DatasetPath(name, synthetic_dir), index=False,
+                                                             date_format='%Y-%m-%dT%H:%M:%S')
+        return lambda: ReadDataset(name, columns, synthetic_dir)
+
+    for n_rows in sizes:
+        for event, columns in EVENT_COLUMNS.items():
+            name = EVENTS[event]['dataset']
+            yield (f'ReadDataset/{name}/{n_rows}', n_rows,
+                   lambda name=name, columns=columns, n_rows=n_rows: WriteSetup(name, columns, n_rows))
+
+
+def QueryCases(sizes, data_dir=DATA_DIR, work_dir=None, start_year=2009, end_year=2010):
+    """
+    Function yields (case, rows, setup) for a narrow QueryEvents over the year partitions of synthetic extracts.
+    """
+
+    def QuerySetup(event, n_rows):
+        name = EVENTS[event]['dataset']
+        synthetic_dir = os.path.join(work_dir, 'partitioned', str(n_rows))
+        os.makedirs(synthetic_dir, exist_ok=True)
+        ScaleDataset(name, n_rows, EVENT_COLUMNS[event], data_dir).to_csv(DatasetPath(name, synthetic_dir), index=False,
+                                                                          date_format='%Y-%m-%dT%H:%M:%S')
+        LoadPartitions(name, synthetic_dir)
+        return lambda: QueryEvents(event, start_year, end_year, synthetic_dir)
+
+    for n_rows in sizes:
+        for event in EVENT_COLUMNS:
+            yield (f'QueryEvents/{event}/{n_rows}', n_rows,
+                   lambda event=event, n_rows=n_rows: QuerySetup(event, n_rows))
+
+
+def FailureCostCases(sizes, data_dir=DATA_DIR):
+    """
+    Function yields (case, rows, setup) for the failed_banks cleaning steps at each size.
+    """
+
+    def RawFailedBanks(n_rows):
+        raw = ScaleDataset('FailedBanks', n_rows, data_dir=data_dir)
+
+        # A Third of the Costs Missing So the Imputation Has Work to Do
+        raw.loc[np.random.default_rng(1).random(n_rows) < 0.3, 'COST'] = np.nan
+        return raw
+
+    def CleanSetup(n_rows):
+        raw = RawFailedBanks(n_rows)
+        return lambda: CleanFailedBanks(raw)
+
+    def ImputeSetup(n_rows):
+        raw = RawFailedBanks(n_rows)
+        clean = CleanFailedBanks(raw)
+        clean['CHCLASS1'] = raw['CHCLASS1'].astype(str).to_numpy()
+        clean['COST'] = raw['COST'].to_numpy()
+        return lambda: ImputeCost(clean)
+
+    for n_rows in sizes:
+        yield f'CleanFailedBanks/{n_rows}', n_rows, lambda n_rows=n_rows: CleanSetup(n_rows)
+        yield f'ImputeCost/{n_rows}', n_rows, lambda n_rows=n_rows: ImputeSetup(n_rows)
+
+
+def FFIECCases():
+    """
+    Function yields (case, calls, setup) for FFIEC_Client calls against a local MockFFIECServer.
+
+    The server and client start with the first selected case and stop when the cases are exhausted.
+    """
+
+    def CallSetup(call):
+        if 'client' not in state:
+            if SOAP_CLIENT_DIR not in sys.path:
+                sys.path.append(SOAP_CLIENT_DIR)
+            from ffipy import FFIEC_Client
+            from MockFFIECServer import MockFFIECServer
+
+            state['server'] = MockFFIECServer().start()
+            state['client'] = FFIEC_Client(wsse=('user', 'token'), store_login=False, check_login=False,
+                                           cache=False, wsdl=state['server'].wsdl_url)
+        client = state['client']
+        return lambda: [call(client) for _ in range(FFIEC_CALLS)]
+
+    calls = {'retrieve_reporting_periods': lambda client: client.retrieve_reporting_periods(),
+             'retrieve_panel_of_reporters': lambda client: client.retrieve_panel_of_reporters(
+                 reporting_pd_end='12/31/2009'),
+             'retrieve_facsimile': lambda client: client.retrieve_facsimile(
+                 reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF'),
+             'stream_facsimile': lambda client: client.stream_facsimile(
+                 reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF')}
+
+    state = {}
+    try:
+        for method, call in calls.items():
+            yield f'FFIEC/{method}', FFIEC_CALLS, lambda call=call: CallSetup(call)
+    finally:
+        if 'server' in state:
+            state['server'].stop()
+
+
+def RunBenchmarks(sizes=SIZES[:3], data_dir=DATA_DIR, only=None, repeats=3, progress=print):
+    """
+    Function runs every case (or those whose name contains one of only) and returns the results frame.
+
+    A case's data is only built when it is selected, and freed before the next one.
+
+    Columns: case, rows, seconds, peak_mb, rows_per_sec.
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        groups = [EventCases(sizes, data_dir), CSVCases(sizes, data_dir, work_dir), QueryCases(sizes, data_dir, work_dir),
+                  FailureCostCases(sizes, data_dir), FFIECCases()]
+        for group in groups:
+            for case, rows, setup in group:
+                if only and not any(part in case for part in only):
+                    continue
+                seconds, peak = Measure(setup(), repeats)
+                results.append({'case': case, 'rows': rows, 'seconds': seconds, 'peak_mb': peak / 2 ** 20,
+                                'rows_per_sec': rows / seconds if seconds else float('nan')})
+                progress(f"{case:<48} {rows:>12,} {seconds:>10.4f}s {peak / 2 ** 20:>10.1f}MB")
+
+    return pd.DataFrame(results, columns=['case', 'rows', 'seconds', 'peak_mb', 'rows_per_sec'])
+
+
+def SaveResults(results, path):
+    """
+    Function saves benchmark results as JSON (one record per case).
+    """
+
+    with open(path, 'w') as f:
+        json.dump(results.to_dict(orient='records'), f, indent=1)
+
+
+def LoadResults(path):
+    """
+    Function loads benchmark results saved by SaveResults.
+    """
+
+    with open(path) as f:
+        return pd.DataFrame(json.load(f))
+
+
+def CompareResults(results, baseline, time_tolerance=0.25, memory_tolerance=0.10):
+    """
+    Function joins results to a baseline on case and flags regressions.
+
+    A case regresses when it is more than time_tolerance slower or memory_tolerance larger than the baseline.
+    Cases missing from the baseline are kept with no ratios and never regress.
+    """
+
+    compared = results.merge(baseline[['case', 'seconds', 'peak_mb']], on='case', how='left',
+                             suffixes=('', '_baseline'))
+    compared['time_ratio'] = compared['seconds'] / compared['seconds_baseline']
+    compared['memory_ratio'] = compared['peak_mb'] / compared['peak_mb_baseline']
+    compared['regression'] = ((compared['time_ratio'] > 1 + time_tolerance) |
+                              (compared['memory_ratio'] > 1 + memory_tolerance))
+
+    return compared
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the data-prep hot paths on synthetic data.')
+    parser.add_argument('--max-rows', type=int, default=1_000_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--only', nargs='*', help='run only cases whose name contains one of these')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved earlier')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    sizes = [n for n in SIZES if n <= args.max_rows]
+    results = RunBenchmarks(sizes, args.data_dir, args.only, args.repeats)
+    if args.save:
+        SaveResults(results, args.save)
+
+    if args.baseline:
+        compared = CompareResults(results, LoadResults(args.baseline), args.time_tolerance, args.memory_tolerance)
+        regressions = compared.loc[compared['regression']]
+        print(compared[['case', 'seconds', 'seconds_baseline', 'time_ratio', 'peak_mb', 'memory_ratio']]
+              .to_string(index=False, float_format='{:.3f}'.format))
+        if len(regressions):
+            print(f'{len(regressions)} regression(s): ' + ', '.join(regressions['case']))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
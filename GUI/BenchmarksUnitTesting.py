@@ -0,0 +1,37 @@
+import os
+import unittest
+import pandas as pd
+from Benchmarks import CompareResults, RunBenchmarks, ScaleDataset
+from Schemas import ReadDataset
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class Benchmarks_Test(unittest.TestCase):
+    def test_scale_dataset_keeps_schema(self):
+        columns = ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE', 'CHANGECODE_DESC']
+        real = ReadDataset('Liquidations', columns, DATA_DIR)
+        scaled = ScaleDataset('Liquidations', 5000, columns, DATA_DIR)
+        self.assertEqual(len(scaled), 5000)
+        pd.testing.assert_series_equal(scaled.dtypes, real.dtypes)
+        self.assertTrue(set(scaled['CHANGECODE_DESC'].dropna()) <= set(real['CHANGECODE_DESC'].dropna()))
+
+        # Extracts Not Shipped Borrow a Shipped One With the Same Schema
+        combinations = ScaleDataset('Combinations', 100, ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE'], DATA_DIR)
+        self.assertEqual(list(combinations.columns), ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE'])
+
+    def test_run_and_compare(self):
+        results = RunBenchmarks([1000], DATA_DIR, only=['CountByYear/Failures', 'ImputeCost'], repeats=1,
+                                progress=lambda message: None)
+        self.assertEqual(results['case'].tolist(), ['CountByYear/Failures/1000', 'ImputeCost/1000'])
+        self.assertTrue((results['seconds'] > 0).all())
+
+        # Slower or Larger Than the Tolerance Is a Regression; New Cases Never Are
+        baseline = results.copy()
+        baseline.loc[0, 'seconds'] = results.loc[0, 'seconds'] / 2
+        baseline = baseline.loc[[0]]
+        compared = CompareResults(results, baseline)
+        self.assertEqual(compared['regression'].tolist(), [True, False])
+        self.assertEqual(CompareResults(results, results)['regression'].tolist(), [False, False])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import MaxNLocator
+from Instrumentation import Timed, Timer
+
+'''
+Developer Notes:
+Persistent bar chart for the GUI. One Figure and one canvas live for the whole session; every click
+updates the existing bars and count labels in place instead of building a new figure and canvas.
+The Figure is created directly (not through pyplot) so nothing accumulates in pyplot's registry.
+
+When the years and the y-axis limit are unchanged, only the bars, count labels and titles are
+redrawn over a saved background (blitting). The y-axis limit is rounded to a tick value, so it only changes
+when the counts move far enough to need new ticks.
+Without a Tk master the chart renders on the Agg canvas, which is what headless scripts use to save images.
+'''
+
+SERIES = {'Commercial': {'color': 'tab:blue', 'label_color': 'blue', 'offset': -0.123},
+          'Savings': {'color': 'tab:orange', 'label_color': 'chocolate', 'offset': 0.123}}
+BAR_WIDTH = 0.25
+
+
+class BarChart:
+    """
+    Bar chart of event counts by year that is drawn once and then updated in place.
+
+    master is the Tk widget holding the canvas (None renders on an Agg canvas). blit defaults to
+    True for Tk charts.
+    """
+
+    def __init__(self, master=None, figsize=(12, 5), blit=None):
+        self.figure = Figure(figsize=figsize)
+        self.axis = self.figure.add_subplot()
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.blit = master is not None if blit is None else blit
+        self.bars = {}
+        self.labels = {}
+        self.layout = None
+        self.background = None
+
+        # Every Full Redraw (including Tk resizes) Saves a New Background and Puts the Bars Back
+        if self.blit:
+            self.axis.title.set_animated(True)
+            self.axis.yaxis.label.set_animated(True)
+            self.canvas.mpl_connect('draw_event', self._OnDraw)
+
+    def _Artists(self):
+        yield self.axis.title
+        yield self.axis.yaxis.label
+        for name in self.bars:
+            yield from self.bars[name]
+            yield from self.labels[name]
+
+    def _Build(self, n_bars):
+        # Replace the Bars and Labels Only When the Number of Years Changes
+        for name in self.bars:
+            self.bars[name].remove()
+            for label in self.labels[name]:
+                label.remove()
+        positions = np.arange(n_bars)
+        for name, style in SERIES.items():
+            self.bars[name] = self.axis.bar(positions + style['offset'], np.zeros(n_bars), BAR_WIDTH,
+                                            color=style['color'], label=name, animated=self.blit)
+            self.labels[name] = [self.axis.text(i + style['offset'], 0, '', color=style['label_color'],
+                                                fontweight='bold', horizontalalignment='center', size=8,
+                                                animated=self.blit)
+                                 for i in positions]
+        self.axis.set_xticks(positions)
+        self.axis.set_xlim(-0.5, n_bars - 0.5)
+        self.axis.legend(fontsize=10)
+
+    @Timed('render/Draw')
+    def Draw(self, df, category, x='Year'):
+        """
+        Function shows the counts of one event type (the wide frame returned by CountByYear).
+        """
+
+        n_bars = len(df)
+        if any(len(bars) != n_bars for bars in self.bars.values()) or not self.bars:
+            self._Build(n_bars)
+            self.layout = None
+
+        # Update Bars and Labels In Place
+        for name, style in SERIES.items():
+            values = df[name].to_numpy() if name in df else np.zeros(n_bars, dtype=np.int64)
+            for i, (bar, label, v) in enumerate(zip(self.bars[name], self.labels[name], values)):
+                bar.set_height(v)
+                label.set_text(str(v))
+                label.set_position((i + style['offset'], 1.01 * v))
+
+        # Label Plot
+        self.axis.set_ylabel(f'Count of {category}', size=10)
+        self.axis.set_title(f'{category} by Year', size=15)
+
+        # Axis Limit Rounded to a Tick Value (so small changes keep the same layout)
+        peak = max([df[name].max() for name in SERIES if name in df] + [1])
+        top = MaxNLocator(nbins='auto').tick_values(0, peak * 1.08)[-1]
+        layout = (tuple(df[x].tolist()), top)
+
+        if layout != self.layout:
+            self.axis.set_ylim(0, top)
+            self.axis.set_xticks(np.arange(n_bars), [str(year) for year in df[x]])
+            self.axis.set_xlabel('Year', size=10)
+            self.axis.tick_params(axis='x', labelsize=7, labelrotation=0)
+            self.axis.tick_params(axis='y', labelsize=7)
+            self.layout = layout
+            self._FullDraw()
+        elif self.blit:
+            self._BlitDraw()
+        else:
+            self.canvas.draw_idle()
+
+        return self
+
+    def _FullDraw(self):
+        if self.blit:
+            self.canvas.draw()
+        else:
+            self.canvas.draw_idle()
+
+    def _OnDraw(self, event):
+        # Everything Except the Bars Was Just Drawn: Save It as the Background, Then Add the Bars
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._BlitDraw()
+
+    def _BlitDraw(self):
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self._Artists():
+            self.axis.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def Save(self, path, **kwargs):
+        """
+        Function saves the current chart to an image file.
+        """
+
+        # Animated (blitted) artists are skipped by savefig unless switched off while saving
+        for artist in self._Artists():
+            artist.set_animated(False)
+        try:
+            with Timer('render/savefig'):
+                self.figure.savefig(path, **kwargs)
+        finally:
+            for artist in self._Artists():
+                artist.set_animated(self.blit)
+            if self.blit and self.layout is not None:
+                self._FullDraw()
@@ -0,0 +1,134 @@
+import os
+import resource
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from ChartPanel import BarChart
+from EventCube import BuildCube
+from Schemas import EVENTS
+
+def ResidentMemory():
+    # Current RSS in bytes (Linux), otherwise the peak RSS
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def Counts(seed, start_year=2000, end_year=2004):
+    rng = np.random.default_rng(seed)
+    years = np.arange(start_year, end_year + 1)
+    return pd.DataFrame({'Year': years, 'Commercial': rng.integers(120, 180, len(years)),
+                         'Savings': rng.integers(0, 50, len(years))})
+
+def Widgets(widget):
+    # Every Widget Below a Tk Widget
+    for child in widget.winfo_children():
+        yield child
+        yield from Widgets(child)
+
+def Cube(n=2000):
+    rng = np.random.default_rng(5)
+    frames = {}
+    for event, spec in EVENTS.items():
+        frames[event] = pd.DataFrame({spec['cert_col']: rng.integers(1, 9000, n),
+                                      spec['class_col']: rng.choice(['Commercial', 'Savings'], n),
+                                      spec['date_col']: pd.Timestamp('2000-01-01') +
+                                      pd.to_timedelta(rng.integers(0, 7300, n), unit='D'),
+                                      **{col: value for col, value in spec['filter_criteria'].items()}})
+    return BuildCube(frames)
+
+class ChartPanel_Test(unittest.TestCase):
+    def test_bars_updated_in_place(self):
+        chart = BarChart(blit=True)
+        chart.Draw(Counts(0), 'Failures')
+        bars = chart.bars['Commercial']
+
+        df = Counts(1)
+        chart.Draw(df, 'Liquidations')
+
+        self.assertIs(chart.bars['Commercial'], bars)
+        self.assertEqual([bar.get_height() for bar in bars], df['Commercial'].tolist())
+        self.assertEqual([label.get_text() for label in chart.labels['Savings']], df['Savings'].astype(str).tolist())
+        self.assertEqual(chart.axis.get_title(), 'Liquidations by Year')
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_year_range_change_rebuilds_bars(self):
+        chart = BarChart()
+        chart.Draw(Counts(0), 'Failures')
+        chart.Draw(Counts(1, 2000, 2020), 'Failures')
+
+        self.assertEqual(len(chart.bars['Savings']), 21)
+        self.assertEqual(len(chart.axis.patches), 42)
+        self.assertEqual(len(chart.axis.texts), 42)
+
+    def test_memory_flat_over_1000_clicks(self):
+        chart = BarChart(figsize=(6, 3), blit=True)
+        events = ['New Institutions', 'Failures', 'Liquidations', 'Combinations']
+        frames = [Counts(seed) for seed in range(12)]
+
+        # Every 100th Click Picks a New Year Range (new bars, full redraw)
+        def Click(click):
+            df = frames[click % len(frames)] if click % 100 else Counts(click, 2000, 2001 + click // 100 % 20)
+            chart.Draw(df, events[click % len(events)])
+
+        # Warm Up (font cache, renderer) Before Measuring
+        for click in range(100):
+            Click(click)
+        before = ResidentMemory()
+        for click in range(1000):
+            Click(click)
+        after = ResidentMemory()
+
+        self.assertLess(after - before, 10 * 2**20)
+        self.assertEqual(len(chart.axis.patches), 2 * len(frames[0]))
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_gui_clicks_reuse_one_tk_canvas(self):
+        try:
+            import tkinter
+            tkinter.Tk().destroy()
+        except Exception as error:
+            self.skipTest(f'Tk needs a display: {error}')
+        from UserGui import plot
+        cube = Cube()
+        results = {}
+
+        # Stand In for the User: Wait for the Loader, Then Press the Event Buttons
+        def Drive(window):
+            buttons = {widget.cget('text'): widget for widget in Widgets(window) if isinstance(widget, tkinter.Button)}
+            minyear, maxyear = [widget for widget in Widgets(window) if isinstance(widget, tkinter.Entry)]
+            while buttons['NEW BANKS'].cget('state') == tkinter.DISABLED:
+                window.update()
+                time.sleep(0.01)
+            minyear.insert(0, '2000')
+            maxyear.insert(0, '2010')
+            events = ['NEW BANKS', 'FAILED BANKS', 'LIQUIDATED BANKS', 'COMBINED BANKS']
+
+            def Click(click):
+                buttons[events[click % len(events)]].invoke()
+                window.update()
+
+            # Warm Up (font cache, renderer) Before Measuring
+            for click in range(100):
+                Click(click)
+            before = ResidentMemory()
+            for click in range(1000):
+                Click(click)
+            results['growth'] = ResidentMemory() - before
+            results['canvases'] = [widget for widget in Widgets(window) if isinstance(widget, tkinter.Canvas)]
+            window.destroy()
+
+        # GenerateHistogram Runs Through the Real FigureCanvasTkAgg; mainloop Is the Driver
+        with mock.patch.object(tkinter.Tk, 'mainloop', Drive):
+            plot(None, None, None, None, ['test'], loader=lambda progress: {'cube': cube})
+
+        self.assertEqual(len(results['canvases']), 1)
+        self.assertLess(results['growth'], 10 * 2**20)
+        self.assertEqual(plt.get_fignums(), [])
+
+if __name__ == '__main__':
+    unittest.main()
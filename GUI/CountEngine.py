@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+'''
+Developer Notes:
+Single pass counting of FDIC events by class type and year. Every row is encoded as
+class_code * n_years + year_offset and counted with np.bincount, so missing years come
+out as zeros without any fill-in loop.
+'''
+
+
+def YearValues(col):
+    """
+    Function returns the year of every row as an integer array.
+
+    Accepts either a datetime column (EFFDATE) or an integer year column (EFFYEAR).
+    Missing values come back as -1.
+    """
+
+    if pd.api.types.is_datetime64_any_dtype(col):
+        years = col.dt.year
+    else:
+        years = pd.to_numeric(col, errors='coerce')
+
+    return years.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def ClassCodes(col, classes):
+    """
+    Function returns the position of every row's class type within classes (-1 if not listed).
+    """
+
+    classes = pd.Index(list(classes))
+
+    # Categorical Columns: Only Look Up Each Category Once
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        lookup = np.append(classes.get_indexer(col.cat.categories), -1)
+        return lookup[col.cat.codes.to_numpy()].astype(np.int64)
+
+    return classes.get_indexer(col).astype(np.int64)
+
+
+def CountEvents(df, class_col, date_col, classes=('Commercial', 'Savings'), start_year=2000,
+                end_year=2020, count_col=None, year_label='Year'):
+    """
+    Function counts events by class type and year in a single pass.
+
+    classes can be a list of class types or a dict of class type -> output column name
+    (e.g. {'C': 'Commercial', 'S': 'Savings'}). Every year from start_year to end_year is
+    present in the output, with a count of 0 where nothing happened. Like groupby().count(),
+    rows where count_col is missing are not counted.
+    """
+
+    # Output Column Names
+    if isinstance(classes, dict):
+        labels = list(classes.values())
+        classes = list(classes.keys())
+    else:
+        classes = list(classes)
+        labels = classes
+    n_years = end_year - start_year + 1
+    if n_years < 1:
+        raise ValueError(f'end_year ({end_year}) is before start_year ({start_year})')
+
+    # Encode Class Type and Year
+    codes = ClassCodes(df[class_col], classes)
+    offsets = YearValues(df[date_col]) - start_year
+
+    # Keep Rows Inside the Grid
+    valid = (codes >= 0) & (offsets >= 0) & (offsets < n_years)
+    if count_col is not None:
+        valid &= df[count_col].notna().to_numpy()
+
+    # Count Everything At Once
+    keys = codes[valid] * n_years + offsets[valid]
+    counts = np.bincount(keys, minlength=len(classes) * n_years).reshape(len(classes), n_years)
+
+    # Wide Format: Year + One Column per Class Type
+    df_counts = pd.DataFrame({year_label: np.arange(start_year, end_year + 1)})
+    for label, row in zip(labels, counts):
+        df_counts[label] = row
+
+    return df_counts
@@ -0,0 +1,63 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from CountEngine import CountEvents
+
+'''
+Developer Notes:
+Times CountEvents on synthetic events tables of growing size to show the counting scales
+linearly with the number of rows. Run from the parent folder:
+
+    python GUI/CountEngineBenchmark.py --max-rows 10000000
+'''
+
+
+def SyntheticEvents(n_rows, start_year=1934, end_year=2021, seed=0):
+    """
+    Function builds a synthetic events table shaped like the FDIC extracts (CERT, class type, EFFDATE).
+    """
+
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(f'{start_year}-01-01')
+    n_days = (np.datetime64(f'{end_year}-12-31') - start).astype(int)
+    classes = pd.Categorical.from_codes(rng.integers(0, 3, n_rows),
+                                        categories=['Commercial', 'Savings', 'Other'])
+
+    return pd.DataFrame({'CERT': rng.integers(1, 60000, n_rows),
+                         'FRM_CLASS_TYPE_DESC': classes,
+                         'EFFDATE': start + rng.integers(0, n_days, n_rows).astype('timedelta64[D]')})
+
+
+def TimeCountEvents(df, repeats=3):
+    """
+    Function returns the best of repeats wall clock times for one CountEvents call.
+    """
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        CountEvents(df, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', start_year=2000, end_year=2020, count_col='CERT')
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CountEvents on synthetic events tables.')
+    parser.add_argument('--max-rows', type=int, default=10_000_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # Sizes Grow by 10x up to max rows
+    sizes = [n for n in (10_000, 100_000, 1_000_000, 10_000_000) if n <= args.max_rows]
+
+    print(f"{'rows':>12} {'seconds':>10} {'ns/row':>8}")
+    for n_rows in sizes:
+        df = SyntheticEvents(n_rows)
+        seconds = TimeCountEvents(df, args.repeats)
+        print(f'{n_rows:>12,} {seconds:>10.4f} {1e9 * seconds / n_rows:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import unittest
+import pandas as pd
+from CountEngine import CountEvents
+
+class CountEngine_Test(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'CERT': [1, 2, 3, 4, 5, None],
+            'CLASS': ['Commercial', 'Savings', 'Commercial', 'Other', 'Commercial', 'Savings'],
+            'EFFDATE': pd.to_datetime(['2000-01-05', '2000-06-01', '2002-03-01',
+                                       '2001-01-01', '1999-12-31', '2001-02-02'])})
+
+    def test_missing_years_are_zero(self):
+        counts = CountEvents(self.df, 'CLASS', 'EFFDATE', start_year=2000, end_year=2003)
+
+        self.assertEqual(list(counts.columns), ['Year', 'Commercial', 'Savings'])
+        self.assertEqual(list(counts['Year']), [2000, 2001, 2002, 2003])
+        self.assertEqual(list(counts['Commercial']), [1, 0, 1, 0])
+        self.assertEqual(list(counts['Savings']), [1, 1, 0, 0])
+
+    def test_count_col_skips_missing(self):
+        counts = CountEvents(self.df, 'CLASS', 'EFFDATE', start_year=2000, end_year=2003, count_col='CERT')
+
+        self.assertEqual(list(counts['Savings']), [1, 0, 0, 0])
+
+    def test_matches_groupby(self):
+        counts = CountEvents(self.df, 'CLASS', 'EFFDATE', classes=['Commercial', 'Savings', 'Other'],
+                             start_year=1999, end_year=2002)
+        expected = self.df.groupby(['CLASS', self.df['EFFDATE'].dt.year]).size()
+
+        for (class_type, year), count in expected.items():
+            self.assertEqual(counts.loc[counts['Year'] == year, class_type].item(), count)
+        self.assertEqual(counts[['Commercial', 'Savings', 'Other']].to_numpy().sum(), len(self.df))
+
+    def test_integer_years_and_labels(self):
+        df = pd.DataFrame({'EFFYEAR': [2010, 2010, 2011], 'CLASS_TYPE': ['C', 'S', 'C']})
+        counts = CountEvents(df, 'CLASS_TYPE', 'EFFYEAR', classes={'C': 'Commercial', 'S': 'Savings'},
+                             start_year=2010, end_year=2011, year_label='Effective Year')
+
+        self.assertEqual(list(counts.columns), ['Effective Year', 'Commercial', 'Savings'])
+        self.assertEqual(list(counts['Commercial']), [1, 1])
+
+    def test_bad_year_range(self):
+        with self.assertRaises(ValueError):
+            CountEvents(self.df, 'CLASS', 'EFFDATE', start_year=2005, end_year=2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
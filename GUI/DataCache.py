@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from Instrumentation import Count, Timer
+
+'''
+Developer Notes:
+Typed columnar cache for the FDIC CSV extracts. The first load of a CSV parses it once
+(dates as datetime64, low-cardinality text such as class codes as categoricals) and saves it
+next to the data in data/.cache. Later loads read the cached file and only the requested columns.
+The cache is keyed on the CSV's modification time, size and SHA-1: a new mtime with the same
+contents only refreshes the manifest, while changed contents rebuild the cache.
+
+Parquet is used when pyarrow is installed (only the projected columns are read from disk);
+otherwise the typed frame is pickled.
+'''
+
+CACHE_DIR = os.path.join('data', '.cache')
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+
+def FileHash(path, block_size=1 << 20):
+    """
+    Function returns the SHA-1 of a file, read in blocks.
+    """
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+
+def TypeColumns(df, max_categories=0.05):
+    """
+    Function converts the text columns of a freshly parsed extract to compact types.
+
+    Columns named *DATE are parsed as datetimes. Text columns with few distinct values
+    (at most max_categories of the rows, e.g. class codes) become categoricals.
+    """
+
+    for col in df.columns:
+        if not (df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype)):
+            continue
+
+        # Dates
+        if col.upper().endswith('DATE'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+        # Class Codes and Other Repeated Text
+        elif df[col].nunique() <= max(max_categories * len(df), 2):
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+def _CachePaths(path, cache_dir, variant=None):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if variant:
+        stem = f'{stem}.{variant}'
+    extension = 'parquet' if CACHE_FORMAT == 'parquet' else 'pkl'
+    return (os.path.join(cache_dir, f'{stem}.{extension}'),
+            os.path.join(cache_dir, f'{stem}.json'))
+
+
+def _ReadManifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _WriteManifest(manifest_path, manifest):
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, manifest_path)
+
+
+def IsCacheFresh(path, cache_dir=CACHE_DIR, variant=None):
+    """
+    Function checks whether the cached copy of a CSV still matches the CSV on disk.
+
+    Returns True when the cache can be used. A changed mtime with unchanged contents
+    (e.g. a fresh checkout) updates the manifest instead of forcing a rebuild.
+    """
+
+    cache_path, manifest_path = _CachePaths(path, cache_dir, variant)
+    manifest = _ReadManifest(manifest_path)
+    if manifest is None or not os.path.exists(cache_path) or manifest.get('format') != CACHE_FORMAT:
+        return False
+
+    stat = os.stat(path)
+    if manifest['size'] != stat.st_size:
+        return False
+    if manifest['mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    # Same size, new mtime: only trust the cache if the contents are the same
+    if manifest['sha1'] != FileHash(path):
+        return False
+    manifest['mtime_ns'] = stat.st_mtime_ns
+    _WriteManifest(manifest_path, manifest)
+
+    return True
+
+
+def BuildCache(path, cache_dir=CACHE_DIR, read_csv_kwargs=None, type_columns=TypeColumns, variant=None):
+    """
+    Function parses a CSV once, converts it to compact types and saves it to the cache.
+
+    Returns the typed DataFrame. variant keeps differently parsed copies of the same CSV apart.
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path, manifest_path = _CachePaths(path, cache_dir, variant)
+
+    # Fingerprint Before Parsing (a CSV rewritten mid-parse will not match on the next load)
+    stat = os.stat(path)
+    with Timer('io/hash_csv'):
+        sha1 = FileHash(path)
+
+    # Parse and Type the Extract
+    with Timer('parse/read_csv'):
+        df = pd.read_csv(path, **(read_csv_kwargs or {}))
+    with Timer('parse/type_columns'):
+        df = type_columns(df)
+    Count('cache_misses/csv')
+    Count('bytes_read/csv', stat.st_size)
+    Count('rows_parsed/csv', len(df))
+
+    # Write Atomically
+    temp_path = cache_path + '.tmp'
+    with Timer('io/write_cache'):
+        if CACHE_FORMAT == 'parquet':
+            df.to_parquet(temp_path, index=False)
+        else:
+            df.to_pickle(temp_path)
+        os.replace(temp_path, cache_path)
+
+    _WriteManifest(manifest_path, {'source': os.path.abspath(path), 'format': CACHE_FORMAT,
+                                   'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                                   'sha1': sha1, 'columns': list(df.columns)})
+
+    return df
+
+
+def CachedColumns(path, cache_dir=CACHE_DIR, read_csv_kwargs=None, type_columns=TypeColumns, variant=None):
+    """
+    Function returns the columns held in the cache of a CSV, building the cache if needed.
+    """
+
+    if not IsCacheFresh(path, cache_dir, variant):
+        return list(BuildCache(path, cache_dir, read_csv_kwargs, type_columns, variant).columns)
+
+    return _ReadManifest(_CachePaths(path, cache_dir, variant)[1])['columns']
+
+
+def LoadCSV(path, columns=None, cache_dir=CACHE_DIR, read_csv_kwargs=None, type_columns=TypeColumns,
+            variant=None):
+    """
+    Function loads an FDIC CSV through the typed columnar cache.
+
+    Only the requested columns are returned (all columns if columns is None).
+    The cache is (re)built automatically when the CSV is new or has changed.
+    """
+
+    if columns is not None and type(columns) != list:
+        columns = [columns]
+
+    # Rebuild When the CSV Has Changed
+    if not IsCacheFresh(path, cache_dir, variant):
+        df = BuildCache(path, cache_dir, read_csv_kwargs, type_columns, variant)
+        return df if columns is None else df[columns].copy()
+
+    # Read Only the Projected Columns
+    cache_path, _ = _CachePaths(path, cache_dir, variant)
+    Count('cache_hits/csv')
+    Count('bytes_read/cache', os.path.getsize(cache_path))
+    with Timer('io/read_cache'):
+        if CACHE_FORMAT == 'parquet':
+            return pd.read_parquet(cache_path, columns=columns)
+
+        df = pd.read_pickle(cache_path)
+        return df if columns is None else df[columns].copy()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import DataCache
+from DataCache import LoadCSV
+
+class DataCache_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp, '.cache')
+        self.csv = os.path.join(self.tmp, 'Liquidations.csv')
+        self.WriteCSV(['Commercial', 'Savings'] * 50)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def WriteCSV(self, classes):
+        pd.DataFrame({'CERT': range(len(classes)),
+                      'FRM_CLASS_TYPE_DESC': classes,
+                      'EFFDATE': ['2001-05-04T00:00:00'] * len(classes),
+                      'INSTNAME': [f'Bank {i}' for i in range(len(classes))]}).to_csv(self.csv, index=False)
+
+    def test_typed_projection(self):
+        df = LoadCSV(self.csv, ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'], cache_dir=self.cache_dir)
+        cached = LoadCSV(self.csv, ['FRM_CLASS_TYPE_DESC', 'EFFDATE'], cache_dir=self.cache_dir)
+
+        self.assertEqual(list(df.columns), ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'])
+        self.assertEqual(list(cached.columns), ['FRM_CLASS_TYPE_DESC', 'EFFDATE'])
+        self.assertIsInstance(cached['FRM_CLASS_TYPE_DESC'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(cached['EFFDATE']))
+        self.assertEqual(cached['EFFDATE'].dt.year.unique().tolist(), [2001])
+
+    def test_rebuild_on_change(self):
+        LoadCSV(self.csv, cache_dir=self.cache_dir)
+        self.WriteCSV(['Savings'] * 120)
+
+        self.assertFalse(DataCache.IsCacheFresh(self.csv, self.cache_dir))
+        df = LoadCSV(self.csv, 'FRM_CLASS_TYPE_DESC', cache_dir=self.cache_dir)
+        self.assertEqual(len(df), 120)
+        self.assertTrue(DataCache.IsCacheFresh(self.csv, self.cache_dir))
+
+    def test_touch_keeps_cache(self):
+        LoadCSV(self.csv, cache_dir=self.cache_dir)
+        stat = os.stat(self.csv)
+        os.utime(self.csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertTrue(DataCache.IsCacheFresh(self.csv, self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+import os
+import numpy as np
+import pandas as pd
+from CountEngine import ClassCodes, YearValues
+from Instrumentation import Count, Timed, Timer
+from Schemas import DATA_DIR, EVENTS, DatasetPath, EventColumns, LoadDataset
+
+'''
+Developer Notes:
+Materialized aggregate cube of FDIC events: event type x class type x charter class x state x quarter.
+It is built once from the raw extracts (one np.bincount per event type) and saved to
+data/.cache/event_cube.npz. Queries never touch row-level data: yearly series are sliced from the
+cube and range totals come from prefix sums along the quarter axis.
+'''
+
+CUBE_FILE = 'event_cube.npz'
+CLASS_TYPES = ['Commercial', 'Savings', 'Other']
+DIMENSIONS = ['event', 'class_type', 'charter', 'state']
+
+
+def _Labels(col):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return [str(label) for label in col.cat.categories]
+    return [str(label) for label in col.dropna().unique()]
+
+
+class EventCube:
+    """
+    Counts of events by event type, class type, charter class, state and quarter.
+
+    counts has shape (events, class types, charters, states, quarters); quarter 0 is Q1 of start_year.
+    """
+
+    def __init__(self, counts, events, charters, states, start_year, sources=()):
+        self.counts = counts
+        self.events = list(events)
+        self.class_types = list(CLASS_TYPES)
+        self.charters = list(charters)
+        self.states = list(states)
+        self.start_year = int(start_year)
+        self.end_year = self.start_year + counts.shape[-1] // 4 - 1
+        self.sources = list(sources)
+
+        # Prefix Sums Along the Quarter Axis (leading 0 so a range total is one subtraction)
+        self.cumulative = np.concatenate([np.zeros(counts.shape[:-1] + (1,), dtype=np.int64),
+                                          np.cumsum(counts, axis=-1, dtype=np.int64)], axis=-1)
+
+    def _Index(self, labels, selected):
+        if selected is None:
+            return np.arange(len(labels))
+        if isinstance(selected, str):
+            selected = [selected]
+        return np.array([labels.index(label) for label in selected if label in labels], dtype=np.int64)
+
+    def _Slice(self, event, class_types, charters, states):
+        event_index = self.events.index(event)
+        return np.ix_(self._Index(self.class_types, class_types), self._Index(self.charters, charters),
+                      self._Index(self.states, states)), event_index
+
+    def Counts(self, event, start_year=2000, end_year=2020, class_types=('Commercial', 'Savings'),
+               charters=None, states=None, freq='year'):
+        """
+        Function returns the counts of one event type in the same wide format as CountByYear.
+
+        One row per year (freq='year') or quarter (freq='quarter'), one column per class type.
+        charters / states restrict the count to the listed charter classes / states (None = all).
+        """
+
+        class_types = list(class_types)
+        (class_index, charter_index, state_index), event_index = self._Slice(event, class_types,
+                                                                             charters, states)
+
+        # Sum Over Charter and State (cells, never rows)
+        counts = self.counts[event_index][class_index, charter_index, state_index].sum(axis=(1, 2))
+
+        # Pad Years Outside the Cube With Zeros
+        n_years = end_year - start_year + 1
+        series = np.zeros((len(class_types), n_years * 4), dtype=np.int64)
+        first = max(start_year, self.start_year)
+        last = min(end_year, self.end_year)
+        if first <= last:
+            series[:, (first - start_year) * 4:(last - start_year + 1) * 4] = \
+                counts[:, (first - self.start_year) * 4:(last - self.start_year + 1) * 4]
+
+        if freq == 'quarter':
+            periods = pd.period_range(f'{start_year}Q1', f'{end_year}Q4', freq='Q')
+            df_counts = pd.DataFrame({'Quarter': periods.astype(str)})
+        else:
+            series = series.reshape(len(class_types), n_years, 4).sum(axis=2)
+            df_counts = pd.DataFrame({'Year': np.arange(start_year, end_year + 1)})
+        for class_type, row in zip(class_types, series):
+            df_counts[class_type] = row
+
+        return df_counts
+
+    def Total(self, event=None, start_year=2000, end_year=2020, class_types=None, charters=None, states=None):
+        """
+        Function returns the total number of events in a year range from the prefix sums.
+        """
+
+        first = (max(start_year, self.start_year) - self.start_year) * 4
+        last = (min(end_year, self.end_year) - self.start_year + 1) * 4
+        if last <= first:
+            return 0
+
+        events = self.events if event is None else [event]
+        total = 0
+        for name in events:
+            (class_index, charter_index, state_index), event_index = self._Slice(name, class_types,
+                                                                                 charters, states)
+            cumulative = self.cumulative[event_index][class_index, charter_index, state_index]
+            total += int((cumulative[..., last] - cumulative[..., first]).sum())
+
+        return total
+
+    def Rollup(self, by, start_year=2000, end_year=2020):
+        """
+        Function returns event totals in a year range grouped by any of the cube dimensions.
+
+        by is a list drawn from 'event', 'class_type', 'charter', 'state'.
+        """
+
+        if isinstance(by, str):
+            by = [by]
+        first = (max(start_year, self.start_year) - self.start_year) * 4
+        last = max((min(end_year, self.end_year) - self.start_year + 1) * 4, first)
+
+        # Range Totals for Every Cell, Then Sum Away the Other Dimensions
+        totals = self.cumulative[..., last] - self.cumulative[..., first]
+        keep = [DIMENSIONS.index(dim) for dim in by]
+        totals = totals.sum(axis=tuple(axis for axis in range(len(DIMENSIONS)) if axis not in keep))
+
+        labels = [self.events, self.class_types, self.charters, self.states]
+        keep = sorted(keep)
+        if len(keep) == 1:
+            index = pd.Index(labels[keep[0]], name=DIMENSIONS[keep[0]])
+        else:
+            index = pd.MultiIndex.from_product([labels[axis] for axis in keep],
+                                               names=[DIMENSIONS[axis] for axis in keep])
+        rollup = pd.Series(totals.ravel(), index=index, name='Count')
+
+        return rollup.reorder_levels(by) if len(by) > 1 else rollup
+
+    def Save(self, path):
+        """
+        Function saves the cube to a compressed .npz file.
+        """
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp.npz'
+        np.savez_compressed(temp_path, counts=self.counts, events=np.array(self.events),
+                            charters=np.array(self.charters), states=np.array(self.states),
+                            start_year=self.start_year, sources=np.array(self.sources, dtype=str))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def Load(cls, path):
+        """
+        Function loads a cube saved with Save.
+        """
+
+        with Timer('io/read_cube'), np.load(path) as data:
+            return cls(data['counts'], data['events'].tolist(), data['charters'].tolist(),
+                       data['states'].tolist(), int(data['start_year']), data['sources'].tolist())
+
+
+@Timed('aggregate/BuildCube')
+def BuildCube(frames, start_year=None, end_year=None, sources=()):
+    """
+    Function builds an EventCube from raw event frames.
+
+    frames is a dict of event type (a key of Schemas.EVENTS) -> DataFrame holding at least the
+    columns of EventColumns(event). Charter and state columns that are missing count as 'Unknown'.
+    Date columns may be datetimes or the text of the raw extracts.
+    """
+
+    # Apply Each Event's Filters Once
+    prepared = {}
+    for event, df in frames.items():
+        spec = EVENTS[event]
+        mask = df[spec['cert_col']].notna().to_numpy()
+        for key, value in spec['filter_criteria'].items():
+            mask = mask & (df[key] == value).to_numpy()
+        df = df.loc[mask]
+
+        # Raw Extracts (pd.read_csv) Carry the Date as Text, as FilterDF Accepts
+        if not pd.api.types.is_datetime64_any_dtype(df[spec['date_col']]):
+            df = df.assign(**{spec['date_col']: pd.to_datetime(df[spec['date_col']], errors='coerce')})
+        prepared[event] = df
+
+    # Shared Labels Across Event Types
+    charters, states, years = set(), set(), []
+    for event, df in prepared.items():
+        spec = EVENTS[event]
+        charters.update(_Labels(df[spec['charter_col']]) if spec['charter_col'] in df else ['Unknown'])
+        states.update(_Labels(df[spec['state_col']]) if spec['state_col'] in df else ['Unknown'])
+        event_years = YearValues(df[spec['date_col']])
+        event_years = event_years[event_years >= 0]
+        if len(event_years):
+            years.extend([event_years.min(), event_years.max()])
+    charters, states = sorted(charters | {'Unknown'}), sorted(states | {'Unknown'})
+    start_year = int(start_year if start_year is not None else (min(years) if years else 2000))
+    end_year = int(end_year if end_year is not None else (max(years) if years else 2020))
+    n_quarters = (end_year - start_year + 1) * 4
+
+    counts = np.zeros((len(EVENTS), len(CLASS_TYPES), len(charters), len(states), n_quarters), dtype=np.int32)
+    shape = counts.shape[1:]
+    for event, df in prepared.items():
+        spec = EVENTS[event]
+
+        # Encode Every Dimension
+        class_codes = ClassCodes(df[spec['class_col']], CLASS_TYPES)
+        class_codes[class_codes < 0] = CLASS_TYPES.index('Other')
+        charter_codes = (ClassCodes(df[spec['charter_col']], charters)
+                         if spec['charter_col'] in df else np.full(len(df), -1))
+        charter_codes[charter_codes < 0] = charters.index('Unknown')
+        state_codes = (ClassCodes(df[spec['state_col']], states)
+                       if spec['state_col'] in df else np.full(len(df), -1))
+        state_codes[state_codes < 0] = states.index('Unknown')
+        dates = df[spec['date_col']]
+        quarters = (YearValues(dates) - start_year) * 4 + (dates.dt.quarter.fillna(1).to_numpy(dtype=np.int64) - 1)
+
+        # Count Every Cell At Once
+        valid = (quarters >= 0) & (quarters < n_quarters)
+        keys = np.ravel_multi_index((class_codes[valid], charter_codes[valid], state_codes[valid], quarters[valid]),
+                                    shape)
+        counts[list(EVENTS).index(event)] = np.bincount(keys, minlength=int(np.prod(shape))).reshape(shape)
+
+    return EventCube(counts, list(EVENTS), charters, states, start_year, sources)
+
+
+def SourceFingerprints(data_dir=DATA_DIR):
+    """
+    Function returns size:mtime fingerprints of the extracts a cube is built from.
+    """
+
+    fingerprints = []
+    for event, spec in EVENTS.items():
+        path = DatasetPath(spec['dataset'], data_dir)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints.append(f'{event}:{stat.st_size}:{stat.st_mtime_ns}')
+        else:
+            fingerprints.append(f'{event}:missing')
+
+    return fingerprints
+
+
+def LoadCube(data_dir=DATA_DIR, path=None):
+    """
+    Function loads the saved cube, rebuilding it from the extracts if any of them changed.
+
+    The cube lives in data_dir/.cache unless another path is given.
+    """
+
+    path = path or os.path.join(data_dir, '.cache', CUBE_FILE)
+    sources = SourceFingerprints(data_dir)
+    if os.path.exists(path):
+        cube = EventCube.Load(path)
+        if cube.sources == sources:
+            Count('cache_hits/cube')
+            return cube
+
+    # Rebuild From the Raw Extracts (missing extracts contribute no events)
+    Count('cache_misses/cube')
+    frames = {}
+    for event, spec in EVENTS.items():
+        if os.path.exists(DatasetPath(spec['dataset'], data_dir)):
+            frames[event] = LoadDataset(spec['dataset'], EventColumns(event), data_dir=data_dir)
+    cube = BuildCube(frames, sources=sources)
+    cube.Save(path)
+
+    return cube
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from CountEngine import CountEvents
+from EventCube import BuildCube, EventCube
+from EventData import PrepareData
+from Schemas import DatasetPath
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class EventCube_Test(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 2000
+        self.liquidations = pd.DataFrame({
+            'CERT': rng.integers(1, 9000, n),
+            'FRM_CLASS_TYPE_DESC': rng.choice(['Commercial', 'Savings', None], n),
+            'FRM_CLASS': rng.choice(['N', 'NM', 'SB'], n),
+            'PSTALP': rng.choice(['GA', 'IL', 'TX'], n),
+            'EFFDATE': pd.Timestamp('1995-01-01') + pd.to_timedelta(rng.integers(0, 9000, n), unit='D'),
+            'CHANGECODE_DESC': rng.choice(['FINANCIAL DIFFICULTY - PAYOFF', 'OTHER LIQUIDATIONS AND CLOSINGS'], n)})
+        self.failures = pd.DataFrame({
+            'CERT': rng.integers(1, 9000, n),
+            'ACQ_CLASS_TYPE_DESC': rng.choice(['Commercial', 'Savings'], n),
+            'EFFDATE': pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 7000, n), unit='D')})
+        self.cube = BuildCube({'Liquidations': self.liquidations, 'Failures': self.failures})
+
+    def test_counts_match_rows(self):
+        payoffs = self.liquidations.loc[self.liquidations['CHANGECODE_DESC'] == 'FINANCIAL DIFFICULTY - PAYOFF']
+
+        expected = CountEvents(payoffs, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', start_year=1990, end_year=2022)
+        pd.testing.assert_frame_equal(self.cube.Counts('Liquidations', 1990, 2022), expected)
+
+        georgia = payoffs.loc[payoffs['PSTALP'] == 'GA']
+        expected = CountEvents(georgia, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', start_year=2005, end_year=2010)
+        pd.testing.assert_frame_equal(self.cube.Counts('Liquidations', 2005, 2010, states=['GA']), expected)
+
+    def test_missing_dimensions_are_unknown(self):
+        self.assertEqual(self.cube.Total('Failures', 1900, 2100), len(self.failures))
+        self.assertEqual(self.cube.Total('Failures', 1900, 2100, charters=['Unknown']), len(self.failures))
+        self.assertEqual(self.cube.Total('NewInstitutions', 1900, 2100), 0)
+
+    def test_rollup_and_total_agree(self):
+        by_state = self.cube.Rollup('state', 2001, 2008)
+        for state, count in by_state.items():
+            self.assertEqual(count, self.cube.Total(None, 2001, 2008, states=[state]))
+        self.assertEqual(by_state.sum(), self.cube.Rollup(['event', 'class_type'], 2001, 2008).sum())
+
+    def test_save_and_load(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, 'cube.npz')
+            self.cube.Save(path)
+            loaded = EventCube.Load(path)
+        finally:
+            shutil.rmtree(tmp)
+
+        np.testing.assert_array_equal(loaded.counts, self.cube.counts)
+        self.assertEqual(loaded.states, self.cube.states)
+        pd.testing.assert_frame_equal(loaded.Counts('Failures', freq='quarter'),
+                                      self.cube.Counts('Failures', freq='quarter'))
+
+
+    def test_raw_csv_frames(self):
+        # The Extracts as plot(..., cube=None) Receives Them: Straight From pd.read_csv, EFFDATE as Text
+        liquidations = pd.read_csv(DatasetPath('Liquidations', DATA_DIR), encoding='utf-8-sig')
+        failures = pd.read_csv(DatasetPath('Failures', DATA_DIR), encoding='utf-8-sig')
+        self.assertFalse(pd.api.types.is_datetime64_any_dtype(liquidations['EFFDATE']))
+        # (no NewInstitutions / Combinations extracts here: empty raw frames of the same columns)
+        cube = PrepareData(liquidations, liquidations.iloc[:0], failures.iloc[:0], failures)['cube']
+
+        payoffs = liquidations.loc[liquidations['CHANGECODE_DESC'] == 'FINANCIAL DIFFICULTY - PAYOFF']
+        payoffs = payoffs.assign(EFFDATE=pd.to_datetime(payoffs['EFFDATE']))
+        expected = CountEvents(payoffs, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', start_year=1990, end_year=2020)
+        pd.testing.assert_frame_equal(cube.Counts('Liquidations', 1990, 2020), expected)
+        self.assertEqual(cube.Total('Failures', 1900, 2100), failures['CERT'].notna().sum())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from CountEngine import CountEvents
+from EventCube import BuildCube, LoadCube
+from Instrumentation import Count, Timed, Timer
+from Schemas import EVENTS, LoadDataset
+
+'''
+Developer Notes:
+Data side of the GUI, with no Tk or pyplot imports so it can also run headless (BatchReports.py).
+FilterDF / CountByYear prepare the event frames, LoadData reads and aggregates everything the GUI shows
+and ValidateInputYears checks the year range typed into the GUI or passed on the command line.
+Year Range is from 2000-2020.
+'''
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2020
+
+# Columns FilterDF Keeps for Each Event Type
+EVENT_COLUMNS = {'Liquidations': ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE', 'CHANGECODE_DESC'],
+                 'NewInstitutions': ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'],
+                 'Combinations': ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE'],
+                 'Failures': ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE']}
+
+
+def PredicateMask(df, filter_criteria):
+    """
+    Function returns one boolean mask of the rows matching every filter_criteria entry (None if no row can).
+
+    filter_criteria maps column -> value (equality) or list of values (membership). Categorical columns
+    are compared on their integer codes, each value looked up once in the categories.
+    """
+
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in filter_criteria.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        column = df[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.categories.get_indexer(values)
+            codes = codes[codes >= 0]
+            if not len(codes):
+                return None
+            column_codes = column.cat.codes.to_numpy()
+            mask &= column_codes == codes[0] if len(codes) == 1 else np.isin(column_codes, codes)
+        else:
+            mask &= column.isin(values).to_numpy()
+
+    return mask
+
+
+@Timed('aggregate/FilterDF')
+def FilterDF(df, cols_keep, date_col, class_col, filter_criteria={}, start_year=2000, end_year=2020):
+
+    # Ensure Correct Data Types
+    if type(cols_keep) != list:
+        cols_keep = [cols_keep]
+
+    # Extract Desired Columns
+    df_clean = df[cols_keep]
+
+    # Convert Date Column to DateTime (already parsed by the schema readers)
+    with Timer('parse/to_datetime'):
+        if not pd.api.types.is_datetime64_any_dtype(df_clean[date_col]):
+            df_clean = df_clean.assign(**{date_col: pd.to_datetime(df_clean[date_col])})
+
+    # One Combined Mask: Date Range (2000-2020 defualt), Anything Not Needed, Class Type Savings or Commercial
+    years = df_clean[date_col].dt.year.to_numpy(dtype=float, na_value=np.nan)
+    mask = PredicateMask(df_clean, {**filter_criteria, class_col: ['Savings', 'Commercial']})
+    if mask is None:
+        mask = np.zeros(len(df_clean), dtype=bool)
+    mask &= (years >= start_year) & (years <= end_year)
+
+    # Copy the Kept Rows Once
+    df_clean = df_clean.loc[mask].reset_index(drop=True)
+
+    Count('rows_in/FilterDF', len(df))
+    Count('rows_out/FilterDF', len(df_clean))
+    return df_clean
+
+
+@Timed('aggregate/CountByYear')
+def CountByYear(df, class_col, date_col, count_col, start_year=2000, end_year=2020):
+
+    # Count Cert IDs by Class Type and Year (missing years are filled with 0)
+    Count('rows_in/CountByYear', len(df))
+    return CountEvents(df, class_col, date_col, classes=['Commercial', 'Savings'],
+                       start_year=start_year, end_year=end_year, count_col=count_col)
+
+
+def ValidateInputYears(min_year, max_year):
+    """
+    Function converts a min / max year pair to integers and checks it lies within 2000-2020.
+
+    Raises TypeError or ValueError with a message that can be shown to the user.
+    """
+
+    try:
+        min_year = int(min_year)
+        max_year = int(max_year)
+    except (TypeError, ValueError):
+        raise TypeError('Inputted Years are not Integers. Please try again.')
+
+    if min(min_year, max_year) < FIRST_YEAR or max(min_year, max_year) > LAST_YEAR:
+        raise ValueError(f'Inputted Years are are outside valid range ({FIRST_YEAR}-{LAST_YEAR}). Please try again.')
+    elif max_year < min_year:
+        raise ValueError('Inputted Max Year is less than Min Year. Please try again.')
+
+    return min_year, max_year
+
+
+def FilterEvents(frames):
+    """
+    Function applies FilterDF to each event frame (dict of event type -> raw frame).
+    """
+
+    return {event: FilterDF(df, EVENT_COLUMNS[event], EVENTS[event]['date_col'], EVENTS[event]['class_col'],
+                            filter_criteria=EVENTS[event]['filter_criteria'])
+            for event, df in frames.items()}
+
+
+def PrepareData(liquidations, new_institutions, combinations, failures, cube=None):
+    """
+    Function filters the event extracts for download and builds the count cube if none was loaded.
+    """
+
+    frames = {'NewInstitutions': new_institutions, 'Liquidations': liquidations,
+              'Combinations': combinations, 'Failures': failures}
+
+    # Year x Class Counts Come From the Aggregate Cube (built here if main did not load one)
+    if cube is None:
+        cube = BuildCube(frames)
+
+    return {**FilterEvents(frames), 'cube': cube}
+
+
+def LoadData(progress=print, data_dir='data', events=None):
+    """
+    Function reads, filters and aggregates the extracts of the given event types (all by default).
+
+    Returns a dict of event type -> filtered frame, plus the count cube under 'cube'.
+    """
+
+    events = list(EVENT_COLUMNS) if events is None else list(events)
+
+    # Read the Extracts in Parallel (the CSV parser and parquet reader release the GIL)
+    frames = {}
+    progress(f'Loading FDIC data... (0/{len(events)} extracts)')
+    with ThreadPoolExecutor(max_workers=max(len(events), 1)) as pool:
+        futures = {pool.submit(LoadDataset, EVENTS[event]['dataset'], EVENT_COLUMNS[event], data_dir): event
+                   for event in events}
+        for future in as_completed(futures):
+            frames[futures[future]] = future.result()
+            progress(f'Loading FDIC data... ({len(frames)}/{len(events)} extracts)')
+
+    # Counts and Download Frames
+    progress('Building counts...')
+    cube = LoadCube(data_dir)
+
+    return {**FilterEvents({event: frames[event] for event in events}), 'cube': cube}
@@ -0,0 +1,195 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from DataCache import CACHE_FORMAT
+from EventData import EVENT_COLUMNS, FIRST_YEAR, LAST_YEAR, PredicateMask
+from Instrumentation import Count, Timed, Timer
+from Schemas import DATA_DIR, EVENTS, SCHEMAS, DatasetPath, LoadDataset, SchemaVersion
+
+'''
+Developer Notes:
+Year-partitioned copies of the schema datasets for FilterDF-style queries. Each dataset is split once
+into one file per year of its first date column (EFFDATE for the event extracts), every partition sorted
+by date, under data/.cache/partitions/<dataset>-<schema version>. A query
+  - prunes the partitions outside start_year-end_year (a narrow range only opens its own years),
+  - reads the predicate columns of a partition first and evaluates every filter_criteria entry on the
+    categorical (dictionary-encoded) codes with EventData.PredicateMask; a value missing from a
+    partition's categories rules it out without reading anything else,
+  - ANDs the predicates into one mask and reads / slices the projected columns once.
+Rows come back in date order. A partition set is rebuilt when the extract (size:mtime) or its schema
+changes. Parquet when pyarrow is installed, pickle otherwise (no column projection then).
+'''
+
+PARTITION_DIR = 'partitions'
+UNDATED = 'undated'
+
+
+def _Fingerprint(path):
+    stat = os.stat(path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _WriteAtomic(df, path):
+    temp_path = path + '.tmp'
+    if CACHE_FORMAT == 'parquet':
+        df.to_parquet(temp_path, index=False)
+    else:
+        df.to_pickle(temp_path)
+    os.replace(temp_path, path)
+
+
+class PartitionedDataset:
+    """
+    Year partitions of one schema dataset, each sorted by its date column.
+
+    years maps year -> rows; rows without a date are kept in the UNDATED partition.
+    """
+
+    def __init__(self, name, path):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.name = name
+        self.path = path
+        self.date_col = manifest['date_col']
+        self.columns = manifest['columns']
+        self.years = {int(year): rows for year, rows in manifest['years'].items()}
+        self.undated = manifest['undated']
+
+    def _PartitionPath(self, key):
+        return os.path.join(self.path, f'{key}.{CACHE_FORMAT}')
+
+    def _ReadPartition(self, key, columns):
+        Count('partitions_read/store')
+        with Timer('io/read_partition'):
+            if CACHE_FORMAT == 'parquet':
+                return pd.read_parquet(self._PartitionPath(key), columns=columns)
+            return pd.read_pickle(self._PartitionPath(key))[columns]
+
+    def Partitions(self, start_year=None, end_year=None):
+        """
+        Function returns the partitions a year range needs (every partition, undated too, without a range).
+        """
+
+        if start_year is None and end_year is None:
+            return sorted(self.years) + ([UNDATED] if self.undated else [])
+        start_year = min(self.years, default=0) if start_year is None else start_year
+        end_year = max(self.years, default=0) if end_year is None else end_year
+
+        return [year for year in sorted(self.years) if start_year <= year <= end_year]
+
+    @Timed('aggregate/Query')
+    def Query(self, columns=None, start_year=None, end_year=None, filter_criteria={}):
+        """
+        Function returns the rows of a year range matching filter_criteria, in date order.
+
+        filter_criteria maps column -> value (equality) or list of values (membership).
+        """
+
+        columns = list(self.columns) if columns is None else list(columns)
+        predicate_cols = list(filter_criteria)
+        partitions = self.Partitions(start_year, end_year)
+        Count('partitions_pruned/store', len(self.years) + bool(self.undated) - len(partitions))
+
+        parts = []
+        for key in partitions:
+            # Predicates First: Skip the Other Columns of a Partition With No Match
+            if predicate_cols:
+                predicates = self._ReadPartition(key, predicate_cols)
+                mask = PredicateMask(predicates, filter_criteria)
+                if mask is None or not mask.any():
+                    continue
+                rest = [col for col in columns if col not in predicate_cols]
+                part = self._ReadPartition(key, rest) if rest else predicates.iloc[:, :0]
+                part = pd.concat([part, predicates], axis=1)[columns]
+                part = part.loc[mask] if not mask.all() else part
+            else:
+                part = self._ReadPartition(key, columns)
+            parts.append(part)
+
+        # An Empty Answer Keeps the Column Types
+        if not parts and partitions:
+            parts = [self._ReadPartition(partitions[0], columns).iloc[:0]]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        result = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True)
+        Count('rows_out/Query', len(result))
+        return result
+
+
+def BuildPartitions(name, data_dir=DATA_DIR, store_dir=None):
+    """
+    Function splits a dataset into sorted year partitions and returns the PartitionedDataset.
+    """
+
+    schema = SCHEMAS[name]
+    date_col = schema['dates'][0]
+    source = DatasetPath(name, data_dir)
+    path = os.path.join(store_dir or os.path.join(data_dir, '.cache', PARTITION_DIR),
+                        f'{name}-{SchemaVersion(name)}')
+    os.makedirs(path, exist_ok=True)
+    fingerprint = _Fingerprint(source)
+
+    # Sort Once by Date, Then Slice Each Year Out by Binary Search
+    df = LoadDataset(name, data_dir=data_dir)
+    df = df.sort_values(date_col, kind='stable', na_position='last').reset_index(drop=True)
+    dates = df[date_col]
+    undated = int(dates.isna().sum())
+    years = dates.iloc[:len(df) - undated].dt.year.to_numpy()
+
+    with Timer('io/write_partitions'):
+        counts = {}
+        for year in np.unique(years):
+            start, stop = np.searchsorted(years, year), np.searchsorted(years, year + 1)
+            _WriteAtomic(df.iloc[start:stop], os.path.join(path, f'{year}.{CACHE_FORMAT}'))
+            counts[str(year)] = int(stop - start)
+        if undated:
+            _WriteAtomic(df.iloc[len(df) - undated:], os.path.join(path, f'{UNDATED}.{CACHE_FORMAT}'))
+
+    # The Manifest Goes Last: a Half-Written Partition Set Is Never Used
+    manifest = {'source': fingerprint, 'format': CACHE_FORMAT, 'date_col': date_col,
+                'columns': list(df.columns), 'years': counts, 'undated': undated}
+    temp_path = os.path.join(path, 'manifest.json.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, os.path.join(path, 'manifest.json'))
+
+    return PartitionedDataset(name, path)
+
+
+def LoadPartitions(name, data_dir=DATA_DIR, store_dir=None):
+    """
+    Function opens the year partitions of a dataset, building them if the extract or schema changed.
+    """
+
+    path = os.path.join(store_dir or os.path.join(data_dir, '.cache', PARTITION_DIR),
+                        f'{name}-{SchemaVersion(name)}')
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('source') == _Fingerprint(DatasetPath(name, data_dir)) and \
+            manifest.get('format') == CACHE_FORMAT:
+        Count('cache_hits/partitions')
+        return PartitionedDataset(name, path)
+
+    Count('cache_misses/partitions')
+    return BuildPartitions(name, data_dir, store_dir)
+
+
+def QueryEvents(event, start_year=FIRST_YEAR, end_year=LAST_YEAR, data_dir=DATA_DIR, store_dir=None):
+    """
+    Function returns the rows FilterDF keeps for an event type and year range, read from the partitions.
+
+    Same columns and rows as FilterDF(LoadDataset(...)), in date order.
+    """
+
+    spec = EVENTS[event]
+    dataset = LoadPartitions(spec['dataset'], data_dir, store_dir)
+
+    # The Class Type Filter Is One More Membership Predicate
+    criteria = {**spec['filter_criteria'], spec['class_col']: ['Savings', 'Commercial']}
+
+    return dataset.Query(EVENT_COLUMNS[event], start_year, end_year, criteria)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from EventData import EVENT_COLUMNS, FilterDF
+from EventStore import LoadPartitions, QueryEvents
+from Instrumentation import Reset, Snapshot
+from Schemas import EVENTS, DatasetPath, LoadDataset
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class EventStore_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.tmp, 'partitions')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_query_matches_filterdf(self):
+        for event in ['Liquidations', 'Failures']:
+            spec = EVENTS[event]
+            raw = LoadDataset(spec['dataset'], EVENT_COLUMNS[event], DATA_DIR, cache_dir=os.path.join(self.tmp, 'cache'))
+            for start_year, end_year in [(2000, 2020), (2009, 2010), (1990, 1995)]:
+                expected = FilterDF(raw, EVENT_COLUMNS[event], spec['date_col'], spec['class_col'],
+                                    spec['filter_criteria'], start_year, end_year)
+                expected = expected.sort_values(spec['date_col'], kind='stable').reset_index(drop=True)
+
+                queried = QueryEvents(event, start_year, end_year, DATA_DIR, self.store_dir)
+                pd.testing.assert_frame_equal(queried, expected)
+
+    def test_pruning_pushdown_and_rebuild(self):
+        data_dir = os.path.join(self.tmp, 'data')
+        os.makedirs(data_dir)
+        shutil.copy(DatasetPath('Liquidations', DATA_DIR), data_dir)
+        dataset = LoadPartitions('Liquidations', data_dir, self.store_dir)
+        self.assertEqual(sum(dataset.years.values()) + dataset.undated, 2929)
+        self.assertEqual(dataset.Partitions(2009, 2011), [2009, 2010, 2011])
+
+        # A Narrow Range Opens Only Its Own Years (predicates, then the other columns)
+        Reset()
+        payoffs = dataset.Query(['CERT', 'EFFDATE'], 2009, 2010, {'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'})
+        self.assertTrue(payoffs['EFFDATE'].is_monotonic_increasing)
+        self.assertEqual(set(payoffs['EFFDATE'].dt.year), {2009, 2010})
+        self.assertEqual(Snapshot()['counters']['partitions_read/store'], 4)
+
+        # A Value Missing From the Dictionary Rules a Partition Out on the Predicate Column Alone
+        # (one more read gives the empty answer its column types)
+        Reset()
+        self.assertEqual(len(dataset.Query(['CERT'], 2009, 2010, {'CHANGECODE_DESC': 'NO SUCH CHANGE'})), 0)
+        self.assertEqual(Snapshot()['counters']['partitions_read/store'], 2 + 1)
+
+        # A Changed Extract Rebuilds the Partitions
+        path = DatasetPath('Liquidations', data_dir)
+        with open(path) as f:
+            lines = f.readlines()
+        with open(path, 'w') as f:
+            f.writelines(lines[:1001])
+        self.assertEqual(sum(LoadPartitions('Liquidations', data_dir, self.store_dir).years.values()), 1000)
+
+if __name__ == '__main__':
+    unittest.main()
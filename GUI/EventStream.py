@@ -0,0 +1,65 @@
+import pandas as pd
+from EventData import EVENT_COLUMNS, FIRST_YEAR, LAST_YEAR, CountByYear, FilterDF
+from Schemas import CHUNK_ROWS, DATA_DIR, EVENTS, ReadDatasetChunks
+
+'''
+Developer Notes:
+Out-of-core mode of FilterDF / CountByYear for event extracts too large to load (e.g. the full institution
+history with every change code and branch-level rows). The CSV is read CHUNK_ROWS rows at a time through
+the schema (only the EVENT_COLUMNS, typed), FilterDF applies the date range and filter_criteria to each
+chunk, and the chunk's CountByYear grid is added to a running total. Only one chunk and the year x class
+grid are held at a time, so memory depends on chunk_rows and not on the size of the extract.
+The totals are the same as CountByYear(FilterDF(whole extract)).
+'''
+
+
+def StreamEvents(event, data_dir=DATA_DIR, chunk_rows=CHUNK_ROWS, start_year=FIRST_YEAR, end_year=LAST_YEAR):
+    """
+    Function yields the filtered rows of an event extract (as FilterDF would return them) chunk by chunk.
+    """
+
+    spec, columns = EVENTS[event], EVENT_COLUMNS[event]
+    for chunk in ReadDatasetChunks(spec['dataset'], columns, data_dir, chunk_rows):
+        yield FilterDF(chunk, columns, spec['date_col'], spec['class_col'], spec['filter_criteria'],
+                       start_year, end_year)
+
+
+def StreamCountByYear(event, data_dir=DATA_DIR, chunk_rows=CHUNK_ROWS, start_year=FIRST_YEAR,
+                      end_year=LAST_YEAR, count_col='CERT'):
+    """
+    Function counts an event extract by class type and year in bounded memory (CountByYear's output).
+    """
+
+    spec = EVENTS[event]
+
+    # Fold Each Chunk's Year x Class Grid Into the Total
+    totals = None
+    for chunk in StreamEvents(event, data_dir, chunk_rows, start_year, end_year):
+        counts = CountByYear(chunk, spec['class_col'], spec['date_col'], count_col, start_year, end_year)
+        counts = counts.set_index('Year')
+        totals = counts if totals is None else totals + counts
+
+    # An Empty Extract Still Gets Every Year, With Zeros
+    if totals is None:
+        empty = pd.DataFrame({col: pd.Series(dtype=object) for col in EVENT_COLUMNS[event]})
+        return CountByYear(empty, spec['class_col'], spec['date_col'], count_col, start_year, end_year)
+
+    return totals.reset_index()
+
+
+def StreamEventCounts(events=None, data_dir=DATA_DIR, chunk_rows=CHUNK_ROWS, start_year=FIRST_YEAR,
+                      end_year=LAST_YEAR, progress=print):
+    """
+    Function streams the counts of the given event types (all by default), one extract after the other.
+
+    Returns a dict of event type -> CountByYear frame.
+    """
+
+    events = list(EVENT_COLUMNS) if events is None else list(events)
+
+    counts = {}
+    for event in events:
+        progress(f'Streaming {EVENTS[event]["label"]}...')
+        counts[event] = StreamCountByYear(event, data_dir, chunk_rows, start_year, end_year)
+
+    return counts
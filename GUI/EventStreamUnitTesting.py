@@ -0,0 +1,56 @@
+import gc
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+import pandas as pd
+from Benchmarks import ScaleDataset
+from EventData import EVENT_COLUMNS, CountByYear, FilterDF
+from EventStream import StreamCountByYear, StreamEventCounts, StreamEvents
+from Schemas import EVENTS, DatasetPath, ReadDataset
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class EventStream_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_chunked_counts_match_in_memory(self):
+        for event in ['Liquidations', 'Failures']:
+            spec = EVENTS[event]
+            df = FilterDF(ReadDataset(spec['dataset'], EVENT_COLUMNS[event], DATA_DIR), EVENT_COLUMNS[event],
+                          spec['date_col'], spec['class_col'], spec['filter_criteria'], 2005, 2015)
+            expected = CountByYear(df, spec['class_col'], spec['date_col'], 'CERT', 2005, 2015)
+
+            streamed = StreamCountByYear(event, DATA_DIR, chunk_rows=250, start_year=2005, end_year=2015)
+            pd.testing.assert_frame_equal(streamed, expected)
+            self.assertEqual(sum(len(chunk) for chunk in StreamEvents(event, DATA_DIR, 250, 2005, 2015)), len(df))
+
+        counts = StreamEventCounts(['Failures'], DATA_DIR, progress=lambda message: None)
+        self.assertEqual(list(counts['Failures'].columns), ['Year', 'Commercial', 'Savings'])
+
+    def test_memory_does_not_grow_with_the_extract(self):
+        columns = EVENT_COLUMNS['Liquidations']
+        peaks = []
+        for n_rows in [20_000, 80_000]:
+            data_dir = os.path.join(self.tmp, str(n_rows))
+            os.makedirs(data_dir)
+            ScaleDataset('Liquidations', n_rows, columns, DATA_DIR).to_csv(
+                DatasetPath('Liquidations', data_dir), index=False, date_format='%Y-%m-%dT%H:%M:%S')
+
+            gc.collect()
+            tracemalloc.start()
+            counts = StreamCountByYear('Liquidations', data_dir, chunk_rows=5000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            self.assertGreater(counts[['Commercial', 'Savings']].to_numpy().sum(), 0)
+
+        # Four Times the Rows, About the Same Peak
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
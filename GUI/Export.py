@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from Instrumentation import Timed
+
+'''
+Developer Notes:
+Export of the filtered event frames behind the GUI's DOWNLOAD DATA button.
+Rows are written once per (event type, year) partition under data/data_outputs/.partitions, in chunks,
+and a download for a year range is assembled by streaming the partitions it covers into one file.
+A later download whose range overlaps an earlier one only writes the years that are not there yet.
+Partitions are keyed on a fingerprint of the frame, so they are rewritten when the data changes.
+
+Output formats: 'csv', 'csv.gz' (each partition is its own gzip member, so they concatenate into a
+valid gzip file) and 'parquet' (needs pyarrow). Exports are written without the row-number index column.
+'''
+
+EXPORT_DIR = os.path.join('data', 'data_outputs')
+EXPORT_COLUMNS = ['Cert_ID', 'Class_Type', 'Effective_Date', 'Change_Type']
+FORMATS = ['csv', 'csv.gz', 'parquet']
+
+
+def ExportFrame(df, event):
+    """
+    Function renames the first three columns of a FilterDF frame (cert, class, date) for export.
+    """
+
+    df = df[df.columns[0:3]].copy()
+    df.columns = EXPORT_COLUMNS[:3]
+    df[EXPORT_COLUMNS[3]] = event
+
+    return df
+
+
+def FrameFingerprint(df):
+    """
+    Function returns a hash of a frame's contents, used to tell whether saved partitions are stale.
+    """
+
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    sha1 = hashlib.sha1(hashes.tobytes())
+    sha1.update(json.dumps([str(col) for col in df.columns]).encode())
+
+    return sha1.hexdigest()
+
+
+def _PartitionPath(partition_dir, year, fmt):
+    return os.path.join(partition_dir, f'{year}.{fmt}')
+
+
+def _WritePartition(df, path, fmt, chunk_size):
+    # Each Partition Is Written Without a Header, in Chunks, Then Moved Into Place
+    temp_path = path + '.tmp'
+    if fmt == 'parquet':
+        df.to_parquet(temp_path, index=False, row_group_size=chunk_size)
+    else:
+        opener = gzip.open if fmt == 'csv.gz' else open
+        with opener(temp_path, 'wt', newline='') as f:
+            for start in range(0, len(df), chunk_size):
+                df.iloc[start:start + chunk_size].to_csv(f, header=False, index=False)
+    os.replace(temp_path, path)
+
+
+def WritePartitions(df, event, start_year, end_year, fmt='csv', export_dir=EXPORT_DIR, chunk_size=100000,
+                    progress=None):
+    """
+    Function makes sure one export partition exists for every year in the range.
+
+    Returns the partition paths in year order. Years already written from the same data are reused.
+    """
+
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown export format {fmt}; expected one of {FORMATS}')
+    partition_dir = os.path.join(export_dir, '.partitions', event, fmt)
+    manifest_path = os.path.join(partition_dir, 'manifest.json')
+    os.makedirs(partition_dir, exist_ok=True)
+
+    # Partitions Written From Other Data Are Stale
+    fingerprint = FrameFingerprint(df)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('fingerprint') != fingerprint:
+        manifest = {'fingerprint': fingerprint, 'years': []}
+    written = set(manifest['years'])
+    missing = [year for year in range(start_year, end_year + 1)
+               if year not in written or not os.path.exists(_PartitionPath(partition_dir, year, fmt))]
+
+    if missing:
+        # Sort Once, Then Slice Each Missing Year Out by Binary Search
+        export = ExportFrame(df, event)
+        export = export.sort_values(by=['Effective_Date'], kind='stable').reset_index(drop=True)
+        years = export['Effective_Date'].dt.year.to_numpy(dtype=float)
+
+        for n, year in enumerate(missing):
+            part = export.iloc[np.searchsorted(years, year):np.searchsorted(years, year + 1)]
+            _WritePartition(part, _PartitionPath(partition_dir, year, fmt), fmt, chunk_size)
+            written.add(year)
+            if progress is not None:
+                progress(f'Exporting {event}... ({n + 1}/{len(missing)} years)')
+
+        manifest['years'] = sorted(written)
+        temp_path = manifest_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, manifest_path)
+
+    return [_PartitionPath(partition_dir, year, fmt) for year in range(start_year, end_year + 1)]
+
+
+@Timed('io/ExportEvents')
+def ExportEvents(df, event, start_year, end_year, fmt='csv', export_dir=EXPORT_DIR, chunk_size=100000,
+                 progress=None):
+    """
+    Function writes the events of one type in a year range to data/data_outputs, sorted by date.
+
+    The file is assembled by streaming the year partitions; returns its path.
+    """
+
+    partitions = WritePartitions(df, event, start_year, end_year, fmt, export_dir, chunk_size, progress)
+    path = os.path.join(export_dir, f'{event}_{start_year}_to_{end_year}.{fmt}')
+    temp_path = path + '.tmp'
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        # Copy Row Groups Across Without Building the Whole Table
+        writer = None
+        try:
+            for partition in partitions:
+                source = pq.ParquetFile(partition)
+                if writer is None:
+                    writer = pq.ParquetWriter(temp_path, source.schema_arrow)
+                for batch in source.iter_batches(batch_size=chunk_size):
+                    writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        header = (','.join(EXPORT_COLUMNS) + '\n').encode()
+        with open(temp_path, 'wb') as out:
+            out.write(gzip.compress(header) if fmt == 'csv.gz' else header)
+            for partition in partitions:
+                with open(partition, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+    os.replace(temp_path, path)
+
+    return path
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from Export import ExportEvents
+
+class Export_Test(unittest.TestCase):
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(3)
+        n = 3000
+        self.df = pd.DataFrame({
+            'CERT': rng.integers(1, 90000, n),
+            'FRM_CLASS_TYPE_DESC': rng.choice(['Commercial', 'Savings'], n),
+            'EFFDATE': pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 7600, n), unit='D'),
+            'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'})
+
+    def tearDown(self):
+        shutil.rmtree(self.export_dir)
+
+    def Expected(self, start_year, end_year):
+        df = self.df[self.df.columns[0:3]].copy()
+        df.columns = ['Cert_ID', 'Class_Type', 'Effective_Date']
+        df['Change_Type'] = 'Liquidations'
+        df = df.loc[(df['Effective_Date'].dt.year >= start_year) & (df['Effective_Date'].dt.year <= end_year)]
+        return df.sort_values(by=['Effective_Date'], kind='stable').reset_index(drop=True)
+
+    def test_csv_matches_direct_export(self):
+        path = ExportEvents(self.df, 'Liquidations', 2003, 2009, export_dir=self.export_dir, chunk_size=97)
+        self.assertEqual(os.path.basename(path), 'Liquidations_2003_to_2009.csv')
+
+        df = pd.read_csv(path, parse_dates=['Effective_Date'])
+        expected = self.Expected(2003, 2009)
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    def test_overlapping_range_reuses_partitions(self):
+        ExportEvents(self.df, 'Liquidations', 2000, 2010, export_dir=self.export_dir)
+        partition = os.path.join(self.export_dir, '.partitions', 'Liquidations', 'csv', '2005.csv')
+        written = os.stat(partition).st_mtime_ns
+
+        path = ExportEvents(self.df, 'Liquidations', 2005, 2015, export_dir=self.export_dir)
+        self.assertEqual(os.stat(partition).st_mtime_ns, written)
+        self.assertEqual(len(pd.read_csv(path)), len(self.Expected(2005, 2015)))
+
+        # Changed Data Rewrites the Partitions
+        self.df.loc[0, 'CERT'] = -1
+        ExportEvents(self.df, 'Liquidations', 2005, 2015, export_dir=self.export_dir)
+        self.assertNotEqual(os.stat(partition).st_mtime_ns, written)
+
+    def test_compressed_and_parquet(self):
+        expected = self.Expected(2001, 2004)
+        for fmt in ['csv.gz', 'parquet']:
+            path = ExportEvents(self.df, 'Liquidations', 2001, 2004, fmt=fmt, export_dir=self.export_dir)
+            if fmt == 'parquet':
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_csv(path, parse_dates=['Effective_Date'])
+            self.assertEqual(df['Cert_ID'].tolist(), expected['Cert_ID'].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
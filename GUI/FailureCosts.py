@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pandas as pd
+from DataCache import LoadCSV
+from Schemas import DATA_DIR, DatasetPath, ParseDates, SchemaColumns, SchemaVersion, _ReadCSVKwargs
+
+'''
+Developer Notes:
+Cleaning of failed_banks.csv (FDIC failures and assistance transactions back to 1934) for the
+failure cost notebooks, done once for the whole frame instead of cell by cell:
+- missing COST is imputed by rule, not by row: failures get QBFASSET times the mean cost to asset
+  ratio of failures of the same charter class and year (falling back to the same year, the same
+  class, then all failures); assistance transactions have no resolution cost and get 0
+- CITYST is split into CITY / STATE and CHCLASS1 into BANK_TYPE / BANK_CLASS via FDIC_TERMS,
+  on the distinct values only
+- FAILDATE becomes YEAR_FAILED / MONTH_FAILED / QUARTER_FAILED
+LoadFailedBanks caches the typed result in data/.cache, keyed on the CSV and the schema.
+'''
+
+FDIC_TERMS = {'N': 'Commercial, National FRS Banks',
+              'NM': 'Commercial, State Chartered non-FRS Banks',
+              'SB': 'Savings, Federal Savings Bank',
+              'SM': 'Commercial, State Chartered FRS Banks',
+              'SI': 'Savings, State Savings FDIC Banks',
+              'SA': 'Savings, Federal & State Savings and Loans'}
+
+# Columns of the Cleaned Frame (same order as failed_banks_cleaned.csv)
+CLEAN_COLUMNS = ['CERT', 'COST', 'NAME', 'QBFASSET', 'QBFDEP', 'RESTYPE', 'CITY', 'STATE',
+                 'YEAR_FAILED', 'MONTH_FAILED', 'QUARTER_FAILED', 'BANK_TYPE', 'BANK_CLASS']
+
+
+def _SplitUnique(col, sep=','):
+    # Split the distinct values only and broadcast them back to the rows
+    codes, uniques = pd.factorize(col.astype(str))
+    parts = [str(value).split(sep, 1) for value in uniques]
+    first = np.array([part[0].strip() for part in parts], dtype=object)
+    second = np.array([part[1].strip() if len(part) > 1 else '' for part in parts], dtype=object)
+    return first[codes], second[codes]
+
+
+def ImputeCost(df, class_col='CHCLASS1', year_col='YEAR_FAILED', assistance_cost=0.0):
+    """
+    Function fills every missing COST by rule and returns the COST column.
+
+    Failures get QBFASSET times the mean COST / QBFASSET of failures of the same class and year,
+    falling back to the same year, the same class and finally all failures.
+    Assistance transactions get assistance_cost.
+    """
+
+    cost = df['COST'].astype('float64')
+    assets = df['QBFASSET'].astype('float64')
+    failure = (df['RESTYPE'] == 'FAILURE').to_numpy()
+    missing = cost.isna().to_numpy()
+
+    # Cost to Asset Ratio of Each Failure With a Known Cost
+    known = failure & ~missing & (assets > 0).to_numpy()
+    ratio = (cost / assets).where(known)
+
+    # Mean Ratio by Class and Year, With Coarser Fallbacks
+    keys = {'class': df[class_col].astype(str), 'year': df[year_col]}
+    estimate = ratio.groupby([keys['class'], keys['year']]).transform('mean')
+    estimate = estimate.fillna(ratio.groupby(keys['year']).transform('mean'))
+    estimate = estimate.fillna(ratio.groupby(keys['class']).transform('mean'))
+    estimate = estimate.fillna(ratio.mean())
+
+    imputed = np.where(failure, assets * estimate, assistance_cost)
+    return cost.where(~missing, imputed)
+
+
+def CleanFailedBanks(df, assistance_cost=0.0):
+    """
+    Function cleans a failed_banks frame (FAILDATE already parsed) in one pass.
+
+    Returns the typed frame with CLEAN_COLUMNS.
+    """
+
+    date = pd.to_datetime(df['FAILDATE'])
+    clean = pd.DataFrame({'CERT': df['CERT'].to_numpy(),
+                          'NAME': df['NAME'].astype(str).to_numpy(),
+                          'QBFASSET': df['QBFASSET'].to_numpy(),
+                          'QBFDEP': df['QBFDEP'].to_numpy(),
+                          'RESTYPE': pd.Categorical(df['RESTYPE'].astype(str)),
+                          'CHCLASS1': df['CHCLASS1'].astype(str).to_numpy(),
+                          'COST': df['COST'].to_numpy(dtype='float64', na_value=np.nan),
+                          'YEAR_FAILED': date.dt.year.astype('int16').to_numpy(),
+                          'MONTH_FAILED': date.dt.month.astype('int8').to_numpy(),
+                          'QUARTER_FAILED': date.dt.to_period('Q').array})
+
+    # Impute Missing Costs by Rule
+    clean['COST'] = ImputeCost(clean, assistance_cost=assistance_cost)
+
+    # City / State and Bank Type / Class From the Distinct Values
+    city, state = _SplitUnique(df['CITYST'])
+    bank_type, bank_class = _SplitUnique(df['CHCLASS1'].astype(str).map(FDIC_TERMS)
+                                         .fillna(df['CHCLASS1'].astype(str)))
+    clean['CITY'] = pd.array(city, dtype='str')
+    clean['STATE'] = pd.Categorical(state)
+    clean['BANK_TYPE'] = pd.Categorical(bank_type)
+    clean['BANK_CLASS'] = pd.Categorical(bank_class)
+
+    return clean[CLEAN_COLUMNS]
+
+
+def LoadFailedBanks(columns=None, data_dir=DATA_DIR, cache_dir=None, assistance_cost=0.0):
+    """
+    Function loads the cleaned failed_banks frame through the typed columnar cache.
+
+    The first load cleans the CSV and caches the result; later loads read only the requested columns.
+    """
+
+    name = 'FailedBanks'
+    variant = f'{name}-clean-{SchemaVersion(name)}-{assistance_cost:g}'
+
+    def TypeColumns(df):
+        return CleanFailedBanks(ParseDates(df, name), assistance_cost)
+
+    return LoadCSV(DatasetPath(name, data_dir), columns,
+                   cache_dir=cache_dir or os.path.join(data_dir, '.cache'),
+                   read_csv_kwargs=_ReadCSVKwargs(name, SchemaColumns(name)),
+                   type_columns=TypeColumns, variant=variant)
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+GUI_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import Budget of UserGui (it used to pull in tkinter, pandas and matplotlib, over 1s)
+BUDGET_SECONDS = 0.05
+HEAVY_MODULES = ['tkinter', 'pandas', 'numpy', 'matplotlib', 'EventData']
+
+
+def ImportSeconds(module, repeats=3):
+    """
+    Function returns the best cumulative import time of a module in a fresh interpreter (python -X importtime).
+    """
+
+    best = float('inf')
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=GUI_DIR,
+                                capture_output=True, text=True, check=True)
+        line = [line for line in result.stderr.splitlines() if line.split('|')[-1].strip() == module][-1]
+        best = min(best, int(line.split('|')[1]) / 1e6)
+
+    return best
+
+
+class ImportTime_Test(unittest.TestCase):
+    def test_usergui_imports_lazily(self):
+        code = (f'import sys, UserGui; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules)); '
+                'UserGui.ValidateInputYears; print("pandas" in sys.modules)')
+        result = subprocess.run([sys.executable, '-c', code], cwd=GUI_DIR, capture_output=True, text=True,
+                                check=True)
+        self.assertEqual(result.stdout.splitlines(), ['', 'True'])
+
+    def test_usergui_import_budget(self):
+        self.assertLess(ImportSeconds('UserGui'), BUDGET_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
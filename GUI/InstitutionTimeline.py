@@ -0,0 +1,155 @@
+import os
+import numpy as np
+import pandas as pd
+from Schemas import DATA_DIR, DatasetPath, LoadDataset, SchemaColumns
+
+'''
+Developer Notes:
+Unified, CERT-keyed event log over the FDIC institution history extracts (Liquidations, New
+Institutions, Business Combinations, Failures, Interim Mergers & Reorganizations).
+All events go into one log sorted by EFFDATE. Every certificate an event mentions (CERT, FRM_CERT,
+ACQ_CERT, OUT_CERT, SUR_CERT) is a posting; postings are sorted by certificate and date and an
+offsets table points each certificate at its run, so a timeline is one binary search and a slice.
+Mergers, failures and charter changes also become predecessor -> successor links (OUT_CERT ->
+SUR_CERT / ACQ_CERT, FRM_CERT -> CERT), sorted both ways for chain walks.
+'''
+
+DATASETS = ['NewInstitutions', 'Liquidations', 'Combinations', 'Failures', 'InterimMergers']
+CERT_COLUMNS = ['CERT', 'FRM_CERT', 'ACQ_CERT', 'OUT_CERT', 'SUR_CERT']
+LOG_COLUMNS = ['EFFDATE', 'DATASET', 'CHANGECODE', 'CHANGECODE_DESC'] + CERT_COLUMNS
+
+
+def _Links(log):
+    # Predecessor -> Successor Certificates of Each Event (absorbed / converted institution first)
+    links = []
+    for old, new in [('OUT_CERT', 'SUR_CERT'), ('OUT_CERT', 'ACQ_CERT'), ('FRM_CERT', 'CERT')]:
+        old_cert = log[old].to_numpy(dtype='float64', na_value=np.nan)
+        new_cert = log[new].to_numpy(dtype='float64', na_value=np.nan)
+        keep = ~np.isnan(old_cert) & ~np.isnan(new_cert) & (old_cert != new_cert)
+        links.append(np.column_stack([old_cert[keep], new_cert[keep], np.flatnonzero(keep)]))
+
+    # A Combination Names Both Survivor and Acquirer: Keep Each Pair Once
+    links = np.concatenate(links).astype(np.int64)
+    _, first = np.unique(links, axis=0, return_index=True)
+    return links[np.sort(first)]
+
+
+class InstitutionTimeline:
+    """
+    Event log of every institution with a sorted certificate index and merger links.
+
+    certs / offsets / rows: the events of certs[i] are log rows rows[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, frames):
+        parts = []
+        for name, df in frames.items():
+            part = pd.DataFrame({col: df[col] if col in df.columns else pd.NA for col in LOG_COLUMNS
+                                 if col != 'DATASET'})
+            part['DATASET'] = name
+            parts.append(part[LOG_COLUMNS])
+
+        # One Log Sorted by Date
+        log = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=LOG_COLUMNS)
+        log['EFFDATE'] = pd.to_datetime(log['EFFDATE'])
+        for col in CERT_COLUMNS:
+            log[col] = log[col].astype('Int32')
+        log['DATASET'] = pd.Categorical(log['DATASET'], categories=list(frames))
+        self.log = log.sort_values('EFFDATE', kind='stable').reset_index(drop=True)
+
+        # Postings (certificate, row) Sorted by Certificate, Then Row (= date)
+        certs = self.log[CERT_COLUMNS].to_numpy(dtype='float64', na_value=np.nan)
+        rows = np.broadcast_to(np.arange(len(self.log))[:, None], certs.shape)
+        present = ~np.isnan(certs)
+        postings = np.unique(np.column_stack([certs[present], rows[present]]).astype(np.int64), axis=0)
+
+        self.certs, starts = np.unique(postings[:, 0], return_index=True)
+        self.offsets = np.append(starts, len(postings))
+        self.rows = postings[:, 1]
+
+        # Merger Links, Sorted by Predecessor and by Successor
+        links = _Links(self.log)
+        self.by_predecessor = links[np.lexsort((links[:, 2], links[:, 0]))]
+        self.by_successor = links[np.lexsort((links[:, 2], links[:, 1]))]
+
+    def Rows(self, cert):
+        """
+        Function returns the log rows of a certificate's events (one binary search, no copy).
+        """
+
+        i = np.searchsorted(self.certs, cert)
+        if i == len(self.certs) or self.certs[i] != cert:
+            return self.rows[:0]
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def Timeline(self, cert):
+        """
+        Function returns every event that mentions a certificate, oldest first.
+        """
+
+        return self.log.iloc[self.Rows(int(cert))]
+
+    def _Neighbors(self, links, cert, key, other):
+        lo = np.searchsorted(links[:, key], cert, side='left')
+        hi = np.searchsorted(links[:, key], cert, side='right')
+        return links[lo:hi, other], links[lo:hi, 2]
+
+    def Successors(self, cert):
+        """
+        Function returns the certificates that took over a certificate, with the event rows.
+        """
+
+        return self._Neighbors(self.by_predecessor, int(cert), 0, 1)
+
+    def Predecessors(self, cert):
+        """
+        Function returns the certificates a certificate took over, with the event rows.
+        """
+
+        return self._Neighbors(self.by_successor, int(cert), 1, 0)
+
+    def Chain(self, cert, direction='successors', max_depth=100):
+        """
+        Function walks merger links from a certificate and returns the events along the chain.
+
+        direction is 'successors' (who it ended up in) or 'predecessors' (who it absorbed).
+        Returns a frame of (FROM_CERT, TO_CERT, DEPTH) plus the linking event, ordered by depth and date.
+        """
+
+        step = self.Successors if direction == 'successors' else self.Predecessors
+        seen = {int(cert)}
+        frontier = [int(cert)]
+        found = []
+        for depth in range(1, max_depth + 1):
+            following = []
+            for current in frontier:
+                neighbors, rows = step(current)
+                for neighbor, row in zip(neighbors.tolist(), rows.tolist()):
+                    found.append((current, neighbor, depth, row))
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        following.append(neighbor)
+            if not following:
+                break
+            frontier = following
+
+        links = pd.DataFrame(found, columns=['FROM_CERT', 'TO_CERT', 'DEPTH', 'ROW'])
+        chain = pd.concat([links.drop(columns='ROW'),
+                           self.log.iloc[links['ROW'].to_numpy()].reset_index(drop=True)], axis=1)
+        return chain.sort_values(['DEPTH', 'EFFDATE'], kind='stable').reset_index(drop=True)
+
+
+def LoadTimeline(data_dir=DATA_DIR, datasets=None):
+    """
+    Function builds the timeline index from the event extracts (those present in data_dir by default).
+    """
+
+    if datasets is None:
+        datasets = [name for name in DATASETS if os.path.exists(DatasetPath(name, data_dir))]
+
+    frames = {}
+    for name in datasets:
+        columns = [col for col in LOG_COLUMNS if col in SchemaColumns(name)]
+        frames[name] = LoadDataset(name, columns, data_dir)
+
+    return InstitutionTimeline(frames)
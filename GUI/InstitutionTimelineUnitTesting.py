@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+import pandas as pd
+from InstitutionTimeline import InstitutionTimeline
+
+class InstitutionTimeline_Test(unittest.TestCase):
+    def setUp(self):
+        # 10 Is Converted to 11, 11 Fails Into 20, 20 Fails Into 30 (which absorbed 40 earlier)
+        liquidations = pd.DataFrame({'CERT': [50], 'FRM_CERT': [50], 'EFFDATE': ['2003-01-01'],
+                                     'CHANGECODE': [240], 'CHANGECODE_DESC': ['OTHER LIQUIDATIONS AND CLOSINGS']})
+        interim = pd.DataFrame({'CERT': [11, 10], 'FRM_CERT': [10, 10], 'EFFDATE': ['2001-05-01', '2000-01-01'],
+                                'CHANGECODE': [820, 820], 'CHANGECODE_DESC': ['PARTICIPATED IN REORGANIZATION'] * 2})
+        failures = pd.DataFrame({'CERT': [11, 20, 40], 'OUT_CERT': [11, 20, 40], 'ACQ_CERT': [20, 30, 30],
+                                 'SUR_CERT': [20, 30, 30], 'FRM_CERT': [np.nan] * 3,
+                                 'EFFDATE': ['2009-10-22', '2017-01-27', '2005-06-01'],
+                                 'CHANGECODE': [211] * 3, 'CHANGECODE_DESC': ['FAILURE - WHOLE INSTITUTION'] * 3})
+        self.timeline = InstitutionTimeline({'Liquidations': liquidations, 'InterimMergers': interim,
+                                             'Failures': failures})
+
+    def test_timeline(self):
+        events = self.timeline.Timeline(11)
+        self.assertEqual(events['EFFDATE'].dt.year.tolist(), [2001, 2009])
+        self.assertEqual(events['DATASET'].tolist(), ['InterimMergers', 'Failures'])
+        self.assertEqual(self.timeline.Timeline(30)['EFFDATE'].dt.year.tolist(), [2005, 2017])
+        self.assertEqual(len(self.timeline.Timeline(99)), 0)
+        self.assertTrue(self.timeline.log['EFFDATE'].is_monotonic_increasing)
+        self.assertTrue(np.all(np.diff(self.timeline.certs) > 0))
+
+    def test_chains(self):
+        successors = self.timeline.Chain(10)
+        self.assertEqual(list(zip(successors['FROM_CERT'], successors['TO_CERT'], successors['DEPTH'])),
+                         [(10, 11, 1), (11, 20, 2), (20, 30, 3)])
+
+        predecessors = self.timeline.Chain(30, direction='predecessors')
+        self.assertEqual(list(zip(predecessors['TO_CERT'], predecessors['DEPTH'])),
+                         [(40, 1), (20, 1), (11, 2), (10, 3)])
+        self.assertEqual(self.timeline.Successors(50)[0].tolist(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+import pandas as pd
+
+'''
+Developer Notes:
+Always-on timers and counters for the data-prep hot paths (CSV / cache reads, FilterDF, CountByYear,
+the count cube, chart rendering). Timer names are '<stage>/<step>' with the stages in STAGES, so a run's
+profile shows whether its time went to I/O, parsing, aggregation, rendering or the FFIEC service.
+Timers nest: each one also records its self time (minus the timers opened inside it on the same thread),
+and the stage totals add up self times so nothing is counted twice. Counters hold rows in / out, bytes
+read and cache hits / misses. SOAP round trips are timed per operation by ffipy.metrics; the profile
+report includes them when ffipy is loaded.
+Set FDIC_INSTRUMENTATION=0 (or call Enable(False)) to switch recording off: every hook is then one
+global check.
+'''
+
+ENABLED = os.environ.get('FDIC_INSTRUMENTATION', '1') != '0'
+STAGES = ['io', 'parse', 'aggregate', 'render', 'ffiec']
+TIMER_COLUMNS = ['stage', 'name', 'calls', 'seconds', 'self_seconds', 'mean_ms', 'max_ms']
+
+_lock = threading.Lock()
+_local = threading.local()
+_timers = {}
+_counters = {}
+
+
+def Enable(enabled=True):
+    """
+    Function switches recording on or off for the whole process.
+    """
+
+    global ENABLED
+    ENABLED = enabled
+
+
+def Reset():
+    """
+    Function clears every timer and counter.
+    """
+
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def Count(name, value=1):
+    """
+    Function adds value to a counter (e.g. 'rows_in/FilterDF', 'bytes_read/csv', 'cache_hits/csv').
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class Timer:
+    """
+    Context manager timing a block under a '<stage>/<step>' name.
+    """
+
+    __slots__ = ('name', 'start', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if ENABLED:
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            stack.append(self)
+            self.children = 0.0
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is None:
+            return False
+        elapsed = time.perf_counter() - self.start
+        self.start = None
+
+        # Hand the Elapsed Time to the Enclosing Timer as Child Time
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+
+        with _lock:
+            stats = _timers.get(self.name)
+            if stats is None:
+                stats = _timers[self.name] = [0, 0.0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += elapsed - self.children
+            stats[3] = max(stats[3], elapsed)
+        return False
+
+
+def Timed(name):
+    """
+    Function returns a decorator timing every call of a function under name.
+    """
+
+    def Decorator(func):
+        @wraps(func)
+        def Wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with Timer(name):
+                return func(*args, **kwargs)
+        return Wrapper
+
+    return Decorator
+
+
+def _SoapMetrics():
+    # SOAP Latencies Only When the FFIEC Client Is In Use (never imported from here)
+    metrics = sys.modules.get('ffipy.metrics')
+    return metrics.snapshot() if metrics is not None else {'counters': {}, 'histograms': {}}
+
+
+def Snapshot():
+    """
+    Function returns every timer, counter and SOAP latency histogram as a JSON-serializable dict.
+    """
+
+    with _lock:
+        timers = {name: dict(zip(['calls', 'seconds', 'self_seconds', 'max_seconds'], stats))
+                  for name, stats in _timers.items()}
+        counters = dict(_counters)
+
+    return {'timers': timers, 'counters': counters, 'soap': _SoapMetrics()}
+
+
+def TimerReport(snapshot=None):
+    """
+    Function returns the timers as a frame (TIMER_COLUMNS), SOAP operations included under the ffiec stage.
+    """
+
+    snapshot = snapshot or Snapshot()
+    rows = [[name.split('/', 1)[0] if '/' in name else 'other', name, stats['calls'], stats['seconds'],
+             stats['self_seconds'], 1000 * stats['seconds'] / stats['calls'], 1000 * stats['max_seconds']]
+            for name, stats in snapshot['timers'].items()]
+    rows += [['ffiec', f'ffiec/{name}', h['count'], h['total'], h['total'], 1000 * h['total'] / h['count'],
+              1000 * h['max']] for name, h in snapshot['soap']['histograms'].items() if h['count']]
+
+    report = pd.DataFrame(rows, columns=TIMER_COLUMNS)
+    return report.sort_values('self_seconds', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def StageTotals(snapshot=None):
+    """
+    Function returns the self seconds spent in each stage (I/O, parsing, aggregation, rendering, FFIEC).
+    """
+
+    report = TimerReport(snapshot)
+    totals = report.groupby('stage')['self_seconds'].sum()
+    return totals.reindex(STAGES + sorted(set(totals.index) - set(STAGES)), fill_value=0.0)
+
+
+def ProfileReport(snapshot=None):
+    """
+    Function returns a text profile of the run: stage totals, timers, counters and SOAP latencies.
+    """
+
+    snapshot = snapshot or Snapshot()
+    lines = ['Stage totals (s)']
+    lines += [f'  {stage:<12} {seconds:>10.3f}' for stage, seconds in StageTotals(snapshot).items()]
+
+    lines += ['', 'Timers', TimerReport(snapshot).to_string(index=False, float_format='{:.3f}'.format)]
+
+    counters = {**snapshot['counters'], **{f'ffiec/{name}': value
+                                           for name, value in snapshot['soap']['counters'].items()}}
+    lines += ['', 'Counters']
+    lines += [f'  {name:<40} {value:>14,}' for name, value in sorted(counters.items())]
+
+    # SOAP Latency Histograms (count per bucket upper bound)
+    for name, h in sorted(snapshot['soap']['histograms'].items()):
+        buckets = [f'<={bound:g}s:{count}' for bound, count in zip(h['buckets'], h['counts']) if count]
+        if h['counts'][-1]:
+            buckets.append(f">{h['buckets'][-1]:g}s:{h['counts'][-1]}")
+        lines.append(f'  latency {name:<32} ' + ' '.join(buckets))
+
+    return '\n'.join(lines)
+
+
+def DumpReport(path):
+    """
+    Function writes the run's profile to path: the snapshot as JSON for .json paths, the text report otherwise.
+    """
+
+    snapshot = Snapshot()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        if path.endswith('.json'):
+            json.dump(snapshot, f, indent=1)
+        else:
+            f.write(ProfileReport(snapshot) + '\n')
+
+    return path
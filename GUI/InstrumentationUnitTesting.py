@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import pandas as pd
+import Instrumentation
+from EventData import FilterDF
+from Instrumentation import Count, DumpReport, Enable, ProfileReport, Reset, Snapshot, StageTotals, Timed, Timer
+
+class Instrumentation_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        Reset()
+
+    def tearDown(self):
+        Enable(True)
+        shutil.rmtree(self.tmp)
+
+    def test_nested_timers_count_self_time_once(self):
+        @Timed('aggregate/outer')
+        def Outer():
+            time.sleep(0.02)
+            with Timer('parse/inner'):
+                time.sleep(0.03)
+
+        Outer()
+        Outer()
+        timers = Snapshot()['timers']
+        self.assertEqual(timers['aggregate/outer']['calls'], 2)
+        self.assertGreaterEqual(timers['aggregate/outer']['seconds'], 0.1)
+        self.assertLess(timers['aggregate/outer']['self_seconds'], timers['aggregate/outer']['seconds'] - 0.05)
+
+        # Stage Totals Add Up Self Times (no double counting of the inner timer)
+        totals = StageTotals()
+        self.assertAlmostEqual(totals['aggregate'] + totals['parse'], timers['aggregate/outer']['seconds'])
+        self.assertEqual(list(totals.index[:5]), Instrumentation.STAGES)
+
+    def test_hot_path_counters_and_report(self):
+        df = pd.DataFrame({'CERT': [1, 2, 3, 4],
+                           'FRM_CLASS_TYPE_DESC': ['Commercial', 'Savings', 'Other', 'Commercial'],
+                           'EFFDATE': ['2001-01-01', '2002-01-01', '2003-01-01', '1990-01-01']})
+        FilterDF(df, ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'], 'EFFDATE', 'FRM_CLASS_TYPE_DESC')
+        counters = Snapshot()['counters']
+        self.assertEqual((counters['rows_in/FilterDF'], counters['rows_out/FilterDF']), (4, 2))
+        self.assertIn('parse/to_datetime', Snapshot()['timers'])
+        self.assertIn('rows_out/FilterDF', ProfileReport())
+
+        path = DumpReport(os.path.join(self.tmp, 'profile.json'))
+        with open(path) as f:
+            self.assertEqual(json.load(f)['counters']['rows_in/FilterDF'], 4)
+
+        # Switched Off, Nothing Is Recorded
+        Enable(False)
+        Reset()
+        FilterDF(df, ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'], 'EFFDATE', 'FRM_CLASS_TYPE_DESC')
+        Count('rows_in/FilterDF', 10)
+        self.assertEqual(Snapshot()['timers'], {})
+        self.assertEqual(Snapshot()['counters'], {})
+
+if __name__ == '__main__':
+    unittest.main()
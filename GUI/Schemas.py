@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from DataCache import CachedColumns, LoadCSV
+from Instrumentation import Count, Timer
+
+'''
+Developer Notes:
+Declarative schemas for the FDIC datasets in data/. Each schema lists the only columns that are
+ever read from the wide (100+ column) extracts, with compact dtypes: 32/16 bit integers,
+categoricals for class types and change codes, and dates parsed with an explicit format.
+Reading through a schema keeps peak memory proportional to the columns actually used.
+
+ReadDataset parses the CSV directly; LoadDataset goes through the typed cache in DataCache.
+ReadDatasetChunks parses it CHUNK_ROWS rows at a time for extracts too large to hold in memory.
+'''
+
+DATA_DIR = 'data'
+CHUNK_ROWS = 100_000
+ISO_DATE = '%Y-%m-%dT%H:%M:%S'
+
+# Columns Shared by the Institution History Extracts
+EVENT_DTYPES = {'CERT': 'int32',
+                'CHANGECODE': 'int16',
+                'CHANGECODE_DESC': 'category',
+                'CLASS': 'category',
+                'CLASS_TYPE': 'category',
+                'CLASS_TYPE_DESC': 'category',
+                'FRM_CLASS': 'category',
+                'FRM_CLASS_TYPE': 'category',
+                'FRM_CLASS_TYPE_DESC': 'category',
+                'EFFYEAR': 'int16',
+                'PSTALP': 'category',
+                'CNTYNUM': 'int16',
+                'LATITUDE': 'float32',
+                'LONGITUDE': 'float32'}
+
+# Columns of the Business Combination Extracts (acquirer / outgoing / surviving institutions)
+COMBINATION_DTYPES = {**EVENT_DTYPES,
+                      'ACQ_CERT': 'Int32',
+                      'ACQ_CLASS': 'category',
+                      'ACQ_CLASS_TYPE_DESC': 'category',
+                      'ACQ_PSTALP': 'category',
+                      'ACQ_CNTYNUM': 'Int16',
+                      'ACQ_LATITUDE': 'float32',
+                      'ACQ_LONGITUDE': 'float32',
+                      'OUT_CERT': 'Int32',
+                      'OUT_CLASS_TYPE_DESC': 'category',
+                      'OUT_PSTALP': 'category',
+                      'OUT_CNTYNUM': 'Int16',
+                      'OUT_LATITUDE': 'float32',
+                      'OUT_LONGITUDE': 'float32',
+                      'SUR_CERT': 'Int32',
+                      'INSURED_OTS_FLAG': 'Int8'}
+
+SCHEMAS = {
+    'Liquidations': {'file': 'Liquidations_10_21_2021.csv',
+                     'dtypes': {**EVENT_DTYPES, 'FRM_CERT': 'Int32'},
+                     'dates': ['EFFDATE', 'PROCDATE'], 'date_format': ISO_DATE},
+    'NewInstitutions': {'file': 'New_Institutions_10_21_2021.csv',
+                        'dtypes': dict(EVENT_DTYPES),
+                        'dates': ['EFFDATE', 'PROCDATE'], 'date_format': ISO_DATE},
+    'Combinations': {'file': 'Business_Combinations_10_21_2021.csv',
+                     'dtypes': dict(COMBINATION_DTYPES),
+                     'dates': ['EFFDATE', 'PROCDATE'], 'date_format': ISO_DATE},
+    'Failures': {'file': 'Business_Combinations_-_Failures_10_21_2021.csv',
+                 'dtypes': dict(COMBINATION_DTYPES),
+                 'dates': ['EFFDATE', 'PROCDATE'], 'date_format': ISO_DATE},
+    'InterimMergers': {'file': 'Interim_Mergers_&_Reorganizations_11_7_2021.csv',
+                       'dtypes': {**EVENT_DTYPES, 'FRM_CERT': 'Int32'},
+                       'dates': ['EFFDATE', 'PROCDATE'], 'date_format': ISO_DATE},
+    'FailedBanks': {'file': 'failed_banks.csv',
+                    'dtypes': {'CERT': 'int32', 'CHCLASS1': 'category', 'CITYST': 'str',
+                               'COST': 'float64', 'FIN': 'int32', 'ID': 'int32', 'NAME': 'str',
+                               'QBFASSET': 'int64', 'QBFDEP': 'int64', 'RESTYPE': 'category',
+                               'RESTYPE1': 'category', 'SAVR': 'category'},
+                    'dates': ['FAILDATE'], 'date_format': '%m/%d/%Y'},
+    'StressIndex': {'file': 'stress_index.csv',
+                    'dtypes': {col: 'float32' for col in ['OFR FSI', 'Credit', 'Equity valuation',
+                                                          'Safe assets', 'Funding', 'Volatility',
+                                                          'United States', 'Other advanced economies',
+                                                          'Emerging markets']},
+                    'dates': ['Date'], 'date_format': '%Y-%m-%d'},
+}
+
+
+def SchemaColumns(name):
+    """
+    Function returns every column declared for a dataset.
+    """
+
+    schema = SCHEMAS[name]
+    return list(schema['dtypes']) + list(schema['dates'])
+
+
+def DatasetPath(name, data_dir=DATA_DIR):
+    """
+    Function returns the path of a dataset's source CSV.
+    """
+
+    return os.path.join(data_dir, SCHEMAS[name]['file'])
+
+
+def _CheckColumns(name, columns):
+    if columns is None:
+        return SchemaColumns(name)
+    if type(columns) != list:
+        columns = [columns]
+    unknown = [col for col in columns if col not in SchemaColumns(name)]
+    if unknown:
+        raise KeyError(f'Columns {unknown} are not in the {name} schema')
+    return columns
+
+
+def _ReadCSVKwargs(name, columns):
+    schema = SCHEMAS[name]
+    wanted = set(columns)
+
+    # Columns missing from an extract are skipped rather than raising
+    return {'usecols': lambda col: col in wanted,
+            'dtype': {col: dtype for col, dtype in schema['dtypes'].items() if col in wanted}}
+
+
+def ParseDates(df, name):
+    """
+    Function parses the date columns of a dataset with the schema's explicit format.
+    """
+
+    schema = SCHEMAS[name]
+    for col in schema['dates']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=schema['date_format'], errors='coerce')
+
+    return df
+
+
+def ReadDataset(name, columns=None, data_dir=DATA_DIR):
+    """
+    Function reads the schema columns of a dataset straight from its CSV.
+
+    Only the requested columns are parsed (all schema columns if columns is None).
+    """
+
+    columns = _CheckColumns(name, columns)
+    path = DatasetPath(name, data_dir)
+    with Timer('parse/read_csv'):
+        df = pd.read_csv(path, **_ReadCSVKwargs(name, columns))
+        df = ParseDates(df, name)
+    Count('bytes_read/csv', os.path.getsize(path))
+    Count('rows_parsed/csv', len(df))
+
+    return df[[col for col in columns if col in df.columns]]
+
+
+def ReadDatasetChunks(name, columns=None, data_dir=DATA_DIR, chunk_rows=CHUNK_ROWS):
+    """
+    Function yields the schema columns of a dataset chunk_rows rows at a time, typed like ReadDataset.
+
+    Categorical columns only hold the categories seen in their own chunk.
+    """
+
+    columns = _CheckColumns(name, columns)
+    path = DatasetPath(name, data_dir)
+    with pd.read_csv(path, chunksize=chunk_rows, **_ReadCSVKwargs(name, columns)) as reader:
+        while True:
+            with Timer('parse/read_csv'):
+                df = next(reader, None)
+                if df is not None:
+                    df = ParseDates(df, name)
+            if df is None:
+                break
+            Count('rows_parsed/csv', len(df))
+            yield df[[col for col in columns if col in df.columns]]
+    Count('bytes_read/csv', os.path.getsize(path))
+
+
+def SchemaVersion(name):
+    """
+    Function returns a short hash of a schema, used to key its typed cache.
+    """
+
+    schema = {key: value for key, value in SCHEMAS[name].items() if key != 'file'}
+    text = json.dumps(schema, sort_keys=True, default=str)
+
+    return hashlib.sha1(text.encode()).hexdigest()[:10]
+
+
+def LoadDataset(name, columns=None, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Function loads a dataset through the typed columnar cache.
+
+    The cache holds the schema columns only and is rebuilt when the CSV or the schema changes.
+    """
+
+    columns = _CheckColumns(name, columns)
+    path = DatasetPath(name, data_dir)
+    cache_kwargs = {'cache_dir': cache_dir or os.path.join(data_dir, '.cache'),
+                    'read_csv_kwargs': _ReadCSVKwargs(name, SchemaColumns(name)),
+                    'type_columns': lambda df: ParseDates(df, name),
+                    'variant': f'{name}-{SchemaVersion(name)}'}
+
+    # Columns missing from an extract are skipped rather than raising
+    present = CachedColumns(path, **cache_kwargs)
+
+    return LoadCSV(path, [col for col in columns if col in present], **cache_kwargs)
+
+
+# Event Types Shown in the GUI: which dataset, which columns describe the institution, extra filters
+EVENTS = {
+    'NewInstitutions': {'dataset': 'NewInstitutions', 'label': 'New Institutions', 'cert_col': 'CERT',
+                        'class_col': 'FRM_CLASS_TYPE_DESC', 'charter_col': 'FRM_CLASS',
+                        'state_col': 'PSTALP', 'date_col': 'EFFDATE', 'filter_criteria': {}},
+    'Liquidations': {'dataset': 'Liquidations', 'label': 'Liquidations', 'cert_col': 'CERT',
+                     'class_col': 'FRM_CLASS_TYPE_DESC', 'charter_col': 'FRM_CLASS',
+                     'state_col': 'PSTALP', 'date_col': 'EFFDATE',
+                     'filter_criteria': {'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'}},
+    'Combinations': {'dataset': 'Combinations', 'label': 'Combinations', 'cert_col': 'CERT',
+                     'class_col': 'ACQ_CLASS_TYPE_DESC', 'charter_col': 'ACQ_CLASS',
+                     'state_col': 'ACQ_PSTALP', 'date_col': 'EFFDATE', 'filter_criteria': {}},
+    'Failures': {'dataset': 'Failures', 'label': 'Failures', 'cert_col': 'CERT',
+                 'class_col': 'ACQ_CLASS_TYPE_DESC', 'charter_col': 'ACQ_CLASS',
+                 'state_col': 'ACQ_PSTALP', 'date_col': 'EFFDATE', 'filter_criteria': {}},
+}
+
+
+def EventColumns(event):
+    """
+    Function returns the columns of its dataset an event type needs.
+    """
+
+    spec = EVENTS[event]
+    columns = [spec['cert_col'], spec['class_col'], spec['charter_col'], spec['state_col'], spec['date_col']]
+
+    return columns + [col for col in spec['filter_criteria'] if col not in columns]
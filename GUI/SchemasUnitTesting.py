@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from Schemas import SCHEMAS, LoadDataset, ReadDataset
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class Schemas_Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_projection_and_dtypes(self):
+        df = ReadDataset('Liquidations', ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'], data_dir=DATA_DIR)
+
+        self.assertEqual(list(df.columns), ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'])
+        self.assertEqual(df['CERT'].dtype, 'int32')
+        self.assertIsInstance(df['FRM_CLASS_TYPE_DESC'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['EFFDATE']))
+
+    def test_cached_matches_direct(self):
+        for name in ['Liquidations', 'Failures', 'FailedBanks', 'StressIndex']:
+            direct = ReadDataset(name, data_dir=DATA_DIR)
+            cached = LoadDataset(name, data_dir=DATA_DIR, cache_dir=self.cache_dir)
+            pd.testing.assert_frame_equal(direct, cached, check_categorical=False)
+
+    def test_unknown_column(self):
+        with self.assertRaises(KeyError):
+            ReadDataset('Liquidations', ['INSTNAME'], data_dir=DATA_DIR)
+
+    def test_every_schema_has_a_date(self):
+        for schema in SCHEMAS.values():
+            self.assertTrue(schema['dates'])
+
+
+if __name__ == '__main__':
+    unittest.main()
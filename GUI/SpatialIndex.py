@@ -0,0 +1,396 @@
+import os
+import numpy as np
+import pandas as pd
+from CountEngine import ClassCodes, YearValues
+from FailureCosts import LoadFailedBanks
+from Instrumentation import Count, Timed, Timer
+from Schemas import DATA_DIR, EVENTS, DatasetPath, LoadDataset
+
+'''
+Developer Notes:
+Spatial index over the event extracts and failed_banks.csv, saved to data/.cache/spatial_index.npz.
+- Points: every event with coordinates goes into a uniform CELL_DEGREES latitude / longitude grid. The
+  points are sorted by cell (then year), so the cells a query circle overlaps in one grid row are one
+  contiguous slice found by binary search; only those candidates get the exact haversine distance.
+- Rollups: counts by source x state x year and source x county x year (plus failure COST by state),
+  with prefix sums along the year axis, so a state / county total over any year range is one
+  subtraction and choropleth feeds never touch the rows.
+Combinations and Failures are placed at the outgoing (absorbed / failed) institution, OUT_*; the count
+cube's state is the acquirer's. failed_banks.csv has no coordinates or county: it only feeds the state
+rollups (STATE from CITYST). Coordinates of 0 / 0 are unknown; counties are the FDIC CNTYNUM (county FIPS
+within the state), so STATE_FIPS * 1000 + CNTYNUM is the 5 digit county FIPS.
+'''
+
+INDEX_FILE = 'spatial_index.npz'
+CELL_DEGREES = 0.25
+EARTH_RADIUS_KM = 6371.0088
+LEVELS = ['state', 'county']
+MEASURES = ['count', 'cost']
+
+# Where Each Source Puts an Event: dataset, date, state, county, latitude / longitude columns
+SOURCES = {
+    'NewInstitutions': {'dataset': 'NewInstitutions', 'date_col': 'EFFDATE', 'state_col': 'PSTALP',
+                        'county_col': 'CNTYNUM', 'lat_col': 'LATITUDE', 'lon_col': 'LONGITUDE'},
+    'Liquidations': {'dataset': 'Liquidations', 'date_col': 'EFFDATE', 'state_col': 'PSTALP',
+                     'county_col': 'CNTYNUM', 'lat_col': 'LATITUDE', 'lon_col': 'LONGITUDE'},
+    'Combinations': {'dataset': 'Combinations', 'date_col': 'EFFDATE', 'state_col': 'OUT_PSTALP',
+                     'county_col': 'OUT_CNTYNUM', 'lat_col': 'OUT_LATITUDE', 'lon_col': 'OUT_LONGITUDE'},
+    'Failures': {'dataset': 'Failures', 'date_col': 'EFFDATE', 'state_col': 'OUT_PSTALP',
+                 'county_col': 'OUT_CNTYNUM', 'lat_col': 'OUT_LATITUDE', 'lon_col': 'OUT_LONGITUDE'},
+    'FailedBanks': {'dataset': 'FailedBanks', 'date_col': 'YEAR_FAILED', 'state_col': 'STATE',
+                    'county_col': None, 'lat_col': None, 'lon_col': None, 'cost_col': 'COST'},
+}
+
+# State and Territory FIPS Codes by Postal Code
+STATE_FIPS = {'AL': 1, 'AK': 2, 'AZ': 4, 'AR': 5, 'CA': 6, 'CO': 8, 'CT': 9, 'DE': 10, 'DC': 11, 'FL': 12,
+              'GA': 13, 'HI': 15, 'ID': 16, 'IL': 17, 'IN': 18, 'IA': 19, 'KS': 20, 'KY': 21, 'LA': 22,
+              'ME': 23, 'MD': 24, 'MA': 25, 'MI': 26, 'MN': 27, 'MS': 28, 'MO': 29, 'MT': 30, 'NE': 31,
+              'NV': 32, 'NH': 33, 'NJ': 34, 'NM': 35, 'NY': 36, 'NC': 37, 'ND': 38, 'OH': 39, 'OK': 40,
+              'OR': 41, 'PA': 42, 'RI': 44, 'SC': 45, 'SD': 46, 'TN': 47, 'TX': 48, 'UT': 49, 'VT': 50,
+              'VA': 51, 'WA': 53, 'WV': 54, 'WI': 55, 'WY': 56, 'AS': 60, 'FM': 64, 'GU': 66, 'MH': 68,
+              'MP': 69, 'PW': 70, 'PR': 72, 'VI': 78}
+
+
+def SourceColumns(source):
+    """
+    Function returns the columns a source needs (its location columns plus its event filter columns).
+    """
+
+    spec = SOURCES[source]
+    columns = [spec[key] for key in ['date_col', 'state_col', 'county_col', 'lat_col', 'lon_col', 'cost_col']
+               if spec.get(key)]
+    filters = list(EVENTS[source]['filter_criteria']) if source in EVENTS else []
+
+    return ['CERT'] + columns + [col for col in filters if col not in columns]
+
+
+def Haversine(lat, lon, lats, lons):
+    """
+    Function returns the great circle distance in km from one point to arrays of points.
+    """
+
+    lat, lon, lats, lons = np.radians(lat), np.radians(lon), np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _Cells(lats, lons, cell_degrees):
+    n_lon = int(round(360 / cell_degrees))
+    rows = np.clip(np.floor((lats + 90) / cell_degrees), 0, round(180 / cell_degrees) - 1).astype(np.int64)
+    cols = np.floor((lons + 180) / cell_degrees).astype(np.int64) % n_lon
+
+    return rows * n_lon + cols
+
+
+class SpatialIndex:
+    """
+    Grid of event locations with per-state and per-county rollups by year.
+
+    points: columns source, cert, year, state, county, lat, lon, sorted by cell (then year).
+    state_counts / county_counts: (sources, states or counties, years); state_costs: the same for COST.
+    """
+
+    def __init__(self, points, sources, states, counties, state_counts, county_counts, state_costs, first_year,
+                 cell_degrees=CELL_DEGREES, fingerprints=()):
+        self.points = points
+        self.sources = list(sources)
+        self.states = list(states)
+        self.counties = np.asarray(counties, dtype=np.int64)
+        self.first_year = int(first_year)
+        self.last_year = self.first_year + state_counts.shape[-1] - 1
+        self.cell_degrees = float(cell_degrees)
+        self.fingerprints = list(fingerprints)
+        self.state_counts, self.county_counts, self.state_costs = state_counts, county_counts, state_costs
+
+        # Prefix Sums Along the Year Axis (leading 0 so a range total is one subtraction)
+        def Cumulative(values, dtype):
+            return np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=dtype),
+                                   np.cumsum(values, axis=-1, dtype=dtype)], axis=-1)
+        self.cumulative = {('state', 'count'): Cumulative(state_counts, np.int64),
+                           ('county', 'count'): Cumulative(county_counts, np.int64),
+                           ('state', 'cost'): Cumulative(state_costs, np.float64)}
+
+        self.cells = _Cells(points['lat'], points['lon'], self.cell_degrees)
+
+    def _YearSlice(self, start_year, end_year):
+        start_year = self.first_year if start_year is None else start_year
+        end_year = self.last_year if end_year is None else end_year
+        first = min(max(start_year - self.first_year, 0), self.last_year - self.first_year + 1)
+        last = max(min(end_year - self.first_year + 1, self.last_year - self.first_year + 1), first)
+        return first, last
+
+    def _SourceIndex(self, sources):
+        if sources is None:
+            return np.arange(len(self.sources))
+        if isinstance(sources, str):
+            sources = [sources]
+        return np.array([self.sources.index(source) for source in sources if source in self.sources],
+                        dtype=np.int64)
+
+    def _Totals(self, level, measure, start_year, end_year):
+        if (level, measure) not in self.cumulative:
+            raise ValueError(f'No {measure} rollup by {level}; expected one of {sorted(self.cumulative)}')
+        first, last = self._YearSlice(start_year, end_year)
+        cumulative = self.cumulative[(level, measure)]
+        return cumulative[..., last] - cumulative[..., first]
+
+    def _CandidateRows(self, lat, lon, radius_km):
+        # Grid Rows the Circle Spans, and the Longitude Band of Each (wider away from the equator)
+        dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+        n_rows, n_lon = round(180 / self.cell_degrees), round(360 / self.cell_degrees)
+        first_row = max(int(np.floor((lat - dlat + 90) / self.cell_degrees)), 0)
+        last_row = min(int(np.floor((lat + dlat + 90) / self.cell_degrees)), n_rows - 1)
+        widest = min(abs(lat) + dlat, 90.0)
+        dlon = 180.0 if widest >= 89.9 else min(dlat / np.cos(np.radians(widest)), 180.0)
+
+        if dlon >= 180.0:
+            bands = [(0, n_lon - 1)]
+        else:
+            first_col = int(np.floor((lon - dlon + 180) / self.cell_degrees)) % n_lon
+            last_col = int(np.floor((lon + dlon + 180) / self.cell_degrees)) % n_lon
+            bands = [(first_col, last_col)] if first_col <= last_col else [(first_col, n_lon - 1), (0, last_col)]
+
+        # One Binary Search per Grid Row and Band
+        slices = []
+        for row in range(first_row, last_row + 1):
+            for first_col, last_col in bands:
+                start = np.searchsorted(self.cells, row * n_lon + first_col, side='left')
+                stop = np.searchsorted(self.cells, row * n_lon + last_col, side='right')
+                if stop > start:
+                    slices.append(np.arange(start, stop))
+        Count('cells_scanned/spatial', len(slices))
+
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    @Timed('aggregate/Within')
+    def Within(self, lat, lon, radius_km, start_year=None, end_year=None, sources=None):
+        """
+        Function returns the events within radius_km of a point in a year range, nearest first.
+
+        Columns: source, CERT, YEAR, STATE, CNTYNUM, LATITUDE, LONGITUDE, DISTANCE_KM.
+        """
+
+        rows = self._CandidateRows(lat, lon, radius_km)
+        points = {col: values[rows] for col, values in self.points.items()}
+
+        # Exact Distance and Year / Source Filters on the Candidates Only
+        first, last = self._YearSlice(start_year, end_year)
+        distance = Haversine(lat, lon, points['lat'], points['lon'])
+        offsets = points['year'] - self.first_year
+        keep = (distance <= radius_km) & (offsets >= first) & (offsets < last)
+        keep &= np.isin(points['source'], self._SourceIndex(sources))
+        Count('rows_in/Within', len(rows))
+        order = np.argsort(distance[keep], kind='stable')
+
+        def Pick(col):
+            return points[col][keep][order]
+
+        return pd.DataFrame({'source': pd.Categorical.from_codes(Pick('source'), self.sources),
+                             'CERT': Pick('cert'),
+                             'YEAR': Pick('year'),
+                             'STATE': pd.Categorical.from_codes(Pick('state'), self.states),
+                             'CNTYNUM': pd.Series(Pick('county'), dtype='Int16').mask(lambda county: county < 0),
+                             'LATITUDE': Pick('lat'),
+                             'LONGITUDE': Pick('lon'),
+                             'DISTANCE_KM': distance[keep][order]})
+
+    def County(self, state, county, start_year=None, end_year=None, sources=None):
+        """
+        Function returns the events of each source in one county (postal code, CNTYNUM) over a year range.
+        """
+
+        totals = self._Totals('county', 'count', start_year, end_year)
+        counts = np.zeros(len(self.sources), dtype=np.int64)
+        if state in self.states:
+            key = self.states.index(state) * 1000 + int(county)
+            position = np.searchsorted(self.counties, key)
+            if position < len(self.counties) and self.counties[position] == key:
+                counts = totals[:, position]
+
+        selected = self._SourceIndex(sources)
+        return pd.Series(counts[selected], index=pd.Index([self.sources[i] for i in selected], name='source'),
+                         name='Count')
+
+    def Rollup(self, level='state', start_year=None, end_year=None, sources=None, measure='count'):
+        """
+        Function returns the choropleth feed of a year range: one row per state or county with its FIPS code,
+        one column per source and their Total.
+
+        measure 'cost' sums failed_banks COST by state.
+        """
+
+        if level not in LEVELS or measure not in MEASURES:
+            raise ValueError(f'Unknown rollup {level} / {measure}; expected a level in {LEVELS} and a '
+                             f'measure in {MEASURES}')
+        selected = self._SourceIndex(sources)
+        totals = self._Totals(level, measure, start_year, end_year)[selected]
+
+        # Keys and FIPS Codes (rows of unknown states have no FIPS code)
+        if level == 'state':
+            keys = pd.DataFrame({'STATE': self.states})
+            fips = [f'{STATE_FIPS[state]:02d}' if state in STATE_FIPS else None for state in self.states]
+        else:
+            states = [self.states[code] for code in self.counties // 1000]
+            keys = pd.DataFrame({'STATE': states, 'CNTYNUM': (self.counties % 1000).astype(np.int16)})
+            fips = [f'{STATE_FIPS[state]:02d}{county:03d}' if state in STATE_FIPS else None
+                    for state, county in zip(states, self.counties % 1000)]
+        keys['FIPS'] = pd.array(fips, dtype='string')
+
+        rollup = pd.concat([keys, pd.DataFrame(totals.T, columns=[self.sources[i] for i in selected])], axis=1)
+        rollup['Total'] = totals.sum(axis=0)
+
+        return rollup.loc[rollup['Total'] != 0].reset_index(drop=True)
+
+    def Save(self, path):
+        """
+        Function saves the index to a compressed .npz file.
+        """
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp.npz'
+        np.savez_compressed(temp_path, sources=np.array(self.sources), states=np.array(self.states),
+                            counties=self.counties, state_counts=self.state_counts,
+                            county_counts=self.county_counts, state_costs=self.state_costs,
+                            first_year=self.first_year, cell_degrees=self.cell_degrees,
+                            fingerprints=np.array(self.fingerprints, dtype=str),
+                            **{f'point_{col}': values for col, values in self.points.items()})
+        os.replace(temp_path, path)
+
+    @classmethod
+    def Load(cls, path):
+        """
+        Function loads an index saved with Save.
+        """
+
+        with Timer('io/read_spatial_index'), np.load(path) as data:
+            points = {key[len('point_'):]: data[key] for key in data.files if key.startswith('point_')}
+            return cls(points, data['sources'].tolist(), data['states'].tolist(), data['counties'],
+                       data['state_counts'], data['county_counts'], data['state_costs'], int(data['first_year']),
+                       float(data['cell_degrees']), data['fingerprints'].tolist())
+
+
+def _Column(df, col, dtype, missing):
+    # A Source Column as a numpy Array (absent columns and missing values become `missing`)
+    if not col or col not in df:
+        return np.full(len(df), missing, dtype=dtype)
+    values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    return np.where(np.isnan(values), missing, values).astype(dtype)
+
+
+@Timed('aggregate/BuildSpatialIndex')
+def BuildSpatialIndex(frames, cell_degrees=CELL_DEGREES, fingerprints=()):
+    """
+    Function builds a SpatialIndex from raw frames (dict of source -> frame with its SourceColumns).
+    """
+
+    # Apply Each Event's Filters Once and Keep Rows With a Year
+    prepared, states = {}, set()
+    for source, df in frames.items():
+        spec = SOURCES[source]
+        mask = np.ones(len(df), dtype=bool)
+        for key, value in (EVENTS[source]['filter_criteria'] if source in EVENTS else {}).items():
+            mask &= (df[key] == value).to_numpy()
+        mask &= YearValues(df[spec['date_col']]) >= 0
+        prepared[source] = df.loc[mask]
+        if spec['state_col'] in df:
+            states.update(str(state) for state in prepared[source][spec['state_col']].dropna().unique())
+    states = sorted(states | {'Unknown'})
+    sources = list(SOURCES)
+
+    # Encode Every Row: Source, Year, State, County, Coordinates
+    columns = {col: [] for col in ['source', 'cert', 'year', 'state', 'county', 'lat', 'lon', 'cost']}
+    for source, df in prepared.items():
+        spec = SOURCES[source]
+        state_codes = (ClassCodes(df[spec['state_col']], states) if spec['state_col'] in df
+                       else np.full(len(df), -1))
+        state_codes[state_codes < 0] = states.index('Unknown')
+        county = _Column(df, spec['county_col'], np.int64, -1)
+        county[(county <= 0) | (county >= 1000)] = -1
+
+        columns['source'].append(np.full(len(df), sources.index(source), dtype=np.int8))
+        columns['cert'].append(_Column(df, 'CERT', np.int64, -1))
+        columns['year'].append(YearValues(df[spec['date_col']]).astype(np.int16))
+        columns['state'].append(state_codes.astype(np.int16))
+        columns['county'].append(county.astype(np.int16))
+        columns['lat'].append(_Column(df, spec['lat_col'], np.float64, np.nan))
+        columns['lon'].append(_Column(df, spec['lon_col'], np.float64, np.nan))
+        columns['cost'].append(np.nan_to_num(_Column(df, spec.get('cost_col'), np.float64, np.nan)))
+    rows = {col: (np.concatenate(parts) if parts else np.empty(0)) for col, parts in columns.items()}
+    for col, dtype in [('source', np.int8), ('year', np.int16), ('state', np.int16), ('county', np.int16),
+                       ('cert', np.int64)]:
+        rows[col] = rows[col].astype(dtype)
+
+    # Rollups: One bincount per Level
+    first_year = int(rows['year'].min()) if len(rows['year']) else 2000
+    n_years = (int(rows['year'].max()) - first_year + 1) if len(rows['year']) else 1
+    offsets = rows['year'].astype(np.int64) - first_year
+    shape = (len(sources), len(states), n_years)
+    keys = np.ravel_multi_index((rows['source'], rows['state'], offsets), shape)
+    state_counts = np.bincount(keys, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+    state_costs = np.bincount(keys, weights=rows['cost'], minlength=int(np.prod(shape))).reshape(shape)
+
+    known_county = rows['county'] >= 0
+    county_keys = rows['state'].astype(np.int64) * 1000 + rows['county']
+    counties, county_codes = np.unique(county_keys[known_county], return_inverse=True)
+    shape = (len(sources), len(counties), n_years)
+    keys = np.ravel_multi_index((rows['source'][known_county], county_codes.reshape(-1), offsets[known_county]),
+                                shape)
+    county_counts = np.bincount(keys, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+
+    # Points: Rows With Coordinates, Sorted by Cell Then Year
+    located = ~np.isnan(rows['lat']) & ~np.isnan(rows['lon']) & ~((rows['lat'] == 0) & (rows['lon'] == 0))
+    cells = _Cells(rows['lat'][located], rows['lon'][located], cell_degrees)
+    order = np.lexsort((rows['year'][located], cells))
+    points = {col: rows[col][located][order] for col in ['source', 'cert', 'year', 'state', 'county', 'lat', 'lon']}
+
+    return SpatialIndex(points, sources, states, counties, state_counts, county_counts, state_costs, first_year,
+                        cell_degrees, fingerprints)
+
+
+def SourceFingerprints(data_dir=DATA_DIR):
+    """
+    Function returns size:mtime fingerprints of the extracts an index is built from.
+    """
+
+    fingerprints = []
+    for source, spec in SOURCES.items():
+        path = DatasetPath(spec['dataset'], data_dir)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints.append(f'{source}:{stat.st_size}:{stat.st_mtime_ns}')
+        else:
+            fingerprints.append(f'{source}:missing')
+
+    return fingerprints
+
+
+def LoadSpatialIndex(data_dir=DATA_DIR, path=None, cell_degrees=CELL_DEGREES):
+    """
+    Function loads the saved spatial index, rebuilding it if any extract changed.
+
+    The index lives in data_dir/.cache unless another path is given.
+    """
+
+    path = path or os.path.join(data_dir, '.cache', INDEX_FILE)
+    fingerprints = SourceFingerprints(data_dir)
+    if os.path.exists(path):
+        index = SpatialIndex.Load(path)
+        if index.fingerprints == fingerprints and index.cell_degrees == cell_degrees:
+            Count('cache_hits/spatial_index')
+            return index
+
+    # Rebuild From the Extracts (missing extracts contribute no events)
+    Count('cache_misses/spatial_index')
+    frames = {}
+    for source, spec in SOURCES.items():
+        if not os.path.exists(DatasetPath(spec['dataset'], data_dir)):
+            continue
+        if source == 'FailedBanks':
+            frames[source] = LoadFailedBanks(SourceColumns(source), data_dir)
+        else:
+            frames[source] = LoadDataset(spec['dataset'], SourceColumns(source), data_dir=data_dir)
+    index = BuildSpatialIndex(frames, cell_degrees, fingerprints)
+    index.Save(path)
+
+    return index
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from FailureCosts import LoadFailedBanks
+from Instrumentation import Reset, Snapshot
+from Schemas import LoadDataset
+from SpatialIndex import BuildSpatialIndex, Haversine, LoadSpatialIndex, SpatialIndex
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class SpatialIndex_Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_within_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        n = 5000
+        df = pd.DataFrame({'CERT': np.arange(n),
+                           'EFFDATE': pd.Timestamp('1990-01-01') + pd.to_timedelta(rng.integers(0, 11000, n), unit='D'),
+                           'PSTALP': rng.choice(['VA', 'NY', 'AK'], n),
+                           'CNTYNUM': rng.integers(1, 200, n),
+                           'LATITUDE': rng.uniform(-89, 89, n),
+                           'LONGITUDE': rng.uniform(-180, 180, n),
+                           'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'})
+        index = BuildSpatialIndex({'Liquidations': df}, cell_degrees=1.0)
+
+        # Ordinary, Across the Date Line, Near the Pole
+        for lat, lon, radius_km in [(38.0, -77.0, 800), (10.0, 179.5, 1500), (86.0, 20.0, 900)]:
+            found = index.Within(lat, lon, radius_km, 2000, 2010)
+            distance = Haversine(lat, lon, df['LATITUDE'].to_numpy(), df['LONGITUDE'].to_numpy())
+            year = df['EFFDATE'].dt.year
+            expected = df.loc[(distance <= radius_km) & (year >= 2000) & (year <= 2010), 'CERT']
+            self.assertGreater(len(expected), 0)
+            self.assertEqual(sorted(found['CERT']), sorted(expected))
+            self.assertTrue(found['DISTANCE_KM'].is_monotonic_increasing)
+
+    def test_rollups_match_group_by(self):
+        path = os.path.join(self.tmp, 'spatial_index.npz')
+        index = LoadSpatialIndex(DATA_DIR, path)
+
+        # State Rollup of failed_banks == the Group-By It Replaces
+        banks = LoadFailedBanks(['STATE', 'YEAR_FAILED', 'COST'], DATA_DIR, cache_dir=os.path.join(self.tmp, 'cache'))
+        banks = banks.loc[banks['YEAR_FAILED'].between(2008, 2012)]
+        rollup = index.Rollup('state', 2008, 2012, 'FailedBanks').set_index('STATE')['FailedBanks']
+        expected = banks.groupby('STATE', observed=True).size()
+        self.assertEqual(rollup.to_dict(), {str(state): count for state, count in expected.items() if count})
+        self.assertGreater(len(rollup), 20)
+        costs = index.Rollup('state', 2008, 2012, 'FailedBanks', measure='cost').set_index('STATE')['Total']
+        self.assertAlmostEqual(costs['GA'], banks.loc[banks['STATE'] == 'GA', 'COST'].sum(), places=0)
+
+        # County Counts of the Failed Institutions (OUT_*), With 5 Digit FIPS Codes
+        failures = LoadDataset('Failures', ['OUT_PSTALP', 'OUT_CNTYNUM', 'EFFDATE'], DATA_DIR,
+                               cache_dir=os.path.join(self.tmp, 'cache'))
+        failures = failures.loc[failures['EFFDATE'].dt.year.between(2008, 2012)]
+        expected = failures.groupby(['OUT_PSTALP', 'OUT_CNTYNUM'], observed=True).size()
+        (state, county), count = expected.idxmax(), expected.max()
+        self.assertEqual(index.County(state, county, 2008, 2012)['Failures'], count)
+        counties = index.Rollup('county', 2008, 2012, 'Failures')
+        self.assertEqual(counties['Failures'].sum(), len(failures))
+        self.assertEqual(counties.loc[(counties['STATE'] == 'GA') & (counties['CNTYNUM'] == 121), 'FIPS'].item(), '13121')
+
+        # Saved, Reloaded Without a Rebuild
+        Reset()
+        reloaded = LoadSpatialIndex(DATA_DIR, path)
+        self.assertEqual(Snapshot()['counters'].get('cache_hits/spatial_index'), 1)
+        pd.testing.assert_frame_equal(reloaded.Within(40.7, -74.0, 100), index.Within(40.7, -74.0, 100))
+        self.assertIsInstance(SpatialIndex.Load(path), SpatialIndex)
+
+if __name__ == '__main__':
+    unittest.main()
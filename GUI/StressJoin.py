@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from Schemas import DATA_DIR, SCHEMAS, LoadDataset
+
+'''
+Developer Notes:
+Time-aligned join of FDIC events with the daily OFR Financial Stress Index (data/stress_index.csv).
+Every event gets the index values prevailing on its date (the last trading day on or before it,
+via a sorted merge_asof) and trailing calendar-window means such as 30 / 90 days. The windows
+come from cumulative sums precomputed once per StressIndex, so each mean is two searchsorted
+lookups and one subtraction; missing values are skipped in the means. Events share dates, so the
+join runs over the distinct event dates and the results are broadcast back to the rows.
+'''
+
+STRESS_COLUMNS = list(SCHEMAS['StressIndex']['dtypes'])
+WINDOWS = (30, 90)
+
+
+class StressIndex:
+    """
+    Daily stress index values with cumulative sums for trailing window means.
+    """
+
+    def __init__(self, stress, date_col='Date', columns=None):
+        columns = STRESS_COLUMNS if columns is None else list(columns)
+        stress = stress[[date_col] + columns].dropna(subset=[date_col]).sort_values(date_col, kind='stable')
+
+        self.columns = columns
+        self.dates = stress[date_col].to_numpy(dtype='datetime64[ns]')
+        self.frame = stress[columns].reset_index(drop=True)
+        self.frame.insert(0, '_STRESS_DATE', self.dates)
+
+        # Prefix Sums of Values and of Non-Missing Counts (leading 0 so a window is one subtraction)
+        values = stress[columns].to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        zeros = np.zeros((1, len(columns)))
+        self.cumulative = np.concatenate([zeros, np.cumsum(np.where(present, values, 0), axis=0)])
+        self.counts = np.concatenate([zeros, np.cumsum(present, axis=0)])
+
+    def WindowMeans(self, dates, days):
+        """
+        Function returns the mean of each column over the days calendar days ending on each date.
+
+        Returns an array of shape (len(dates), len(columns)); NaN when a window holds no values.
+        """
+
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        end = np.searchsorted(self.dates, dates, side='right')
+        start = np.searchsorted(self.dates, dates - np.timedelta64(days - 1, 'D'), side='left')
+
+        total = self.cumulative[end] - self.cumulative[start]
+        count = self.counts[end] - self.counts[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = total / count
+        means[np.isnat(dates)] = np.nan
+        return means
+
+    def Attach(self, events, date_col, columns=None, windows=WINDOWS, tolerance=None):
+        """
+        Function returns a copy of events with the stress values prevailing on each event date.
+
+        Adds each column and, for each window, a '<column> <days>D' trailing mean.
+        tolerance (e.g. pd.Timedelta('7D')) leaves values older than that missing.
+        """
+
+        columns = self.columns if columns is None else list(columns)
+        dates = pd.to_datetime(events[date_col]).to_numpy(dtype='datetime64[ns]')
+
+        # Events Share Dates: Join the Distinct (sorted) Dates and Broadcast Back
+        valid = ~np.isnat(dates)
+        unique, inverse = np.unique(dates[valid], return_inverse=True)
+        joined = pd.merge_asof(pd.DataFrame({'_EVENT_DATE': unique}), self.frame[['_STRESS_DATE'] + columns],
+                               left_on='_EVENT_DATE', right_on='_STRESS_DATE', direction='backward',
+                               tolerance=tolerance)
+
+        def Broadcast(values):
+            full = np.full(len(dates), np.nan)
+            full[valid] = values[inverse]
+            return full
+
+        result = events.copy()
+        for col in columns:
+            result[col] = Broadcast(joined[col].to_numpy(dtype='float64'))
+
+        # Trailing Window Means From the Prefix Sums
+        indexes = [self.columns.index(col) for col in columns]
+        for days in windows:
+            means = self.WindowMeans(unique, days)[:, indexes]
+            for i, col in enumerate(columns):
+                result[f'{col} {days}D'] = Broadcast(means[:, i])
+
+        return result
+
+
+def LoadStressIndex(data_dir=DATA_DIR, columns=None):
+    """
+    Function loads the stress index through the typed cache and precomputes its window sums.
+    """
+
+    columns = STRESS_COLUMNS if columns is None else list(columns)
+    return StressIndex(LoadDataset('StressIndex', ['Date'] + columns, data_dir), columns=columns)
+
+
+def AttachStress(events, date_col, stress=None, columns=('OFR FSI',), windows=WINDOWS, data_dir=DATA_DIR):
+    """
+    Function attaches stress index values and trailing means to events (e.g. EFFDATE or FAILDATE).
+    """
+
+    stress = stress if stress is not None else LoadStressIndex(data_dir)
+    return stress.Attach(events, date_col, list(columns), windows)
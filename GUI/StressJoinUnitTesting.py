@@ -0,0 +1,46 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from StressJoin import AttachStress, StressIndex
+
+class StressJoin_Test(unittest.TestCase):
+    def setUp(self):
+        # Weekdays Only, Like the OFR Index, With One Missing Value
+        dates = pd.bdate_range('2008-01-01', '2009-12-31')
+        self.raw = pd.DataFrame({'Date': dates, 'OFR FSI': np.arange(len(dates), dtype='float64')})
+        self.raw.loc[10, 'OFR FSI'] = np.nan
+        self.stress = StressIndex(self.raw.sample(frac=1, random_state=0), columns=['OFR FSI'])
+
+    def BruteForce(self, date, days):
+        window = self.raw[(self.raw['Date'] <= date) & (self.raw['Date'] > date - pd.Timedelta(days=days))]
+        return window['OFR FSI'].mean()
+
+    def test_matches_per_row_lookup(self):
+        events = pd.DataFrame({'CERT': [1, 2, 3, 4],
+                               'FAILDATE': ['2009-03-07', '2008-01-01', None, '2008-02-01']})
+        df = AttachStress(events, 'FAILDATE', stress=self.stress)
+
+        self.assertEqual(list(df.columns), ['CERT', 'FAILDATE', 'OFR FSI', 'OFR FSI 30D', 'OFR FSI 90D'])
+        for row in [0, 1, 3]:
+            date = pd.Timestamp(events['FAILDATE'][row])
+            prevailing = self.raw.loc[self.raw['Date'] <= date, 'OFR FSI'].iloc[-1]
+            self.assertEqual(df['OFR FSI'][row], prevailing)
+            for days in [30, 90]:
+                self.assertAlmostEqual(df[f'OFR FSI {days}D'][row], self.BruteForce(date, days))
+        self.assertTrue(df.iloc[2, 2:].isna().all())
+
+        # Saturday Event Gets Friday's Value; Too Old With a 0 Day Tolerance
+        stale = self.stress.Attach(events.iloc[:1], 'FAILDATE', windows=(), tolerance=pd.Timedelta('0D'))
+        self.assertTrue(np.isnan(stale['OFR FSI'][0]))
+
+    def test_many_events_speed(self):
+        rng = np.random.default_rng(0)
+        events = pd.DataFrame({'EFFDATE': pd.Timestamp('2008-01-01') + pd.to_timedelta(rng.integers(0, 730, 300000), 'D')})
+        start = time.perf_counter()
+        df = self.stress.Attach(events, 'EFFDATE')
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(len(df), 300000)
+
+if __name__ == '__main__':
+    unittest.main()
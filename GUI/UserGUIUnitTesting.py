@@ -1,25 +1,27 @@
 import unittest
 import pandas as pd
-from UserGui import plot
+from UserGui import ValidateInputYears, plot
 
 class GUI_Test(unittest.TestCase):
     def test_minMaxYears(self):
 
         # Setup
-        ni = pd.DataFrame()
-        li = pd.DataFrame()
-        co = pd.DataFrame()
-        fa = pd.DataFrame()
-        last_generated = [0]
-
         minyear = '2000'
         maxyear = '2000'
 
         try:
-            plot(ni, li, co, fa, last_generated).validateInputYears()
+            self.assertEqual(ValidateInputYears(minyear, maxyear), (2000, 2000))
         except Exception as e:
             self.fail(e)
 
+    def test_invalidYears(self):
+        with self.assertRaises(TypeError):
+            ValidateInputYears('20o0', '2010')
+        with self.assertRaises(ValueError):
+            ValidateInputYears('1999', '2010')
+        with self.assertRaises(ValueError):
+            ValidateInputYears('2010', '2005')
+
 
 if __name__ == '__main__':
     unittest.main() 
@@ -1,183 +1,101 @@
-from tkinter import *
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, 
-NavigationToolbar2Tk)
+import os
 
 '''
 Developer Notes: 
 Year Range is from 2000-2020, User can determine year range within those years to create more specific charts
+The window opens straight away; the extracts are read and aggregated by LoadData on a worker thread
+and the buttons are enabled once the results come back through the BackgroundLoader queue.
+FilterDF, CountByYear, LoadData and ValidateInputYears live in EventData.py (no Tk needed) and are
+re-exported here; BatchReports.py renders the same charts and extracts headless.
+Set FDIC_PROFILE to a file path to write the session's profile report (Instrumentation.py) on exit.
+Importing this module is cheap: tkinter, pandas and matplotlib load when plot() opens the window and
+the EventData names load on first access. The GUI only starts from main() (python GUI/UserGui.py).
 '''
-def click():
-    print("Something is happening")
-###main:
-def FilterDF(df, cols_keep, date_col, class_col, filter_criteria={}, start_year=2000, end_year=2020):
-
-    # Ensure Correct Data Types
-    if type(cols_keep) != list:
-        cols_keep = [cols_keep]
-
-    # Extract Desired Columns
-    df_clean = df[cols_keep].copy()
-    
-    # Convert Date Column to DateTime
-    df_clean[date_col] = pd.to_datetime(df_clean[date_col])
-
-    # Filter Date Column To Desired Range (2000-2020 defualt)
-    df_clean = df_clean.loc[(df_clean[date_col].dt.year >= start_year) & 
-                            (df_clean[date_col].dt.year <= end_year)]
-
-    # Filter Anything Not Needed
-    if filter_criteria != {}:
-        for key in filter_criteria.keys():
-            df_clean = df_clean.loc[df_clean[key] == filter_criteria[key]]
-
-    # Filter Class Type != Savings or Commercial
-    df_clean = df_clean.loc[(df_clean[class_col] == 'Savings') |
-                            (df_clean[class_col] == 'Commercial')
-                            ].reset_index(drop=True)
-
-    
-
-    return df_clean
-
-def CountByYear(df, class_col, date_col, count_col):
-
-    # Count Cert IDs by Year
-    df_by_year = df.groupby([class_col, df[date_col].dt.year]).count()[count_col].reset_index()
-    df_by_year.columns = ['Class Type', 'Year', 'Count']
-
-    # Fill in Missing Years
-    for year in range(2000, 2021):
-        temp_com = df_by_year.loc[(df_by_year['Year'] == year) &
-                                  (df_by_year['Class Type'] == 'Commercial')]
-        temp_sav = df_by_year.loc[(df_by_year['Year'] == year) &
-                                  (df_by_year['Class Type'] == 'Savings')]
-        if len(temp_com) != 1:
-            df_by_year = df_by_year.append({'Class Type': 'Commercial', 'Year': year, 'Count': 0}, ignore_index=True)
-        if len(temp_sav) != 1:
-            df_by_year = df_by_year.append({'Class Type': 'Savings', 'Year': year, 'Count': 0}, ignore_index=True)
 
-    # Sort DataFrame
-    df_by_year = df_by_year.sort_values(by=['Class Type', 'Year']).reset_index(drop=True)
+# Names Re-Exported From EventData (imported on first access)
+EVENT_DATA_NAMES = ['EVENT_COLUMNS', 'CountByYear', 'FilterDF', 'LoadData', 'PrepareData', 'ValidateInputYears']
 
-    # Reformat DataFrame
-    df_by_year_reformat = pd.DataFrame(df_by_year.loc[df_by_year['Class Type'] == 'Commercial', 'Year'])
-    df_by_year_reformat['Commercial'] = list(df_by_year.loc[df_by_year['Class Type'] == 'Commercial', 'Count'])
-    df_by_year_reformat['Savings'] = list(df_by_year.loc[df_by_year['Class Type'] == 'Savings', 'Count'])
 
-    return df_by_year_reformat
+def __getattr__(name):
+    if name in EVENT_DATA_NAMES:
+        import EventData
+        return getattr(EventData, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
-
-def plot(liquidations, new_institutions, combinations, failures, last_generated):
-    def ValidateInputYears():
+def click():
+    print("Something is happening")
+###main:
+def plot(liquidations, new_institutions, combinations, failures, last_generated, cube=None, loader=None):
+    from tkinter import BOTTOM, DISABLED, EW, NORMAL, TOP, W, Button, Entry, Frame, Label, Tk
+    from BackgroundLoader import BackgroundLoader
+    from ChartPanel import BarChart
+    from EventData import PrepareData, ValidateInputYears
+    from Export import ExportEvents
+
+    def ValidateYears():
         try:
-            min = int(minyear.get())
-            max = int(maxyear.get())
-        except:
-            Label(inputFrame, text= "Inputted Years are not Integers. Please try again.", fg = "red", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5, pady=5)
-            raise TypeError()
-
-        if min < 2000 or max < 2000 or min > 2020 or max > 2020:
-            Label(inputFrame, text= "Inputted Years are are outside valid range (2000-2020). Please try again.", fg = "red", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5)
-            raise ValueError()
-        elif max < min:
-            Label(inputFrame, text= 'Inputted Max Year is less than Min Year. Please try again.', fg = "red", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5)
-
-            
-            raise ValueError()      
-        Label(inputFrame, text= '', fg = "black", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5)
+            min, max = ValidateInputYears(minyear.get(), maxyear.get())
+        except (TypeError, ValueError) as error:
+            status.config(text= str(error), fg = "red")
+            raise
+        status.config(text= '', fg = "black")
         return min, max    
     
     def newInstitutions():
-        GenerateHistogram(ni2_cnts, 'New Institutions')
+        GenerateHistogram('NewInstitutions', 'New Institutions')
         last_generated[0] = 'NewInstitutions'
     def liquidInstitutions():
-        GenerateHistogram(li2_cnts, 'Liquidations')
+        GenerateHistogram('Liquidations', 'Liquidations')
         last_generated[0] = 'Liquidations'
     def combInstitutions():
-        GenerateHistogram(co2_cnts, 'Combinations')
+        GenerateHistogram('Combinations', 'Combinations')
         last_generated[0] = 'Combinations'
     def failInstitutions():
-        GenerateHistogram(fa2_cnts, 'Failures')
+        GenerateHistogram('Failures', 'Failures')
         last_generated[0] = 'Failures'
-    def GenerateHistogram(df, category):
-
-        min, max = ValidateInputYears()
-
-        # Generate Figure
-        fig, axis = plt.subplots(figsize=(12, 5))
-
-        # Filter Year to Desired Time Frame
-        df = df.loc[(df['Year'] >= min) & (df['Year'] <= max)
-                ].reset_index(drop=True).copy()
-
-        # Plot
-        df.plot(kind='bar', x='Year', ax=axis)
+    def GenerateHistogram(event, category):
 
-        # Label Plot
-        axis.set_ylabel(f'Count of {category}', size=10)
-        axis.set_xlabel('Year', size=10)
-        axis.set_title(f'{category} by Year', size=15)
-        axis.tick_params(axis='x', labelsize=7, labelrotation=0)
-        axis.tick_params(axis='y', labelsize=7)
-        axis.legend(fontsize=10)
+        min, max = ValidateYears()
 
-        # Write Counts Above Bars
-        for i, v in enumerate(df['Commercial']):
-            axis.text(i-0.123, 1.01*v, str(v), color='blue', fontweight='bold', horizontalalignment='center', size=8)
-        for i, v in enumerate(df['Savings']):
-            axis.text(i+0.123, 1.01*v, str(v), color='chocolate', fontweight='bold', horizontalalignment='center', size=8)
+        # Counts for the Desired Time Frame (straight from the cube)
+        df = data['cube'].Counts(event, min, max)
 
-        # Show Figure
-      
-        canvas = FigureCanvasTkAgg(fig,
-                               master = graphFrame)  
-        canvas.draw()
-        canvas.get_tk_widget().grid(row=5, column=6, sticky=W)
+        # Update the Session's Chart In Place (one figure and canvas for the whole session)
+        chart.Draw(df, category)
+        chart.canvas.get_tk_widget().grid(row=5, column=6, sticky=W)
 
 
     def download():
         verisonToDownload = last_generated[0]
-        if verisonToDownload == 'NewInstitutions':
-            df = ni2.copy()
-        elif verisonToDownload == "Liquidations":
-            df = li2.copy()
-            df = df[df.columns[0:3]]
-        elif verisonToDownload == "Combinations":
-            df = co2.copy()
-        elif verisonToDownload =="Failures":
-            df = fa2.copy()
-        else:
-            Label(inputFrame, text= "Please generate a view to download data", fg = "red", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5, pady=5)
+        if verisonToDownload not in ['NewInstitutions', 'Liquidations', 'Combinations', 'Failures']:
+            status.config(text= "Please generate a view to download data", fg = "red")
             raise UnboundLocalError()
-        df.columns = ['Cert_ID', 'Class_Type', 'Effective_Date']
-        df['Change_Type'] = verisonToDownload
+        df = data[verisonToDownload]
        
-        min, max = ValidateInputYears()
-        df = df.loc[(df['Effective_Date'].dt.year >= min) & (df['Effective_Date'].dt.year <= max)].reset_index(drop=True)
-        df = df.sort_values(by=['Effective_Date']).reset_index(drop = True)
-        df.to_csv(f'data/data_outputs/{verisonToDownload}_{min}_to_{max}.csv')
-        Label(inputFrame, text= "File successfully downloaded!", fg = "black", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5, pady=5)
+        min, max = ValidateYears()
+
+        # Write the File on a Worker Thread (year partitions of earlier downloads are reused)
+        def Downloaded(path):
+            downloadButton.config(state=NORMAL)
+            status.config(text= "File successfully downloaded!", fg = "black")
+        def DownloadFailed(error):
+            downloadButton.config(state=NORMAL)
+            status.config(text= f"Download failed: {error}", fg = "red")
+
+        downloadButton.config(state=DISABLED)
+        BackgroundLoader(window, lambda progress: ExportEvents(df, verisonToDownload, min, max, progress=progress),
+                         Downloaded, DownloadFailed, LoadProgress).Start()
 
     #create label
     #include image
     #photo1 = PhotoImage(file="brand.gif")
     #Label(window, image=photo1, bg = "black").grid(row=0, column=0, sticky=E)
-    ni2 = FilterDF(new_institutions, ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE'], 'EFFDATE', 'FRM_CLASS_TYPE_DESC')
-    li2 = FilterDF(liquidations, ['CERT', 'FRM_CLASS_TYPE_DESC', 'EFFDATE', 'CHANGECODE_DESC'], 'EFFDATE', 
-            'FRM_CLASS_TYPE_DESC', filter_criteria={'CHANGECODE_DESC': 'FINANCIAL DIFFICULTY - PAYOFF'})
-    co2 = FilterDF(combinations, ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE'], 'EFFDATE', 'ACQ_CLASS_TYPE_DESC')
-    fa2 = FilterDF(failures, ['CERT', 'ACQ_CLASS_TYPE_DESC', 'EFFDATE'], 'EFFDATE', 'ACQ_CLASS_TYPE_DESC')
-
-    ni2_cnts = CountByYear(ni2, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', 'CERT')
-    li2_cnts = CountByYear(li2, 'FRM_CLASS_TYPE_DESC', 'EFFDATE', 'CERT')
-    co2_cnts = CountByYear(co2, 'ACQ_CLASS_TYPE_DESC', 'EFFDATE', 'CERT')
-    fa2_cnts = CountByYear(fa2, 'ACQ_CLASS_TYPE_DESC', 'EFFDATE', 'CERT')
-    
+    # Filtered Frames and Counts (filled in by the loader when one is given)
+    data = {}
+    if loader is None:
+        data.update(PrepareData(liquidations, new_institutions, combinations, failures, cube))
+
     #--------------Main Window#
     window = Tk()
     window.title("FDIC Data - DS5100")
@@ -190,11 +108,13 @@ def plot(liquidations, new_institutions, combinations, failures, last_generated)
 
     graphFrame = Frame(window)
     graphFrame.pack(side=BOTTOM, expand = True)
+    chart = BarChart(master=graphFrame)
 
 
 
     Label(inputFrame, text= "FDIC Charter Changes 2000-2020", fg = "black", font="none 20 bold").grid(row=1,  column=1, sticky=EW, columnspan=5,padx=5, pady=5)
-    Label(inputFrame, text= '', fg = "black", font="none 8 italic").grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5)
+    status = Label(inputFrame, text= '', fg = "black", font="none 8 italic")
+    status.grid(row=2,  column=1, sticky=EW, columnspan=5,padx=5)
     
     #create entry for years
     Label(inputFrame, text= "Min Year:", fg = "black", font="none 12 bold").grid(row=3,  column=2, sticky=W)
@@ -206,36 +126,63 @@ def plot(liquidations, new_institutions, combinations, failures, last_generated)
     maxyear.grid(row=3, column = 5, sticky =W) 
 
     #------NEW INSTITUITONS------#
-    Button(buttonFrame, text="NEW BANKS", width = 15, command=newInstitutions).grid(row=7, column = 3, sticky = W)
+    buttons = [Button(buttonFrame, text="NEW BANKS", width = 15, command=newInstitutions)]
+    buttons[-1].grid(row=7, column = 3, sticky = W)
     #create label for text
     #Label(window, text= "See New Banks:", bg="white", fg = "black", font="none 12 bold").grid(row=6,  column=2, sticky=W)
    
    #---------FAILED BANKS--------#
     #Label(window, text= "See Failed Banks:", bg="white", fg = "black", font="none 12 bold").grid(row=6,  column=4, sticky=W)
-    Button(buttonFrame, text="FAILED BANKS", width = 15, command=failInstitutions).grid(row=7, column = 5, sticky = W)
+    buttons.append(Button(buttonFrame, text="FAILED BANKS", width = 15, command=failInstitutions))
+    buttons[-1].grid(row=7, column = 5, sticky = W)
 
 
     #------LIQUIDATED BANKS-----#
     #Label(window, text= "See Liquidated Banks:", bg="white", fg = "black", font="none 12 bold").grid(row=6,  column=6, sticky=W)
-    Button(buttonFrame, text="LIQUIDATED BANKS", width = 15, command=liquidInstitutions).grid(row=7, column = 7, sticky = W)
+    buttons.append(Button(buttonFrame, text="LIQUIDATED BANKS", width = 15, command=liquidInstitutions))
+    buttons[-1].grid(row=7, column = 7, sticky = W)
 
     #-----Combination Banks-----#
     #Label(window, text= "See Liquidated Banks:", bg="white", fg = "black", font="none 12 bold").grid(row=6,  column=6, sticky=W)
-    Button(buttonFrame, text="COMBINED BANKS", width = 15, command=combInstitutions).grid(row=7, column = 9, sticky = W)
+    buttons.append(Button(buttonFrame, text="COMBINED BANKS", width = 15, command=combInstitutions))
+    buttons[-1].grid(row=7, column = 9, sticky = W)
 
     
     #-------Download Data Button---------#
-    Button(graphFrame, text="DOWNLOAD DATA", width = 15, command =download).grid(row=10, column = 6, columnspan=4,sticky = EW, padx=5, pady=5)
+    downloadButton = Button(graphFrame, text="DOWNLOAD DATA", width = 15, command =download)
+    buttons.append(downloadButton)
+    downloadButton.grid(row=10, column = 6, columnspan=4,sticky = EW, padx=5, pady=5)
+
+    #-------Background Loading---------#
+    def DataLoaded(result):
+        data.update(result)
+        status.config(text='', fg="black")
+        for button in buttons:
+            button.config(state=NORMAL)
+    def LoadFailed(error):
+        status.config(text=f'Could not load the FDIC data: {error}', fg="red")
+    def LoadProgress(message):
+        status.config(text=message, fg="black")
+
+    if loader is not None:
+        for button in buttons:
+            button.config(state=DISABLED)
+        LoadProgress('Loading FDIC data...')
+        BackgroundLoader(window, loader, DataLoaded, LoadFailed, LoadProgress).Start()
 
     window.mainloop()
 
 def main(): 
-    #Read in the CSV files 
-    liquidations = pd.read_csv('data/Liquidations_10_21_2021.csv')
-    new_institutions = pd.read_csv("data/New_Institutions_10_21_2021.csv")
-    combinations = pd.read_csv('data/Business_Combinations_10_21_2021.csv')
-    failures = pd.read_csv('data/Business_Combinations_-_Failures_10_21_2021.csv')
+    from EventData import LoadData
+    from Instrumentation import DumpReport
+
+    #Show the window first; the CSV files are read and aggregated in the background by LoadData
     last_generated = ['test']
     
-    plot(liquidations, new_institutions, combinations, failures, last_generated)
-main()
\ No newline at end of file
+    plot(None, None, None, None, last_generated, loader=LoadData)
+
+    if os.environ.get('FDIC_PROFILE'):
+        DumpReport(os.environ['FDIC_PROFILE'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import os
+import numpy as np
+import pandas as pd
+from Schemas import DATA_DIR
+
+'''
+Developer Notes:
+Waterfall series of the number of institutions (data/data_outputs/WaterFall_Data_*.csv): each year
+starts from the FDIC structure total (TOTAL in cb_structure.csv, SAVINGS in si_structure.csv),
+adds new institutions, subtracts combinations, failures and liquidations (the yearly structure change
+columns, e.g. New_Char / UNASSIST / MERGERS / PAID_OFF) and closes on an adjustment so the next year
+starts at its structure total. The commercial series reproduces the notebook outputs; the savings
+split of those outputs was counted from the event extracts, so only its totals agree with si_structure.
+The yearly changes are held as one array (years x components) with prefix sums of the yearly
+net change, so the level at any year is one lookup and any (start, end) range is a slice.
+Refresh compares new structure columns with the held ones and only recomputes the tail
+from the first year that changed (appending a year also redoes the year before it, whose
+adjustment depends on the new year's total).
+'''
+
+NATIONAL = 'United States & Other Areas'
+
+# Segment -> Class Types Counted (and the CSV suffix of the notebook outputs)
+SEGMENTS = {'All': ['Commercial', 'Savings'],
+            'Commercial': ['Commercial'],
+            'SavingsIns': ['Savings']}
+
+# Structure Table of Each Class Type and Its Year Total Column
+STRUCTURE_TOTALS = {'Commercial': ('cb_structure.csv', 'TOTAL'),
+                    'Savings': ('si_structure.csv', 'SAVINGS')}
+
+# Waterfall Components: (category, structure change columns of each class type, sign, text)
+COMPONENTS = [('New Institutions', {'Commercial': ['New_Char'], 'Savings': ['newcount']}, 1,
+               'New Institutions'),
+              ('Combinations', {'Commercial': ['UNASSIST'], 'Savings': ['combos', 'tomerg']}, -1,
+               'Combinations'),
+              ('Failures', {'Commercial': ['MERGERS'], 'Savings': ['comboass']}, -1,
+               'Combinations of Failed Bank'),
+              ('Liquidations', {'Commercial': ['PAID_OFF'], 'Savings': ['tofail']}, -1, 'Liquidations')]
+ADJUSTMENT = ('Adjustments', 'All Other Adjustments')
+WATERFALL_COLUMNS = ['Category', 'Value', 'Measure Type', 'Text']
+
+
+def LoadStructure(data_dir=DATA_DIR):
+    """
+    Function returns the structure year totals and changes as a frame indexed by (STNAME, YEAR).
+
+    Columns are (class type, 'Total' or component category).
+    """
+
+    frames = []
+    for class_type, (file, total_col) in STRUCTURE_TOTALS.items():
+        columns = {name: cols[class_type] for name, cols, _, _ in COMPONENTS}
+        usecols = ['STNAME', 'YEAR', total_col] + [col for cols in columns.values() for col in cols]
+        df = pd.read_csv(os.path.join(data_dir, file), encoding='utf-8-sig', usecols=usecols)
+        df = df.set_index(['STNAME', 'YEAR'])
+
+        # Components Spread Over Several Columns Are Summed
+        frame = pd.DataFrame({'Total': df[total_col]})
+        for name, cols in columns.items():
+            frame[name] = df[cols].sum(axis=1, min_count=len(cols))
+        frame.columns = pd.MultiIndex.from_product([[class_type], frame.columns])
+        frames.append(frame)
+
+    return pd.concat(frames, axis=1).sort_index()
+
+
+class Waterfall:
+    """
+    Waterfall engine for one segment (see SEGMENTS) and state (None = national structure rows).
+
+    A state is looked up under its STNAME in the structure tables.
+
+    changes has one row per year and one column per component plus the adjustment;
+    cumulative[i] is the level at the start of years[i] (cumulative[-1] the level after the last year).
+    """
+
+    def __init__(self, structure, segment='All', state=None):
+        self.class_types = SEGMENTS[segment]
+        self.state = state
+        self.years = np.zeros(0, dtype=np.int64)
+        self.inputs = np.zeros((0, len(COMPONENTS) + 1), dtype=np.int64)
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.changes = np.zeros((0, len(COMPONENTS) + 1), dtype=np.int64)
+        self.cumulative = np.zeros(1, dtype=np.int64)
+        self.Refresh(structure)
+
+    def _Inputs(self, structure):
+        # Year Totals of the Segment (years that also have the next year's total)
+        stname = NATIONAL if self.state is None else self.state
+        if stname not in structure.index.get_level_values('STNAME'):
+            raise KeyError(f'No structure totals for {stname}')
+        rows = sum(structure.loc[stname, class_type] for class_type in self.class_types)
+        rows = rows.dropna(subset=['Total'])
+        years = rows.index.to_numpy(dtype=np.int64)
+        years = years[np.isin(years + 1, years)]
+        if not len(years):
+            return years, np.zeros((0, len(COMPONENTS) + 1), dtype=np.int64), years
+
+        # Inputs per Year: Start Total and the Structure Changes of Each Component
+        names = ['Total'] + [name for name, _, _, _ in COMPONENTS]
+        inputs = rows.loc[years, names].fillna(0).to_numpy(dtype=np.int64)
+        totals = rows['Total']
+
+        # Each Year Closes on the Next Year's Total
+        return years, inputs, totals.loc[years + 1].to_numpy(dtype=np.int64)
+
+    def Refresh(self, structure):
+        """
+        Function updates the engine with new structure totals / changes.
+
+        Only the years from the first changed input onwards are recomputed.
+        Returns the first recomputed year (None when nothing changed).
+        """
+
+        years, inputs, ends = self._Inputs(structure)
+
+        # First Year Whose Inputs (or closing total) Differ From the Held Ones
+        n = min(len(years), len(self.years))
+        same = np.zeros(len(years), dtype=bool)
+        same[:n] = ((years[:n] == self.years[:n]) & (ends[:n] == self.ends[:n])
+                    & (inputs[:n] == self.inputs[:n]).all(axis=1))
+        first = len(years) if same.all() else int(np.argmin(same))
+        if first == len(years) and len(years) == len(self.years):
+            return None
+
+        # Recompute the Tail: Signed Components, Adjustment Closing on the Next Year's Total
+        signs = np.array([sign for _, _, sign, _ in COMPONENTS], dtype=np.int64)
+        tail = inputs[first:]
+        changes = np.empty_like(tail)
+        changes[:, :-1] = tail[:, 1:] * signs
+        changes[:, -1] = ends[first:] - tail[:, 0] - changes[:, :-1].sum(axis=1)
+
+        # Prefix Sums of the Net Change From the Tail Onwards
+        base = inputs[0, 0] if first == 0 else self.cumulative[first]
+        cumulative = np.concatenate([self.cumulative[:first],
+                                     base + np.concatenate([[0], np.cumsum(changes.sum(axis=1))])])
+
+        self.years, self.inputs, self.ends = years, inputs, ends
+        self.changes = np.concatenate([self.changes[:first], changes])
+        self.cumulative = cumulative
+
+        return int(years[first]) if first < len(years) else None
+
+    def Level(self, year):
+        """
+        Function returns the number of institutions at the start of a year.
+        """
+
+        return int(self.cumulative[np.searchsorted(self.years, year)])
+
+    def Frame(self, start_year=None, end_year=None):
+        """
+        Function returns the waterfall rows (Category, Value, Measure Type, Text) for a year range.
+        """
+
+        start_year = int(self.years[0]) if start_year is None else int(start_year)
+        end_year = int(self.years[-1]) if end_year is None else int(end_year)
+        first, last = np.searchsorted(self.years, [start_year, end_year + 1])
+        if first >= last:
+            raise ValueError(f'No waterfall data for {start_year}-{end_year}')
+
+        # Each Year: Its Component Rows Then the Next Year's Total
+        names = [name for name, _, _, _ in COMPONENTS] + [ADJUSTMENT[0], 'Total']
+        texts = [text for _, _, _, text in COMPONENTS] + [ADJUSTMENT[1], 'Year Start']
+        years = self.years[first:last]
+        block = np.concatenate([self.changes[first:last], np.zeros((len(years), 1), dtype=np.int64)], axis=1)
+        label_years = np.repeat(years[:, None], len(names), axis=1)
+        label_years[:, -1] += 1
+
+        df = pd.DataFrame({'Category': [f'{year} {name}' for year, name in
+                                        zip(label_years.ravel(), np.tile(names, len(years)))],
+                           'Value': block.ravel(),
+                           'Measure Type': np.tile(['relative'] * (len(names) - 1) + ['total'], len(years)),
+                           'Text': np.tile(texts, len(years))})
+        start = pd.DataFrame([[f'{start_year} Total', int(self.cumulative[first]), 'absolute', 'Year Start']],
+                             columns=WATERFALL_COLUMNS)
+
+        return pd.concat([start, df], ignore_index=True)
+
+
+def WriteWaterfalls(output_dir, start_year=2000, end_year=2019, data_dir=DATA_DIR, state=None):
+    """
+    Function writes WaterFall_Data_<segment>.csv for every segment to output_dir and returns the paths.
+
+    output_dir has no default so the notebook outputs in data/data_outputs are only replaced on purpose.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    structure = LoadStructure(data_dir)
+
+    paths = []
+    for segment in SEGMENTS:
+        path = os.path.join(output_dir, f'WaterFall_Data_{segment}.csv')
+        Waterfall(structure, segment, state).Frame(start_year, end_year).to_csv(path)
+        paths.append(path)
+
+    return paths
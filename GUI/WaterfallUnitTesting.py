@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from Waterfall import COMPONENTS, NATIONAL, SEGMENTS, Waterfall, WATERFALL_COLUMNS, LoadStructure, WriteWaterfalls
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+class Waterfall_Test(unittest.TestCase):
+    def setUp(self):
+        self.structure = self.Structure(range(2000, 2021), np.random.default_rng(3))
+
+    def Structure(self, years, rng):
+        index = pd.MultiIndex.from_product([[NATIONAL, 'GA'], list(years)], names=['STNAME', 'YEAR'])
+        columns = pd.MultiIndex.from_product([['Commercial', 'Savings'],
+                                              ['Total'] + [name for name, _, _, _ in COMPONENTS]])
+        df = pd.DataFrame(rng.integers(0, 300, (len(index), len(columns))), index=index, columns=columns)
+        df[('Commercial', 'Total')] = rng.integers(5000, 9000, len(index))
+        df[('Savings', 'Total')] = rng.integers(1000, 2000, len(index))
+        return df
+
+    def test_frame_matches_structure(self):
+        waterfall = Waterfall(self.structure, 'All')
+        frame = waterfall.Frame(2003, 2010)
+        self.assertEqual(list(frame.columns), WATERFALL_COLUMNS)
+        self.assertEqual(len(frame), 1 + 8 * 6)
+        national = self.structure.loc[NATIONAL]
+        totals = national[('Commercial', 'Total')] + national[('Savings', 'Total')]
+        self.assertEqual(frame.loc[0].tolist(), ['2003 Total', int(totals[2003]), 'absolute', 'Year Start'])
+
+        # Components Come From the Structure Changes and Every Year Closes on the Next Total
+        failures = frame.loc[frame['Category'] == '2005 Failures', 'Value'].item()
+        self.assertEqual(failures, -int(national.loc[2005, ('Commercial', 'Failures')] +
+                                        national.loc[2005, ('Savings', 'Failures')]))
+        for year in range(2003, 2011):
+            changes = frame.loc[frame['Category'].str.startswith(f'{year} ') & (frame['Measure Type'] == 'relative')]
+            self.assertEqual(totals[year] + changes['Value'].sum(), totals[year + 1])
+            self.assertEqual(waterfall.Level(year + 1), totals[year + 1])
+
+        # Segments and States Select Class Types and Structure Rows
+        savings = Waterfall(self.structure, 'SavingsIns', state='GA').Frame(2010, 2010)
+        self.assertEqual(savings.loc[0, 'Value'], self.structure.loc[('GA', 2010), ('Savings', 'Total')])
+        self.assertEqual(savings.loc[savings['Category'] == '2010 New Institutions', 'Value'].item(),
+                         self.structure.loc[('GA', 2010), ('Savings', 'New Institutions')])
+        with self.assertRaises(KeyError):
+            Waterfall(self.structure, state='TX')
+
+    def test_reproduces_notebook_outputs(self):
+        structure = LoadStructure(DATA_DIR)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = WriteWaterfalls(tmp, 2000, 2019, DATA_DIR)
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             [f'WaterFall_Data_{segment}.csv' for segment in SEGMENTS])
+            written = pd.read_csv(paths[1], index_col=0)
+
+        # Commercial Banks: Every Row of the Shipped Series
+        shipped = pd.read_csv(os.path.join(DATA_DIR, 'data_outputs', 'WaterFall_Data_Commercial.csv'), index_col=0)
+        pd.testing.assert_frame_equal(written, shipped)
+
+        # Savings Institutions Split Their Changes From the Event Extracts; Totals and Net Changes Agree
+        for segment in ['SavingsIns', 'All']:
+            frame = Waterfall(structure, segment).Frame(2000, 2019)
+            shipped = pd.read_csv(os.path.join(DATA_DIR, 'data_outputs', f'WaterFall_Data_{segment}.csv'),
+                                  index_col=0)
+            pd.testing.assert_frame_equal(frame.drop(columns='Value'), shipped.drop(columns='Value'))
+            relative = shipped['Measure Type'] == 'relative'
+            self.assertEqual(frame.loc[~relative, 'Value'].tolist(), shipped.loc[~relative, 'Value'].tolist())
+            net = [frame.loc[relative, 'Value'], shipped.loc[relative, 'Value']]
+            self.assertEqual(*[values.groupby(shipped['Category'].str[:4]).sum().tolist() for values in net])
+
+    def test_refresh_recomputes_tail(self):
+        waterfall = Waterfall(self.structure, 'Commercial')
+        self.assertIsNone(waterfall.Refresh(self.structure))
+        head = waterfall.changes[:10].copy()
+
+        # Appending a Year Redoes the Previous Year's Adjustment Only
+        longer = pd.concat([self.structure, self.Structure([2021], np.random.default_rng(4))]).sort_index()
+        self.assertEqual(waterfall.Refresh(longer), 2020)
+        np.testing.assert_array_equal(waterfall.changes[:10], head)
+        fresh = Waterfall(longer, 'Commercial')
+        np.testing.assert_array_equal(waterfall.changes, fresh.changes)
+        np.testing.assert_array_equal(waterfall.cumulative, fresh.cumulative)
+
+        # A Revised Total Redoes the Year Before It Onwards, a Revised Change Its Own Year
+        revised = longer.copy()
+        revised.loc[(NATIONAL, 2012), ('Commercial', 'Total')] += 25
+        self.assertEqual(waterfall.Refresh(revised), 2011)
+        pd.testing.assert_frame_equal(waterfall.Frame(), Waterfall(revised, 'Commercial').Frame())
+        revised.loc[(NATIONAL, 2015), ('Commercial', 'Combinations')] += 3
+        self.assertEqual(waterfall.Refresh(revised), 2015)
+        pd.testing.assert_frame_equal(waterfall.Frame(), Waterfall(revised, 'Commercial').Frame())
+
+if __name__ == '__main__':
+    unittest.main()
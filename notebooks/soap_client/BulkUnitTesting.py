@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from ffipy import FFIEC_Client, ResponseCache
+from ffipy.bulk import facsimile_path
+from MockFFIECServer import MockFFIECServer, sdf_facsimile
+
+class Bulk_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.out_dir = os.path.join(self.temp_dir, 'facsimiles')
+        self.server.calls.clear()
+        self.server.fail.clear()
+        self.server.unavailable.clear()
+        cache = ResponseCache(os.path.join(self.temp_dir, 'cache'))
+        self.client = FFIEC_Client(wsse=('user', 'token'), store_login=False, cache=cache,
+                                   wsdl=self.server.wsdl_url)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_retries_and_resume(self):
+        filings = [(fiID, '12/31/2009') for fiID in range(12)]
+        self.server.fail['RetrieveFacsimile'] = 3
+        self.server.unavailable['RetrieveFacsimile'] = 2
+        progress = []
+        summary = self.client.retrieve_facsimiles(filings, self.out_dir, workers=4, backoff=0.01,
+                                                  progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(len(summary['downloaded']), 12)
+        self.assertEqual(summary['failed'], {})
+        self.assertEqual(progress[-1], (12, 12))
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 12 + 3 + 2)
+        for fiID, period in filings:
+            with open(facsimile_path(self.out_dir, 'Call', 'ID_RSSD', fiID, period, 'SDF'), 'rb') as f:
+                self.assertEqual(f.read(), sdf_facsimile(fiID, period))
+        self.assertFalse([name for name in os.listdir(self.out_dir) if name.endswith('.part')])
+
+        # A Rerun Only Fetches What Is Missing
+        for fiID in (3, 7):
+            os.remove(facsimile_path(self.out_dir, 'Call', 'ID_RSSD', fiID, '12/31/2009', 'SDF'))
+        self.server.calls.clear()
+        summary = self.client.retrieve_facsimiles(filings, self.out_dir, workers=4)
+        self.assertEqual(len(summary['downloaded']), 2)
+        self.assertEqual(len(summary['skipped']), 10)
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+
+    def test_rate_limit(self):
+        filings = [(fiID, '3/31/2010') for fiID in range(10)]
+        start = time.monotonic()
+        summary = self.client.retrieve_facsimiles(filings, self.out_dir, workers=8, rate=20)
+        self.assertEqual(len(summary['downloaded']), 10)
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+    def test_permanent_failure(self):
+        self.server.fail['RetrieveFacsimile'] = 5
+        summary = self.client.retrieve_facsimiles([(1, '6/30/2010')], self.out_dir, retries=1, backoff=0.01)
+        self.assertEqual(summary['downloaded'], [])
+        self.assertIn((1, '6/30/2010'), summary['failed'])
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+        self.assertEqual(os.listdir(self.out_dir), [])
+
+    def test_malformed_period_fails_alone(self):
+        filings = [(1, '6/30/2010'), (2, '2010-06-30'), (3, None), (4, '9/30/2010')]
+        summary = self.client.retrieve_facsimiles(filings, self.out_dir, workers=2)
+        self.assertEqual(len(summary['downloaded']), 2)
+        self.assertEqual(sorted(summary['failed']), [(2, '2010-06-30'), (3, None)])
+        self.assertIn("mm/dd/yyyy", summary['failed'][(2, '2010-06-30')])
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
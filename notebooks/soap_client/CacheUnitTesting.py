@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from ffipy import CacheMiss, FFIEC_Client, ResponseCache
+from MockFFIECServer import MockFFIECServer
+
+class ResponseCache_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server.calls.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def Client(self, **kwargs):
+        cache = ResponseCache(self.cache_dir, **kwargs)
+        return FFIEC_Client(wsse=('user', 'token'), store_login=False, cache=cache, wsdl=self.server.wsdl_url)
+
+    def test_repeat_calls_hit_the_cache(self):
+        client = self.Client()
+        first = client.retrieve_panel_of_reporters(ds_name='Call', reporting_pd_end='12/31/2009')
+        facsimile = client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF')
+
+        # A New Client (e.g. a notebook re-run) Reads the Same Cache
+        client = self.Client()
+        self.assertEqual(len(client.retrieve_panel_of_reporters(ds_name='Call', reporting_pd_end='12/31/2009')),
+                         len(first))
+        self.assertEqual(client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF'),
+                         facsimile)
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 1)
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 1)
+
+        # Any Key Field Changing Is a Different Request
+        client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='PDF')
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+
+    def test_ttl_for_mutable_endpoints(self):
+        client = self.Client(ttl={'retrieve_filers_since_date': 0.2})
+        for _ in range(2):
+            client.retrieve_filers_since_date(reporting_pd_end='12/31/2009', last_update_date='1/1/2010')
+            client.retrieve_reporting_periods()
+        self.assertEqual(self.server.calls['RetrieveFilersSinceDate'], 1)
+
+        time.sleep(0.3)
+        client.retrieve_filers_since_date(reporting_pd_end='12/31/2009', last_update_date='1/1/2010')
+        client.retrieve_reporting_periods()
+        self.assertEqual(self.server.calls['RetrieveFilersSinceDate'], 2)
+        self.assertEqual(self.server.calls['RetrieveReportingPeriods'], 1)
+
+    def test_facsimiles_and_panels_expire_by_default(self):
+        client = self.Client()
+        client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF')
+        client.retrieve_panel_of_reporters(reporting_pd_end='12/31/2009')
+
+        # A Day Later (e.g. an amended filing) They Are Fetched Again
+        client.cache._db.execute('UPDATE entries SET created = created - ?', (2 * 24 * 3600,))
+        client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF')
+        client.retrieve_panel_of_reporters(reporting_pd_end='12/31/2009')
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 2)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=2500)
+        for n in range(3):
+            cache.put(cache.key('m', n=n), 'm', bytes([n]) * 1000)
+        cache.get(cache.key('m', n=1))
+        cache.put(cache.key('m', n=3), 'm', b'x' * 1000)
+
+        self.assertFalse(cache.get(cache.key('m', n=0))[0])
+        self.assertFalse(cache.get(cache.key('m', n=2))[0])
+        self.assertTrue(cache.get(cache.key('m', n=1))[0])
+        self.assertLessEqual(cache.size(), 2500)
+        blobs = [name for _, _, names in os.walk(os.path.join(self.cache_dir, 'objects')) for name in names]
+        self.assertEqual(len(blobs), 2)
+
+    def test_offline_mode(self):
+        self.Client().retrieve_reporting_periods()
+        calls = sum(self.server.calls.values())
+
+        client = FFIEC_Client(wsse=('user', 'token'), cache=ResponseCache(self.cache_dir), offline=True,
+                              wsdl=self.server.wsdl_url)
+        self.assertEqual(len(client.retrieve_reporting_periods()), 84)
+        with self.assertRaises(CacheMiss):
+            client.retrieve_panel_of_reporters(reporting_pd_end='12/31/2005')
+        self.assertEqual(sum(self.server.calls.values()), calls)
+
+if __name__ == '__main__':
+    unittest.main()
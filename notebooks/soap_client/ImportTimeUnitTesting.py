@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SOAP_CLIENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import budget of ffipy (zeep, lxml and numpy load on first use)
+BUDGET_SECONDS = 0.05
+HEAVY_MODULES = ['zeep', 'lxml', 'requests', 'numpy', 'sqlite3']
+
+
+def import_seconds(module, repeats=3):
+    """Returns the best cumulative import time of `module` in a fresh interpreter."""
+    best = float('inf')
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                                cwd=SOAP_CLIENT_DIR, capture_output=True, text=True, check=True)
+        line = [line for line in result.stderr.splitlines()
+                if line.split('|')[-1].strip() == module][-1]
+        best = min(best, int(line.split('|')[1]) / 1e6)
+    return best
+
+class ImportTime_Test(unittest.TestCase):
+    def test_ffipy_imports_lazily(self):
+        code = ('import sys, ffipy; print(",".join(m for m in %r if m in sys.modules)); '
+                'ffipy.FFIEC_Client; print("zeep" in sys.modules)' % HEAVY_MODULES)
+        result = subprocess.run([sys.executable, '-c', code], cwd=SOAP_CLIENT_DIR,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.splitlines(), ['', 'True'])
+
+    def test_ffipy_import_budget(self):
+        self.assertLess(import_seconds('ffipy'), BUDGET_SECONDS)
+        self.assertLess(import_seconds('ffipy.metrics'), BUDGET_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+import zeep
+from ffipy import FFIEC_Client, ResponseCache, metrics
+from MockFFIECServer import MockFFIECServer
+
+class Metrics_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server.fail.clear()
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.enable(True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_histogram(self):
+        histogram = metrics.Histogram(buckets=(0.1, 1))
+        for value in [0.05, 0.1, 0.5, 2]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(1), 2)
+        self.assertAlmostEqual(histogram.total, 2.65)
+
+    def test_soap_calls_and_cache_are_recorded(self):
+        client = FFIEC_Client(wsse=('user', 'token'), store_login=False, check_login=False,
+                              cache=ResponseCache(self.cache_dir), wsdl=self.server.wsdl_url)
+        for _ in range(3):
+            client.retrieve_panel_of_reporters(reporting_pd_end='12/31/2009')
+        client.stream_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt='SDF')
+        self.server.fail['RetrieveReportingPeriods'] = 1
+        with self.assertRaises(zeep.exceptions.Fault):
+            client.retrieve_reporting_periods()
+
+        # One Round Trip per Operation (the repeats are cache hits), Faults Counted
+        snapshot = metrics.snapshot()
+        self.assertEqual({name: h['count'] for name, h in snapshot['histograms'].items()},
+                         {'RetrievePanelOfReporters': 1, 'RetrieveFacsimile': 1, 'RetrieveReportingPeriods': 1})
+        self.assertEqual(snapshot['counters']['cache.hits'], 2)
+        self.assertEqual(snapshot['counters']['cache.misses'], 2)
+        self.assertEqual(snapshot['counters']['soap.errors.RetrieveReportingPeriods'], 1)
+        self.assertGreater(snapshot['counters']['soap.bytes_received'], 0)
+        self.assertIn('RetrievePanelOfReporters', metrics.report())
+
+        # Switched Off, Nothing Is Recorded
+        metrics.enable(False)
+        client.retrieve_reporting_periods()
+        self.assertEqual(metrics.snapshot(), snapshot)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,315 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: a local stand-in for the FFIEC RetrievalService SOAP server
+# Usage: used by the *UnitTesting.py files next to it so that FFIEC_Client can
+#   be tested without network access or FFIEC credentials, e.g.
+#       server = MockFFIECServer().start()
+#       client = FFIEC_Client(wsse=('user', 'token'), wsdl=server.wsdl_url)
+#       ...
+#       server.stop()
+# ------------------------------------------------------------------------------
+
+import base64
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+NS = 'http://cdr.ffiec.gov/public/services'
+SOAP_ENV = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+WSDL = '''<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:s="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="{ns}" targetNamespace="{ns}">
+  <wsdl:types>
+    <s:schema elementFormDefault="qualified" targetNamespace="{ns}">
+      <s:simpleType name="ReportingDataSeriesName">
+        <s:restriction base="s:string"><s:enumeration value="Call"/></s:restriction>
+      </s:simpleType>
+      <s:simpleType name="FinancialInstitutionIDType">
+        <s:restriction base="s:string">
+          <s:enumeration value="ID_RSSD"/><s:enumeration value="FDICCertNumber"/>
+          <s:enumeration value="OCCChartNumber"/><s:enumeration value="OTSDockNumber"/>
+        </s:restriction>
+      </s:simpleType>
+      <s:simpleType name="FacsimileFormat">
+        <s:restriction base="s:string">
+          <s:enumeration value="PDF"/><s:enumeration value="XBRL"/><s:enumeration value="SDF"/>
+        </s:restriction>
+      </s:simpleType>
+      <s:complexType name="ArrayOfInt">
+        <s:sequence><s:element minOccurs="0" maxOccurs="unbounded" name="int" type="s:int"/></s:sequence>
+      </s:complexType>
+      <s:complexType name="ArrayOfString">
+        <s:sequence><s:element minOccurs="0" maxOccurs="unbounded" name="string" type="s:string"/></s:sequence>
+      </s:complexType>
+      <s:complexType name="RetrieveFilersDateTime">
+        <s:sequence>
+          <s:element minOccurs="1" maxOccurs="1" name="ID_RSSD" type="s:int"/>
+          <s:element minOccurs="0" maxOccurs="1" name="DateTime" type="s:string"/>
+        </s:sequence>
+      </s:complexType>
+      <s:complexType name="ArrayOfRetrieveFilersDateTime">
+        <s:sequence><s:element minOccurs="0" maxOccurs="unbounded" name="RetrieveFilersDateTime"
+            type="tns:RetrieveFilersDateTime"/></s:sequence>
+      </s:complexType>
+      <s:complexType name="ReportingFinancialInstitution">
+        <s:sequence>
+          <s:element minOccurs="1" maxOccurs="1" name="ID_RSSD" type="s:int"/>
+          <s:element minOccurs="1" maxOccurs="1" name="FDICCertNumber" type="s:int"/>
+          <s:element minOccurs="1" maxOccurs="1" name="OCCChartNumber" type="s:int"/>
+          <s:element minOccurs="1" maxOccurs="1" name="OTSDockNumber" type="s:int"/>
+          <s:element minOccurs="1" maxOccurs="1" name="PrimaryABARoutNumber" type="s:int"/>
+          <s:element minOccurs="0" maxOccurs="1" name="Name" type="s:string"/>
+          <s:element minOccurs="0" maxOccurs="1" name="State" type="s:string"/>
+          <s:element minOccurs="0" maxOccurs="1" name="City" type="s:string"/>
+          <s:element minOccurs="0" maxOccurs="1" name="Address" type="s:string"/>
+          <s:element minOccurs="1" maxOccurs="1" name="ZIP" type="s:int"/>
+          <s:element minOccurs="0" maxOccurs="1" name="FilingType" type="s:string"/>
+          <s:element minOccurs="1" maxOccurs="1" name="HasFiledForReportingPeriod" type="s:boolean"/>
+        </s:sequence>
+      </s:complexType>
+      <s:complexType name="ArrayOfReportingFinancialInstitution">
+        <s:sequence><s:element minOccurs="0" maxOccurs="unbounded" name="ReportingFinancialInstitution"
+            type="tns:ReportingFinancialInstitution"/></s:sequence>
+      </s:complexType>
+{elements}
+    </s:schema>
+  </wsdl:types>
+{messages}
+  <wsdl:portType name="RetrievalServiceSoap">
+{port_operations}
+  </wsdl:portType>
+  <wsdl:binding name="RetrievalServiceSoap" type="tns:RetrievalServiceSoap">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>
+{binding_operations}
+  </wsdl:binding>
+  <wsdl:service name="RetrievalService">
+    <wsdl:port name="RetrievalServiceSoap" binding="tns:RetrievalServiceSoap">
+      <soap:address location="{location}"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+'''
+
+# Operation -> (request parameters, result type)
+OPERATIONS = {
+    'RetrieveFacsimile': ([('dataSeries', 'tns:ReportingDataSeriesName'),
+                           ('reportingPeriodEndDate', 's:string'),
+                           ('fiIDType', 'tns:FinancialInstitutionIDType'), ('fiID', 's:int'),
+                           ('facsimileFormat', 'tns:FacsimileFormat')], 's:base64Binary'),
+    'RetrieveFilersSinceDate': ([('dataSeries', 'tns:ReportingDataSeriesName'),
+                                 ('reportingPeriodEndDate', 's:string'),
+                                 ('lastUpdateDateTime', 's:string')], 'tns:ArrayOfInt'),
+    'RetrieveFilersSubmissionDateTime': ([('dataSeries', 'tns:ReportingDataSeriesName'),
+                                          ('reportingPeriodEndDate', 's:string'),
+                                          ('lastUpdateDateTime', 's:string')],
+                                         'tns:ArrayOfRetrieveFilersDateTime'),
+    'RetrievePanelOfReporters': ([('dataSeries', 'tns:ReportingDataSeriesName'),
+                                  ('reportingPeriodEndDate', 's:string')],
+                                 'tns:ArrayOfReportingFinancialInstitution'),
+    'RetrieveReportingPeriods': ([('dataSeries', 'tns:ReportingDataSeriesName')], 'tns:ArrayOfString'),
+    'RetrieveUBPRReportingPeriods': ([], 'tns:ArrayOfString'),
+    'RetrieveUBPRXBRLFacsimile': ([('reportingPeriodEndDate', 's:string'),
+                                   ('fiIDType', 'tns:FinancialInstitutionIDType'), ('fiID', 's:int')],
+                                  's:base64Binary'),
+    'TestUserAccess': ([], 's:boolean'),
+}
+
+
+def build_wsdl(location):
+    """Returns the WSDL of the stand-in service, with its endpoint at `location`."""
+    elements, messages, port_operations, binding_operations = [], [], [], []
+    for name, (params, result) in OPERATIONS.items():
+        fields = ''.join('<s:element minOccurs="1" maxOccurs="1" name="%s" type="%s"/>' % param
+                         for param in params)
+        elements.append('<s:element name="%s"><s:complexType><s:sequence>%s</s:sequence>'
+                        '</s:complexType></s:element>' % (name, fields))
+        elements.append('<s:element name="%sResponse"><s:complexType><s:sequence>'
+                        '<s:element minOccurs="0" maxOccurs="1" name="%sResult" type="%s"/>'
+                        '</s:sequence></s:complexType></s:element>' % (name, name, result))
+        messages.append('<wsdl:message name="%sSoapIn"><wsdl:part name="parameters" element="tns:%s"/>'
+                        '</wsdl:message>' % (name, name))
+        messages.append('<wsdl:message name="%sSoapOut"><wsdl:part name="parameters" '
+                        'element="tns:%sResponse"/></wsdl:message>' % (name, name))
+        port_operations.append('<wsdl:operation name="%s"><wsdl:input message="tns:%sSoapIn"/>'
+                               '<wsdl:output message="tns:%sSoapOut"/></wsdl:operation>'
+                               % (name, name, name))
+        binding_operations.append('<wsdl:operation name="%s"><soap:operation soapAction="%s/%s" '
+                                  'style="document"/><wsdl:input><soap:body use="literal"/></wsdl:input>'
+                                  '<wsdl:output><soap:body use="literal"/></wsdl:output></wsdl:operation>'
+                                  % (name, NS, name))
+    return WSDL.format(ns=NS, location=location, elements='\n'.join(elements),
+                       messages='\n'.join(messages), port_operations='\n'.join(port_operations),
+                       binding_operations='\n'.join(binding_operations))
+
+
+def sdf_facsimile(fiID, reporting_pd_end, n_items=20):
+    """Returns a small SDF (semicolon separated) Call report like the real service's."""
+    month, day, year = (int(part) for part in reporting_pd_end.split('/'))
+    call_date = '%04d%02d%02d' % (year, month, day)
+    lines = ['"Call Date";"Bank RSSD Identifier";"MDRM #";"Value";"Last Update";'
+             '"Short Definition";"Call Schedule";"Line Number"']
+    for item in range(n_items):
+        mdrm = 'RCON%04d' % (2170 if item == 0 else 10 + item)
+        value = '' if item % 7 == 3 else str((fiID * 31 + item * 17 + year) % 100000)
+        lines.append('%s;%s;%s;%s;20050808;"Item %d";"RC";"%d"'
+                     % (call_date, fiID, mdrm, value, item, item))
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
+
+
+class MockFFIECServer:
+    """Threaded HTTP server answering the FFIEC RetrievalService operations.
+
+    Attributes:
+        `calls` is a `Counter` of operation name -> number of requests;
+        `fail` maps operation name -> number of upcoming requests to answer
+            with a SOAP Fault (e.g. to test retries);
+        `unavailable` maps operation name -> number of upcoming requests to
+            answer with a bare HTTP 503 (a transport error for zeep);
+        `filers` maps reporting period -> {ID_RSSD: submission datetime str};
+        `delay` is seconds to sleep before answering each request.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.calls = Counter()
+        self.fail = Counter()
+        self.unavailable = Counter()
+        self.delay = 0
+        self.filers = {}
+        self.wsdl_requests = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type='text/xml; charset=utf-8'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with server.lock:
+                    server.wsdl_requests += 1
+                self._send(200, build_wsdl(server.url).encode('utf-8'))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, answer = server.answer(body)
+                self._send(status, answer)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = 'http://%s:%d/RetrievalService.asmx' % self.httpd.server_address[:2]
+        self.wsdl_url = self.url + '?WSDL'
+        self.thread = None
+
+    def start(self):
+        """Starts serving on a background thread and returns the server."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def filers_since(self, reporting_pd_end, last_update_date):
+        """Returns {ID_RSSD: datetime str} of filers that filed on/after a date."""
+        month, day, year = (int(part) for part in last_update_date.split(' ')[0].split('/'))
+        since = (year, month, day)
+        filers = self.filers.get(reporting_pd_end, {})
+        result = {}
+        for rssd, stamp in filers.items():
+            m, d, y = (int(part) for part in stamp.split(' ')[0].split('/'))
+            if (y, m, d) >= since:
+                result[rssd] = stamp
+        return result
+
+    def answer(self, body):
+        """Returns (HTTP status, SOAP envelope bytes) for a SOAP request."""
+        request = ElementTree.fromstring(body).find('{%s}Body' % SOAP_ENV)[0]
+        operation = request.tag.split('}')[-1]
+        args = {child.tag.split('}')[-1]: child.text for child in request}
+        with self.lock:
+            self.calls[operation] += 1
+            failing = self.fail[operation] > 0
+            if failing:
+                self.fail[operation] -= 1
+            unavailable = not failing and self.unavailable[operation] > 0
+            if unavailable:
+                self.unavailable[operation] -= 1
+        if self.delay:
+            time.sleep(self.delay)
+        if unavailable:
+            return 503, b'Service Unavailable'
+        if failing:
+            return 500, self.envelope('<soap:Fault><faultcode>soap:Server</faultcode>'
+                                      '<faultstring>Server is busy</faultstring></soap:Fault>')
+
+        result = getattr(self, '_' + operation)(**args)
+        return 200, self.envelope('<%sResponse xmlns="%s"><%sResult>%s</%sResult></%sResponse>'
+                                  % (operation, NS, operation, result, operation, operation))
+
+    @staticmethod
+    def envelope(content):
+        return ('<?xml version="1.0" encoding="utf-8"?><soap:Envelope xmlns:soap="%s"><soap:Body>%s'
+                '</soap:Body></soap:Envelope>' % (SOAP_ENV, content)).encode('utf-8')
+
+    # Canned answers, one per operation
+    def _RetrieveFacsimile(self, dataSeries, reportingPeriodEndDate, fiIDType, fiID, facsimileFormat):
+        if facsimileFormat == 'SDF':
+            payload = sdf_facsimile(int(fiID), reportingPeriodEndDate)
+        else:
+            payload = ('%%%s %s %s %s\n' % (facsimileFormat, fiIDType, fiID, reportingPeriodEndDate)).encode()
+            payload += bytes(range(256)) * 8
+        return base64.b64encode(payload).decode('ascii')
+
+    def _RetrieveFilersSinceDate(self, dataSeries, reportingPeriodEndDate, lastUpdateDateTime):
+        filers = self.filers_since(reportingPeriodEndDate, lastUpdateDateTime)
+        return ''.join('<int>%d</int>' % rssd for rssd in filers)
+
+    def _RetrieveFilersSubmissionDateTime(self, dataSeries, reportingPeriodEndDate, lastUpdateDateTime):
+        filers = self.filers_since(reportingPeriodEndDate, lastUpdateDateTime)
+        return ''.join('<RetrieveFilersDateTime><ID_RSSD>%d</ID_RSSD><DateTime>%s</DateTime>'
+                       '</RetrieveFilersDateTime>' % (rssd, stamp) for rssd, stamp in filers.items())
+
+    def _RetrievePanelOfReporters(self, dataSeries, reportingPeriodEndDate):
+        year = int(reportingPeriodEndDate.split('/')[-1])
+        institutions = []
+        for rssd in range(1000, 1000 + year % 50 + 5):
+            institutions.append(
+                '<ReportingFinancialInstitution><ID_RSSD>%d</ID_RSSD><FDICCertNumber>%d</FDICCertNumber>'
+                '<OCCChartNumber>0</OCCChartNumber><OTSDockNumber>0</OTSDockNumber>'
+                '<PrimaryABARoutNumber>%d</PrimaryABARoutNumber><Name>%s</Name><State>VA</State>'
+                '<City>RICHMOND </City><Address>1 MAIN ST </Address><ZIP>23219</ZIP>'
+                '<FilingType>041</FilingType><HasFiledForReportingPeriod>true</HasFiledForReportingPeriod>'
+                '</ReportingFinancialInstitution>'
+                % (rssd, rssd + 50000, 51000000 + rssd, escape('BANK %d & TRUST ' % rssd)))
+        return ''.join(institutions)
+
+    def _RetrieveReportingPeriods(self, dataSeries):
+        return ''.join('<string>%s/%d</string>' % (end, year) for year in range(2021, 2000, -1)
+                       for end in ['12/31', '9/30', '6/30', '3/31'])
+
+    def _RetrieveUBPRReportingPeriods(self):
+        return ''.join('<string>12/31/%d</string>' % year for year in range(2021, 2000, -1))
+
+    def _RetrieveUBPRXBRLFacsimile(self, reportingPeriodEndDate, fiIDType, fiID):
+        payload = ('<?xml version="1.0"?><xbrl><context id="%s">%s</context>%s</xbrl>'
+                   % (fiID, reportingPeriodEndDate, '<item>1</item>' * 2000)).encode()
+        return base64.b64encode(payload).decode('ascii')
+
+    def _TestUserAccess(self):
+        return 'true'
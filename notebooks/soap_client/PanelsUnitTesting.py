@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from ffipy import FFIEC_Client, PanelStore, ResponseCache
+from ffipy.panels import PANEL_SCHEMA, normalize_panel, quarter_ends
+from MockFFIECServer import MockFFIECServer
+
+class Panels_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.temp_dir, 'panels')
+        self.server.calls.clear()
+        self.server.fail.clear()
+        cache = ResponseCache(os.path.join(self.temp_dir, 'cache'))
+        self.client = FFIEC_Client(wsse=('user', 'token'), store_login=False, cache=cache,
+                                   wsdl=self.server.wsdl_url)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_parallel_collection_is_typed_and_partitioned(self):
+        periods = quarter_ends(2008, 2009)
+        progress = []
+        summary = self.client.collect_panels(periods, self.store_dir, workers=3, backoff=0.01,
+                                             progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(summary['failed'], {})
+        self.assertEqual(summary['collected'], {period: int(period[-4:]) % 50 + 5 for period in periods})
+        self.assertEqual(progress[-1], (8, 8))
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 8)
+
+        # One Typed Table, Queried Without SOAP Calls
+        self.server.calls.clear()
+        store = PanelStore(self.store_dir)
+        self.assertEqual(store.periods()[0], 20080331)
+        panels = store.read(['12/31/2008', 20091231])
+        self.assertEqual(list(panels.dtypes.astype(str)), [str(pd.Series(dtype=dtype).dtype)
+                                                          for _, dtype in PANEL_SCHEMA])
+        self.assertEqual(len(panels), 13 + 14)
+        first = panels.iloc[0]
+        self.assertEqual((first['ID_RSSD'], first['FDICCertNumber'], first['Name'], first['ZIP']),
+                         (1000, 51000, 'BANK 1000 & TRUST', '23219'))
+        self.assertTrue(pd.isna(first['OCCChartNumber']))
+        self.assertEqual(list(panels['State'].cat.categories), ['VA'])
+        self.assertEqual(store.counts().loc['2009-06-30'], 14)
+        self.assertEqual(list(store.read(columns=['ID_RSSD', 'period']).columns), ['ID_RSSD', 'period'])
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 0)
+
+    def test_failures_are_reported_not_stored(self):
+        periods = ['12/31/2009', '12/31/2010', '12/31/2011']
+        self.server.fail['RetrievePanelOfReporters'] = 1
+        summary = self.client.collect_panels(periods, self.store_dir, workers=2, retries=0)
+
+        self.assertEqual(len(summary['collected']), 2)
+        [(failed, error)] = summary['failed'].items()
+        self.assertIn('Server is busy', error)
+        store = PanelStore(self.store_dir)
+        self.assertNotIn(failed, store)
+        self.assertEqual(list(store.failures()), [int(failed[-4:]) * 10000 + 1231])
+        self.assertEqual(len(store.counts()), 2)
+
+        # A Rerun Only Fetches the Failed Period and Clears Its Failure
+        self.server.calls.clear()
+        summary = self.client.collect_panels(periods, self.store_dir, workers=2, retries=0)
+        self.assertEqual((list(summary['collected']), len(summary['skipped'])), ([failed], 2))
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 1)
+        self.assertEqual(store.failures(), {})
+
+    def test_refresh_in_process_skips_the_cache(self):
+        for _ in range(2):
+            summary = self.client.collect_panels(['12/31/2009'], self.store_dir, workers=1, refresh=True)
+            self.assertEqual(list(summary['collected']), ['12/31/2009'])
+        self.assertEqual(self.server.calls['RetrievePanelOfReporters'], 2)
+
+    def test_zip_codes_are_normalized_as_text(self):
+        row = {name: None for name, _ in PANEL_SCHEMA[1:]}
+        zips = ['12345-6789', ' 2138', 2138, 123456789, 'N/A', '', None, 0]
+        results = [dict(row, ID_RSSD=i, ZIP=zip_code) for i, zip_code in enumerate(zips)]
+        panel = normalize_panel(results, '12/31/2009')
+        self.assertEqual(panel['ZIP'].tolist(), ['12345', '02138', '02138', '12345'] + [pd.NA] * 4)
+        self.assertEqual(str(panel['ZIP'].dtype), 'string')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+import numpy as np
+import pandas as pd
+from ffipy import CallReportStore, parse_sdf
+from MockFFIECServer import sdf_facsimile
+
+class SDF_Test(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def test_parse_matches_read_csv(self):
+        facsimile = sdf_facsimile(64150, '12/31/2009')
+        columns = parse_sdf(facsimile)
+        report_df = pd.read_csv(StringIO(str(facsimile, 'utf-8')), sep=';')
+        self.assertEqual(columns['rssd'].tolist(), report_df['Bank RSSD Identifier'].tolist())
+        self.assertEqual([mdrm.decode() for mdrm in columns['mdrm']], report_df['MDRM #'].tolist())
+        np.testing.assert_array_equal(columns['value'], report_df['Value'].to_numpy(dtype=float))
+        self.assertTrue(np.isnan(columns['value']).any())
+        self.assertEqual(set(columns['date'].tolist()), {20091231})
+
+    def test_cross_bank_item_query(self):
+        with CallReportStore(self.store_dir, flush_rows=50) as store:
+            for period in ['9/30/2009', '12/31/2009']:
+                for rssd in range(1000, 1010):
+                    store.append_sdf(sdf_facsimile(rssd, period))
+
+            # An Amended Report Is Appended; Its Values Win
+            amended = sdf_facsimile(1003, '12/31/2009').replace(
+                b';RCON2170;%d;' % ((1003 * 31 + 2009) % 100000), b';RCON2170;1;')
+            store.append_sdf(amended)
+
+        store = CallReportStore(self.store_dir)
+        self.assertEqual(store.periods(), [20090930, 20091231])
+        self.assertGreater(len(store._segments(20091231)), 1)
+        rssd, total_assets = store.item('RCON2170', '12/31/2009')
+        self.assertEqual(rssd.tolist(), list(range(1000, 1010)))
+        expected = [(r * 31 + 2009) % 100000 for r in range(1000, 1010)]
+        expected[3] = 1
+        self.assertEqual(total_assets.tolist(), expected)
+        self.assertEqual(store.scan(20091231)['mdrm'].dtype, np.int32)
+
+        # Compacting Keeps the Latest Values
+        store.compact('12/31/2009')
+        self.assertEqual(len(store._segments(20091231)), 1)
+        self.assertEqual(store.item('RCON2170', 20091231)[1].tolist(), expected)
+        self.assertEqual(len(store.scan(20091231)), 10 * 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import zeep
+from ffipy import FFIEC_Client
+from ffipy import stream
+from MockFFIECServer import MockFFIECServer
+
+class Stream_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.server.fail.clear()
+        self.client = FFIEC_Client(wsse=('user', 'token'), store_login=False, check_login=False,
+                                   cache=False, wsdl=self.server.wsdl_url)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_stream_matches_retrieve(self):
+        for fmt in ['PDF', 'XBRL', 'SDF']:
+            facsimile = self.client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt=fmt)
+            view = self.client.stream_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt=fmt)
+            self.assertIsInstance(view, memoryview)
+            self.assertEqual(view.tobytes(), facsimile)
+
+            # retrieve_facsimile Writes Every Format in Binary Mode
+            path = os.path.join(self.temp_dir, 'facsimile.' + fmt)
+            self.client.retrieve_facsimile(reporting_pd_end='12/31/2009', fiID=5, facsimile_fmt=fmt,
+                                           outfile=path, return_result=False)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), facsimile)
+
+    def test_compressed_file_and_buffer(self):
+        xbrl = self.client.retrieve_ubpr_xbrl_facsimile(reporting_pd_end='6/30/2015', fiID=9)
+        path = os.path.join(self.temp_dir, 'ubpr.xbrl.gz')
+        size = self.client.stream_ubpr_xbrl_facsimile(path, reporting_pd_end='6/30/2015', fiID=9,
+                                                      compress='gzip')
+        self.assertEqual(size, len(xbrl))
+        with gzip.open(path, 'rb') as f:
+            self.assertEqual(f.read(), xbrl)
+
+        # Small Chunks and Line Breaks in the Base64 Text Decode the Same
+        buffer = io.BytesIO()
+        chunk_size, stream.CHUNK_SIZE = stream.CHUNK_SIZE, 64
+        try:
+            stream.write_payload(memoryview(b'\n'.join([b'PD94bWwg', b'dmVyc2lvbj0iMS4wIj8+'])), buffer)
+            self.assertEqual(buffer.getvalue(), b'<?xml version="1.0"?>')
+            view = self.client.stream_ubpr_xbrl_facsimile(reporting_pd_end='6/30/2015', fiID=9, compress='xz')
+        finally:
+            stream.CHUNK_SIZE = chunk_size
+        self.assertEqual(lzma.decompress(view), xbrl)
+
+    def test_faults_are_raised(self):
+        self.server.fail['RetrieveFacsimile'] = 1
+        with self.assertRaises(zeep.exceptions.Fault):
+            self.client.stream_facsimile(os.path.join(self.temp_dir, 'x.pdf'), facsimile_fmt='PDF')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from ffipy import FacsimileSync, FFIEC_Client, ResponseCache
+from MockFFIECServer import MockFFIECServer, sdf_facsimile
+
+class FacsimileSync_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.temp_dir, 'store')
+        self.server.calls.clear()
+        self.server.fail.clear()
+        self.server.filers = {'12/31/2019': {1001: '1/15/2020 10:00:00 AM', 1002: '1/20/2020 3:30:00 PM'},
+                              '3/31/2020': {1001: '4/20/2020 9:15:00 AM'}}
+        self.client = FFIEC_Client(wsse=('user', 'token'), store_login=False, check_login=False,
+                                   cache=ResponseCache(os.path.join(self.temp_dir, 'cache')),
+                                   wsdl=self.server.wsdl_url)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def Sync(self, **kwargs):
+        return FacsimileSync(self.client, self.store_dir, backoff=0.01, **kwargs)
+
+    def test_only_changed_filers_are_fetched(self):
+        periods = ['12/31/2019', '3/31/2020']
+        summaries = self.Sync().sync(periods)
+        self.assertEqual([summary['stored'] for summary in summaries], [[1001, 1002], [1001]])
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 3)
+        with open(os.path.join(self.store_dir, 'Call_ID_RSSD_1002_2019-12-31.sdf'), 'rb') as f:
+            self.assertEqual(f.read(), sdf_facsimile(1002, '12/31/2019'))
+
+        # Nothing Changed: Nothing Is Downloaded
+        self.Sync().sync(periods)
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 3)
+
+        # An Amendment and a Late Filer Are Fetched, the Rest Is Not
+        self.server.filers['12/31/2019'].update({1002: '2/1/2020 9:00:00 AM', 1003: '2/1/2020 8:00:00 AM'})
+        sync = self.Sync()
+        summaries = sync.sync(periods)
+        self.assertEqual([summary['stored'] for summary in summaries], [[1002, 1003], []])
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 5)
+        self.assertEqual(sync.marks()['12/31/2019'], datetime(2020, 2, 1, 9))
+        self.assertEqual(sorted(sync.filings('12/31/2019')), [1001, 1002, 1003])
+
+    def test_failed_filers_are_retried(self):
+        self.server.fail['RetrieveFacsimile'] = 2
+        sync = self.Sync(workers=1, retries=0)
+        summary = sync.sync_period('12/31/2019')
+        self.assertEqual(len(summary['failed']), 2)
+        self.assertNotIn('12/31/2019', sync.marks())
+        self.assertFalse(os.path.exists(sync.path(1001, '12/31/2019')))
+
+        summary = sync.sync_period('12/31/2019')
+        self.assertEqual(summary['stored'], [1001, 1002])
+        self.assertEqual(summary['mark'], datetime(2020, 1, 20, 15, 30))
+
+    def test_staged_files_are_not_reused(self):
+        # An Interrupted Run Left an Older Submission in the Staging Directory
+        staging = os.path.join(self.store_dir, '.staging')
+        os.makedirs(staging)
+        with open(os.path.join(staging, 'Call_ID_RSSD_1001_2019-12-31.sdf'), 'wb') as f:
+            f.write(b'stale')
+
+        sync = self.Sync()
+        summary = sync.sync_period('12/31/2019')
+        self.assertEqual(summary['stored'], [1001, 1002])
+        self.assertEqual(self.server.calls['RetrieveFacsimile'], 2)
+        with open(sync.path(1001, '12/31/2019'), 'rb') as f:
+            self.assertEqual(f.read(), sdf_facsimile(1001, '12/31/2019'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import unittest
+from ffipy import FFIEC_Client, ResponseCache
+from ffipy import transport
+from MockFFIECServer import MockFFIECServer
+
+class Transport_Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFFIECServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server.calls.clear()
+        self.server.wsdl_requests = 0
+        transport.clear_memo()
+
+    def tearDown(self):
+        transport.clear_memo()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def Client(self, **kwargs):
+        return FFIEC_Client(wsse=('user', 'token'), store_login=False, cache=ResponseCache(self.cache_dir),
+                            wsdl=self.server.wsdl_url, **kwargs)
+
+    def test_wsdl_is_fetched_once(self):
+        first = self.Client()
+        second = self.Client()
+        self.assertEqual(self.server.wsdl_requests, 1)
+        self.assertIs(first.wsdl, second.wsdl)
+        self.assertIs(first.transport.session, second.transport.session)
+
+        # A New Process Parses the WSDL Again but Reads It From the Cache
+        transport.clear_memo()
+        third = self.Client()
+        self.assertEqual(self.server.wsdl_requests, 1)
+        self.assertEqual(len(third.retrieve_reporting_periods()), 84)
+
+    def test_login_check_can_be_skipped(self):
+        self.Client()
+        self.assertEqual(self.server.calls['TestUserAccess'], 1)
+        self.Client(check_login=False)
+        self.assertEqual(self.server.calls['TestUserAccess'], 1)
+
+    def test_types_are_memoized(self):
+        client = self.Client(check_login=False)
+        data_series = client.get_type('ns0:ReportingDataSeriesName')
+        self.assertIs(client.get_type('ns0:ReportingDataSeriesName'), data_series)
+        self.assertEqual(data_series('Call'), 'Call')
+
+if __name__ == '__main__':
+    unittest.main()
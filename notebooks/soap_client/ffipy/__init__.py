@@ -1,2 +1,27 @@
 __version__ = '0.1.1'
-from .ffipy import FFIEC_Client
+
+# Exported names -> submodule; a submodule (and zeep / lxml / numpy behind it)
+# is only imported when one of its names is first used, so `import ffipy` is
+# cheap for processes that never open a client
+_EXPORTS = {'FFIEC_Client': 'ffipy',
+            'CacheMiss': 'cache',
+            'ResponseCache': 'cache',
+            'FacsimileSync': 'sync',
+            'PanelStore': 'panels',
+            'CallReportStore': 'sdf',
+            'parse_sdf': 'sdf'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    from importlib import import_module
+    value = getattr(import_module('.' + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,181 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: concurrent bulk downloads of facsimiles from the FFIEC SOAP servers
+# Usage: FFIEC_Client.retrieve_facsimiles(filings, out_dir, ...) or
+#   bulk_retrieve_facsimiles(client, filings, out_dir, ...); see below.
+#   Requests run on a pool of worker threads sharing one rate limit. Failed
+#   requests are retried with exponential backoff, every facsimile is written
+#   to out_dir as soon as it arrives, and a rerun skips files already there.
+# ------------------------------------------------------------------------------
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+import zeep
+
+# Errors worth retrying: SOAP faults (e.g. server busy) and transport failures
+RETRY_ERRORS = (zeep.exceptions.Fault, zeep.exceptions.TransportError,
+                requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+EXTENSIONS = {'PDF': 'pdf', 'XBRL': 'xbrl', 'SDF': 'sdf'}
+
+
+class RateLimiter(object):
+    """Spaces out calls from any number of threads to at most `rate` per second.
+
+    Args:
+        rate (float): calls per second; None or 0 means no limit
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the caller may make its next call."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def facsimile_path(out_dir, ds_name, fiID_type, fiID, reporting_pd_end,
+                   facsimile_fmt):
+    """Returns the file a bulk download writes one facsimile to.
+
+    Args:
+        out_dir (str): output directory
+        ds_name, fiID_type, fiID, reporting_pd_end, facsimile_fmt: as in
+            `FFIEC_Client.retrieve_facsimile`
+
+    Returns:
+        path (str): e.g. `out_dir/Call_ID_RSSD_64150_2017-03-31.sdf`
+
+    Raises:
+        ValueError: reporting_pd_end is not a 'mm/dd/yyyy' date
+    """
+    try:
+        month, day, year = (int(part) for part in str(reporting_pd_end).split('/'))
+    except ValueError:
+        raise ValueError("reporting_pd_end must be 'mm/dd/yyyy', got %r"
+                         % (reporting_pd_end,)) from None
+    name = '%s_%s_%s_%04d-%02d-%02d.%s' % (ds_name, fiID_type, fiID, year, month,
+                                           day, EXTENSIONS.get(str(facsimile_fmt),
+                                                               str(facsimile_fmt).lower()))
+    return os.path.join(out_dir, name)
+
+
+def call_with_retry(call, retries=5, backoff=1.0, limiter=None):
+    """Calls `call()`, retrying with exponential backoff on `RETRY_ERRORS`.
+
+    Args:
+        call (callable): no-argument function making one SOAP request
+        retries (int): retries after the first attempt (default is 5)
+        backoff (float): seconds before the first retry; doubled (with
+            jitter) before each further retry (default is 1.0)
+        limiter (RateLimiter): shared rate limit applied to every attempt
+
+    Returns:
+        result: the value returned by `call`
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return call()
+        except RETRY_ERRORS:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def bulk_retrieve_facsimiles(client, filings, out_dir, ds_name='Call',
+                             fiID_type='ID_RSSD', facsimile_fmt='SDF',
+                             workers=8, rate=None, retries=5, backoff=1.0,
+                             progress=None):
+    """Downloads many facsimiles concurrently, writing each as it arrives.
+
+    Args:
+        client (FFIEC_Client): logged-in client
+        filings (iterable): (fiID, reporting_pd_end) pairs
+        out_dir (str): directory the facsimiles are written to (one file per
+            request, see `facsimile_path`)
+        ds_name (str): DataSeriesName (default is 'Call')
+        fiID_type (str): Type of Financial Inst ID (default is 'ID_RSSD')
+        facsimile_fmt (str): 'PDF', 'XBRL' or 'SDF' (default is 'SDF')
+        workers (int): concurrent requests (default is 8)
+        rate (float): maximum requests per second across all workers,
+            retries included (default is None, no limit)
+        retries (int): retries per request on faults / transport errors
+            (default is 5)
+        backoff (float): seconds before the first retry (default is 1.0)
+        progress (callable): called as progress(done, total) after each
+            request finishes (default is None)
+
+    Returns:
+        summary (dict): 'downloaded' and 'skipped' (lists of paths) and
+            'failed' (dict of (fiID, reporting_pd_end) -> error message).
+            Files already in out_dir are skipped, so rerunning after an
+            interruption resumes where it stopped. A malformed
+            reporting_pd_end fails its own filing only.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    limiter = RateLimiter(rate)
+    summary = {'downloaded': [], 'skipped': [], 'failed': {}}
+
+    # Resume: anything already written completely is skipped
+    pending = []
+    for fiID, reporting_pd_end in filings:
+        try:
+            path = facsimile_path(out_dir, ds_name, fiID_type, fiID,
+                                  reporting_pd_end, facsimile_fmt)
+        except ValueError as err:
+            summary['failed'][(fiID, reporting_pd_end)] = 'ValueError: %s' % err
+            continue
+        if os.path.exists(path):
+            summary['skipped'].append(path)
+        else:
+            pending.append((fiID, reporting_pd_end, path))
+
+    # Enum values are built once and shared by the workers
+    data_series = client.get_type('ns0:ReportingDataSeriesName')(ds_name)
+    id_type = client.get_type('ns0:FinancialInstitutionIDType')(fiID_type)
+    fmt = client.get_type('ns0:FacsimileFormat')(facsimile_fmt)
+
+    def download(fiID, reporting_pd_end, path):
+        facsimile = call_with_retry(
+            lambda: client.service.RetrieveFacsimile(data_series, reporting_pd_end,
+                                                     id_type, fiID, fmt),
+            retries, backoff, limiter)
+
+        # Write to a temporary name first so a partial file is never resumed
+        temp_path = '%s.%d.part' % (path, threading.get_ident())
+        with open(temp_path, 'wb') as f:
+            f.write(facsimile)
+        os.replace(temp_path, path)
+        return path
+
+    done = len(summary['skipped']) + len(summary['failed'])
+    total = done + len(pending)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {pool.submit(download, *job): job for job in pending}
+        for future in as_completed(futures):
+            fiID, reporting_pd_end, _ = futures[future]
+            try:
+                summary['downloaded'].append(future.result())
+            except Exception as err:
+                summary['failed'][(fiID, reporting_pd_end)] = '%s: %s' % (
+                    type(err).__name__, getattr(err, 'message', None) or err)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+    return summary
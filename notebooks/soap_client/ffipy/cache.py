@@ -0,0 +1,211 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: a persistent, content-addressed cache of FFIEC SOAP responses
+# Usage: FFIEC_Client(cache=ResponseCache(...)); see ResponseCache below.
+#   Responses are pickled into `objects/<sha256 of payload>`; an sqlite index
+#   maps each request key to its payload and records when it was stored and
+#   last used, for TTL expiry and least-recently-used eviction.
+# ------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from .metrics import METRICS
+
+# Seconds before a response of a method is fetched again; methods that are not
+# listed never expire. Facsimiles and panels expire too: the current period is
+# still being filed and any period can be amended.
+DEFAULT_TTL = {'retrieve_facsimile': 24 * 3600,
+               'retrieve_filers_since_date': 6 * 3600,
+               'retrieve_filers_submission_datetime': 6 * 3600,
+               'retrieve_panel_of_reporters': 24 * 3600,
+               'retrieve_reporting_periods': 24 * 3600,
+               'retrieve_ubpr_reporting_periods': 24 * 3600,
+               'retrieve_ubpr_xbrl_facsimile': 24 * 3600}
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class CacheMiss(KeyError):
+    """Raised by an offline cache when a response has not been cached."""
+
+
+def default_cache_dir():
+    """Returns FFIEC_CACHE_DIR if set, otherwise `~/.ffiec_cache`."""
+    return os.getenv('FFIEC_CACHE_DIR',
+                     os.path.join(os.path.expanduser('~'), '.ffiec_cache'))
+
+
+class ResponseCache(object):
+    """An on-disk cache of FFIEC SOAP responses with LRU eviction and TTLs.
+
+    Args:
+        path (str): directory of the cache (default is `default_cache_dir()`)
+        max_bytes (int): total size of the cached payloads before the least
+            recently used responses are evicted (default is 2 GiB)
+        ttl (dict): method name -> seconds before its responses expire;
+            `None` means never (default is `DEFAULT_TTL`)
+        offline (bool): if True, never call the server; a response that is
+            not cached raises `CacheMiss` (default is False)
+
+    Attributes:
+        `hits` and `misses` count lookups since the cache was opened.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, ttl=None,
+                 offline=False):
+        self.path = path or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_TTL if ttl is None else ttl)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(self.path, 'objects'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.path, 'index.sqlite'),
+                                   timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY,'
+                         ' method TEXT, digest TEXT, created REAL, accessed REAL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY,'
+                         ' size INTEGER)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    @staticmethod
+    def key(method, **params):
+        """Returns the cache key of a request.
+
+        Args:
+            method (str): name of the FFIEC_Client method
+            **params: the request arguments, e.g. `ds_name`, `reporting_pd_end`,
+                `fiID_type`, `fiID`, `facsimile_fmt`
+
+        Returns:
+            key (str): sha256 hex digest of the method and its arguments
+        """
+        text = json.dumps([method, {name: str(value) for name, value in params.items()}],
+                          sort_keys=True)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], digest)
+
+    def get(self, key, method=None):
+        """Looks up a response.
+
+        Args:
+            key (str): key returned by `key`
+            method (str): method name, for its TTL (default is None, no TTL)
+
+        Returns:
+            (hit, value) (tuple): hit is False if the response is not cached
+                or has expired
+        """
+        with self._lock:
+            row = self._db.execute('SELECT digest, created FROM entries WHERE key = ?',
+                                   (key,)).fetchone()
+            ttl = self.ttl.get(method)
+            expired = (row is not None and ttl is not None and not self.offline
+                       and time.time() - row[1] > ttl)
+            if row is None or expired:
+                self.misses += 1
+                return False, None
+            try:
+                with open(self._blob_path(row[0]), 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self.misses += 1
+                return False, None
+            self._db.execute('UPDATE entries SET accessed = ? WHERE key = ?',
+                             (time.time(), key))
+            self.hits += 1
+            return True, value
+
+    def put(self, key, method, value):
+        """Stores a response and evicts least recently used ones if needed."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()
+        blob_path = self._blob_path(digest)
+        with self._lock:
+            # Identical payloads are only stored once
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                temp_path = '%s.%d.tmp' % (blob_path, os.getpid())
+                with open(temp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(temp_path, blob_path)
+            now = time.time()
+            self._db.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?)', (digest, len(payload)))
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                             (key, method, digest, now, now))
+            self._evict()
+
+    def _evict(self):
+        # Drop entries oldest-access first until the payloads fit in max_bytes
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, digest in self._db.execute('SELECT key, digest FROM entries'
+                                            ' ORDER BY accessed').fetchall():
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            in_use = self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1',
+                                      (digest,)).fetchone()
+            if not in_use:
+                size = self._db.execute('SELECT size FROM blobs WHERE digest = ?',
+                                        (digest,)).fetchone()
+                self._db.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+                total -= size[0] if size else 0
+            if total <= self.max_bytes:
+                break
+
+    def fetch(self, method, params, retrieve):
+        """Returns the cached response of a request, calling `retrieve` on a miss.
+
+        Args:
+            method (str): name of the FFIEC_Client method
+            params (dict): request arguments making up the key
+            retrieve (callable): no-argument function calling the server
+
+        Returns:
+            value: the cached or freshly retrieved response
+        """
+        key = self.key(method, **params)
+        hit, value = self.get(key, method)
+        METRICS.count('cache.hits' if hit else 'cache.misses')
+        if hit:
+            return value
+        if self.offline:
+            raise CacheMiss('%s%r is not cached (offline mode)' % (method, tuple(params.values())))
+        value = retrieve()
+        self.put(key, method, value)
+        return value
+
+    def size(self):
+        """Returns the total size in bytes of the cached payloads."""
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def clear(self):
+        """Removes every cached response."""
+        with self._lock:
+            for (digest,) in self._db.execute('SELECT digest FROM blobs').fetchall():
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+            self._db.execute('DELETE FROM entries')
+            self._db.execute('DELETE FROM blobs')
+
+    def close(self):
+        """Closes the index."""
+        self._db.close()
@@ -16,6 +16,10 @@ from warnings import warn
 from configparser import ConfigParser
 import zeep
 from zeep.wsse.username import UsernameToken
+from .bulk import bulk_retrieve_facsimiles
+from .cache import ResponseCache
+from .stream import stream_operation
+from .transport import load_wsdl, shared_transport
 
 
 class FFIEC_Client(zeep.Client):
@@ -27,7 +31,18 @@ class FFIEC_Client(zeep.Client):
                 `wsse` can be configured in `~/.ffiec` (or file pointed to by
                 FFIEC_USER_CONF environment variable) in INI format under
                 section `[wsse]`
-            `wsdl` is not passed as an argument, b/c `wsdl` is constant.
+            `wsdl` defaults to the constant FFIEC `wsdl`; it only needs to be
+                passed to point the client at another server (e.g. in tests);
+            `cache` (default True) keeps retrieved responses on disk, see
+                Attributes; `offline` (default False) answers retrievals from
+                the cache only;
+            `check_login` (default True) tests the login when the client is
+                created; pass False to skip that round trip (e.g. in short
+                lived worker processes), in which case the login is not
+                stored either;
+            `transport` defaults to one shared by the process, which keeps
+                the WSDL and schemas in `wsdl.sqlite` in the cache directory
+                and pools its HTTP connections (see `ffipy.transport`).
 
     Attributes:
         Similar to parent class `zeep.Client`, except:
@@ -38,7 +53,13 @@ class FFIEC_Client(zeep.Client):
             `store_login` is `bool` that if set to True will store the user's
                 FFIEC login info for future use. The path of this file is
                 `~/.ffiec` by default, or can be set in the environment
-                variable FFIEC_USER_CONF.
+                variable FFIEC_USER_CONF;
+            `cache` is the `ResponseCache` that retrievals are answered from
+                (`None` if caching is off). Pass `cache=False` to disable it,
+                or a `ResponseCache` to control its location, size and TTLs;
+            `offline` is `bool` that if set to True answers retrievals from
+                the cache only (raising `CacheMiss` when a response was never
+                cached) and skips the login check.
 
     Methods:
         See https://cdr.ffiec.gov/Public/PWS/WebServices/RetrievalService.asmx
@@ -50,34 +71,48 @@ class FFIEC_Client(zeep.Client):
     def __init__(self, wsse=None, transport=None, service_name=None,
                  port_name=None, plugins=None, 
                  strict=True,
-                 xml_huge_tree=False, store_login=True):
+                 xml_huge_tree=False, store_login=True,
+                 cache=True, offline=False, wsdl=None, check_login=True):
         
         self.wsse_path = os.getenv('FFIEC_USER_CONF',
                                    os.path.join(os.environ['HOME'], '.ffiec'))
         self.wsse = wsse
-        
-        zeep.Client.__init__(self, self.wsdl, 
-                             self.wsse, transport,
-                             service_name, port_name, plugins, 
-                             #strict,
-                             xml_huge_tree)
+        self.__types = {}
+
+        # Response cache (on by default; offline mode needs one)
+        if cache is True:
+            cache = ResponseCache(offline=offline)
+        elif not cache:
+            if offline:
+                raise ValueError('offline mode needs a response cache')
+            cache = None
+        elif offline:
+            cache.offline = True
+        self.cache = cache
+
+        # The WSDL is downloaded through a persistent cache and parsed once
+        # per process; requests share one pooled keep-alive session
+        settings = zeep.Settings(strict=strict, xml_huge_tree=xml_huge_tree)
+        if transport is None:
+            transport = shared_transport(cache.path if cache else None)
+        document = load_wsdl(wsdl or self.wsdl, transport, settings)
+        zeep.Client.__init__(self, document, self.wsse, transport,
+                             service_name, port_name, plugins, settings)
 
         # Ensure that user login (i.e., the wsse variable) was good
-        retry = self.__check_login()
-        while retry and retry.startswith(('y', 'Y')):
-            username, password = self.__get_login()
-            self.wsse = UsernameToken(username, password)
-            zeep.Client.__init__(self, self.wsdl.location, self.wsse,
-                                 transport, service_name, port_name, plugins,
-                                 #strict, 
-                                 xml_huge_tree)
+        # (offline clients never contact the server)
+        if check_login and not offline:
             retry = self.__check_login()
+            while retry and retry.startswith(('y', 'Y')):
+                username, password = self.__get_login()
+                self.wsse = UsernameToken(username, password)
+                retry = self.__check_login()
 
-        if retry is None:
-            # User gained access; save login info (as needed) for later use
-            wsse_via_file = wsse is None and os.access(self.wsse_path, os.F_OK)
-            if store_login and not wsse_via_file:
-                self.__store_login()
+            if retry is None:
+                # User gained access; save login info (as needed) for later use
+                wsse_via_file = wsse is None and os.access(self.wsse_path, os.F_OK)
+                if store_login and not wsse_via_file:
+                    self.__store_login()
 
     @property
     def wsse(self):
@@ -100,6 +135,20 @@ class FFIEC_Client(zeep.Client):
             username, password = self.__get_login()
             self.__wsse = UsernameToken(username, password)
 
+    def get_type(self, name):
+        """Returns the type for the given qualified name, memoized per client.
+
+        Args:
+            name (str): qualified name, e.g. 'ns0:ReportingDataSeriesName'
+
+        Returns:
+            type (zeep.xsd type): factory for values of the type
+        """
+        try:
+            return self.__types[name]
+        except KeyError:
+            return self.__types.setdefault(name, zeep.Client.get_type(self, name))
+
     def __check_login(self):
         """Checks for user access and asks user to retry if no access / error.
 
@@ -141,6 +190,21 @@ class FFIEC_Client(zeep.Client):
         password = input('Password token for you FFIEC account: ')
         return username, password
 
+    def __cached(self, method, params, retrieve):
+        """Answers a retrieval from the response cache, if there is one.
+
+        Args:
+            method (str): name of the calling method (part of the cache key)
+            params (dict): the method's arguments (the rest of the cache key)
+            retrieve (callable): no-argument function calling the server
+
+        Returns:
+            result: the cached or freshly retrieved response
+        """
+        if self.cache is None:
+            return retrieve()
+        return self.cache.fetch(method, params, retrieve)
+
     def __store_login(self):
         """Stores login info (username, password) in a conf file."""
         conf = ConfigParser()
@@ -174,6 +238,10 @@ class FFIEC_Client(zeep.Client):
                 return_result==True)
 
         """
+        params = {'ds_name': ds_name, 'reporting_pd_end': reporting_pd_end,
+                  'fiID_type': fiID_type, 'fiID': fiID,
+                  'facsimile_fmt': facsimile_fmt}
+
         # Set up kw args
         data_series = self.get_type('ns0:ReportingDataSeriesName')
         ds_name = data_series(ds_name)
@@ -183,20 +251,110 @@ class FFIEC_Client(zeep.Client):
         facsimile_fmt = facsimile_fmt_type(facsimile_fmt)
 
         # Get results
-        facsimile = self.service.RetrieveFacsimile(ds_name,
-                                                   reporting_pd_end,
-                                                   fiID_type, fiID,
-                                                   facsimile_fmt)
-        # Write file
+        facsimile = self.__cached('retrieve_facsimile', params,
+                                  lambda: self.service.RetrieveFacsimile(
+                                      ds_name, reporting_pd_end, fiID_type,
+                                      fiID, facsimile_fmt))
+        # Write file (facsimiles of every format are bytes)
         if outfile:
-            mode = 'wb' if facsimile_fmt == 'PDF' else 'w'
-            with open(outfile, mode) as f:
+            with open(outfile, 'wb') as f:
                 f.write(facsimile)
 
         # Return results
         if return_result:
             return facsimile
 
+    def retrieve_facsimiles(self, filings, out_dir, ds_name='Call',
+                            fiID_type='ID_RSSD', facsimile_fmt='SDF',
+                            workers=8, rate=None, retries=5, backoff=1.0,
+                            progress=None):
+        """Retrieves many facsimiles concurrently and writes them to out_dir.
+
+        Args:
+            filings (iterable): (fiID, reporting_pd_end) pairs to retrieve
+            out_dir (str): directory to write the facsimiles to; files that
+                are already there are skipped, so a rerun resumes
+            ds_name (str): DataSeriesName (default is 'Call')
+            fiID_type (str): Type of Financial Inst ID (default is 'ID_RSSD')
+            facsimile_fmt (str): Format of facsimiles to retrieve (default is
+                'SDF')
+            workers (int): concurrent requests (default is 8)
+            rate (float): maximum requests per second (default is None)
+            retries (int): retries per facsimile on SOAP faults and transport
+                errors, with exponential backoff (default is 5)
+            backoff (float): seconds before the first retry (default is 1.0)
+            progress (callable): called as progress(done, total)
+
+        Returns:
+            summary (dict): 'downloaded', 'skipped' and 'failed', see
+                `ffipy.bulk.bulk_retrieve_facsimiles`
+
+        """
+        return bulk_retrieve_facsimiles(self, filings, out_dir, ds_name,
+                                        fiID_type, facsimile_fmt, workers,
+                                        rate, retries, backoff, progress)
+
+    def stream_facsimile(self, out=None, ds_name='Call',
+                         reporting_pd_end='3/31/2017', fiID_type='ID_RSSD',
+                         fiID=64150, facsimile_fmt='XBRL', compress=None):
+        """Streams a facsimile to a file or buffer without decoded copies.
+
+        The base64 payload is decoded in chunks straight into `out`, so large
+        (e.g. XBRL) documents are never held decoded in memory. The response
+        cache is bypassed.
+
+        Args:
+            out (str or file object): path to write to, or a writable binary
+                file object / buffer; if None, a memoryview is returned
+                (default is None)
+            ds_name (str): DataSeriesName (default is 'Call')
+            reporting_pd_end (str): Date for end of the reporting period
+                (default is 3/31/17)
+            fiID_type (str): Type of Financial Inst ID (default is 'ID_RSSD')
+            fiID (int): Financial Inst ID (default is 64150, for testing)
+            facsimile_fmt (str): Format of facsimile to retrieve (default is
+                'XBRL')
+            compress (str): 'gzip', 'bz2' or 'xz' to compress on the fly
+                (default is None)
+
+        Returns:
+            result: bytes written if `out` is given (before compression),
+                otherwise a `memoryview` of the facsimile
+
+        """
+        args = (self.get_type('ns0:ReportingDataSeriesName')(ds_name),
+                reporting_pd_end,
+                self.get_type('ns0:FinancialInstitutionIDType')(fiID_type),
+                fiID, self.get_type('ns0:FacsimileFormat')(facsimile_fmt))
+        return stream_operation(self, 'RetrieveFacsimile', args, out, compress)
+
+    def stream_ubpr_xbrl_facsimile(self, out=None,
+                                   reporting_pd_end='3/31/2017',
+                                   fiID_type='ID_RSSD', fiID=64150,
+                                   compress=None):
+        """Streams a UBPR XBRL facsimile to a file or buffer.
+
+        Args:
+            out (str or file object): path to write to, or a writable binary
+                file object / buffer; if None, a memoryview is returned
+                (default is None)
+            reporting_pd_end (str): Date for end of the reporting period
+                (default is 3/31/17)
+            fiID_type (str): Type of Financial Inst ID (default is 'ID_RSSD')
+            fiID (int): Financial Inst ID (default is 64150, for testing)
+            compress (str): 'gzip', 'bz2' or 'xz' to compress on the fly
+                (default is None)
+
+        Returns:
+            result: see `stream_facsimile`
+
+        """
+        args = (reporting_pd_end,
+                self.get_type('ns0:FinancialInstitutionIDType')(fiID_type),
+                fiID)
+        return stream_operation(self, 'RetrieveUBPRXBRLFacsimile', args, out,
+                                compress)
+
     def retrieve_filers_since_date(self, ds_name='Call',
                                    reporting_pd_end='3/31/2017',
                                    last_update_date='3/31/2017'):
@@ -213,14 +371,18 @@ class FFIEC_Client(zeep.Client):
             filers (list of ints): ID RSSDs of filers
 
         """
+        params = {'ds_name': ds_name, 'reporting_pd_end': reporting_pd_end,
+                  'last_update_date': last_update_date}
+
         # Set up kw args
         data_series = self.get_type('ns0:ReportingDataSeriesName')
         ds_name = data_series(ds_name)
 
         # Get and return results
-        filers = self.service.RetrieveFilersSinceDate(ds_name,
-                                                      reporting_pd_end,
-                                                      last_update_date)
+        filers = self.__cached('retrieve_filers_since_date', params,
+                               lambda: self.service.RetrieveFilersSinceDate(
+                                   ds_name, reporting_pd_end,
+                                   last_update_date))
         return filers
 
     def retrieve_filers_submission_datetime(self, ds_name='Call',
@@ -240,15 +402,19 @@ class FFIEC_Client(zeep.Client):
                 'DateTime'
 
         """
+        params = {'ds_name': ds_name, 'reporting_pd_end': reporting_pd_end,
+                  'last_update_date': last_update_date}
+
         # Set up kw args
         data_series = self.get_type('ns0:ReportingDataSeriesName')
         ds_name = data_series(ds_name)
 
         # Get and return results
-        results = (self.service
-                   .RetrieveFilersSubmissionDateTime(ds_name,
-                                                     reporting_pd_end,
-                                                     last_update_date))
+        results = self.__cached('retrieve_filers_submission_datetime', params,
+                                lambda: (self.service
+                                         .RetrieveFilersSubmissionDateTime(
+                                             ds_name, reporting_pd_end,
+                                             last_update_date)))
         return results
 
     def retrieve_panel_of_reporters(self, ds_name='Call',
@@ -268,15 +434,44 @@ class FFIEC_Client(zeep.Client):
                 'HasFiledForReportingPeriod'
 
         """
+        params = {'ds_name': ds_name, 'reporting_pd_end': reporting_pd_end}
+
         # Set up kw args
         data_series = self.get_type('ns0:ReportingDataSeriesName')
         ds_name = data_series(ds_name)
 
         # Get and return results
-        results = self.service.RetrievePanelOfReporters(ds_name,
-                                                        reporting_pd_end)
+        results = self.__cached('retrieve_panel_of_reporters', params,
+                                lambda: self.service.RetrievePanelOfReporters(
+                                    ds_name, reporting_pd_end))
         return results
 
+    def collect_panels(self, periods, store_dir, ds_name='Call', workers=4,
+                       retries=5, backoff=1.0, refresh=False, progress=None):
+        """Collects the Panels of Reporters of many periods in parallel.
+
+        Args:
+            periods (iterable): reporting periods, e.g. ['12/31/2009', ...]
+            store_dir (str): directory of the `ffipy.panels.PanelStore` the
+                normalized panels are written to; stored periods are skipped
+            ds_name (str): DataSeriesName (default is 'Call')
+            workers (int): worker processes (default is 4)
+            retries (int): retries per period on SOAP faults and transport
+                errors, with exponential backoff (default is 5)
+            backoff (float): seconds before the first retry (default is 1.0)
+            refresh (bool): fetch stored periods again (default is False)
+            progress (callable): called as progress(done, total)
+
+        Returns:
+            summary (dict): 'collected', 'skipped' and 'failed', see
+                `ffipy.panels.collect_panels`
+
+        """
+        # pandas is only needed here
+        from .panels import collect_panels
+        return collect_panels(self, periods, store_dir, ds_name, workers,
+                              retries, backoff, refresh, progress)
+
     def retrieve_reporting_periods(self, ds_name='Call'):
         """Retrieves end dates of financial reporting periods.
 
@@ -287,12 +482,16 @@ class FFIEC_Client(zeep.Client):
             dates (list of strs): End dates of financial reporting periods
 
         """
+        params = {'ds_name': ds_name}
+
         # Set up kw args
         data_series = self.get_type('ns0:ReportingDataSeriesName')
         ds_name = data_series(ds_name)
 
         # Get and return dates
-        dates = self.service.RetrieveReportingPeriods(ds_name)
+        dates = self.__cached('retrieve_reporting_periods', params,
+                              lambda: self.service.RetrieveReportingPeriods(
+                                  ds_name))
         return dates
 
     def retrieve_ubpr_reporting_periods(self):
@@ -306,7 +505,8 @@ class FFIEC_Client(zeep.Client):
 
         """
         # Get and return dates
-        dates = self.service.RetrieveUBPRReportingPeriods()
+        dates = self.__cached('retrieve_ubpr_reporting_periods', {},
+                              self.service.RetrieveUBPRReportingPeriods)
         return dates
 
     def retrieve_ubpr_xbrl_facsimile(self, reporting_pd_end='3/31/2017',
@@ -329,17 +529,21 @@ class FFIEC_Client(zeep.Client):
                 return_result==True)
 
     """
+        params = {'reporting_pd_end': reporting_pd_end, 'fiID_type': fiID_type,
+                  'fiID': fiID}
+
         # Set up kw args
         fiID_type_type = self.get_type('ns0:FinancialInstitutionIDType')
         fiID_type = fiID_type_type(fiID_type)
 
         # Get results
-        facsimile = self.service.RetrieveUBPRXBRLFacsimile(reporting_pd_end,
-                                                           fiID_type, fiID)
+        facsimile = self.__cached('retrieve_ubpr_xbrl_facsimile', params,
+                                  lambda: self.service.RetrieveUBPRXBRLFacsimile(
+                                      reporting_pd_end, fiID_type, fiID))
 
         # Write file
         if outfile:
-            with open(outfile, 'w') as f:
+            with open(outfile, 'wb') as f:
                 f.write(facsimile)
 
         # Return results
@@ -0,0 +1,149 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: always-on counters and SOAP latency histograms for FFIEC_Client
+# Usage: every SOAP round trip of the shared transport (`InstrumentedTransport`
+#   in `ffipy.transport`) is timed per operation, and the response cache
+#   counts its hits / misses:
+#       from ffipy import metrics
+#       ...
+#       print(metrics.report())
+#   Set FFIPY_METRICS=0 (or call `metrics.enable(False)`) to switch recording
+#   off; the hooks then cost one attribute check per call.
+# ------------------------------------------------------------------------------
+
+import os
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets; one more for slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Fixed-bucket histogram of latencies in seconds.
+
+    Attributes:
+        `buckets` are the bucket upper bounds; `counts[i]` is the number of
+            observations at most `buckets[i]` (and above the previous bound),
+            `counts[-1]` those above the last bound;
+        `count`, `total` and `max` summarize every observation.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Adds one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Returns the upper bound of the bucket holding the `q` quantile.
+
+        Args:
+            q (float): quantile between 0 and 1
+
+        Returns:
+            bound (float): bucket upper bound (the maximum for the last
+                bucket), or None without observations
+        """
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Returns the histogram as a JSON-serializable `dict`."""
+        return {'count': self.count, 'total': self.total, 'max': self.max,
+                'buckets': list(self.buckets), 'counts': list(self.counts)}
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms of one process.
+
+    Attributes:
+        `enabled` is `bool`; when False `count` and `observe` return at once;
+        `counters` maps name -> number (e.g. 'soap.bytes_received');
+        `histograms` maps name -> `Histogram` (e.g. 'RetrieveFacsimile').
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        """Adds `value` to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Adds a latency to a histogram."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(seconds)
+
+    def reset(self):
+        """Clears every counter and histogram."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Returns the counters and histograms as a JSON-serializable `dict`."""
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'histograms': {name: histogram.to_dict()
+                                   for name, histogram in self.histograms.items()}}
+
+    def report(self):
+        """Returns a text table of the SOAP latencies and the counters."""
+        with self._lock:
+            lines = ['%-36s %7s %9s %9s %9s %9s' % ('operation', 'calls', 'total s',
+                                                    'mean ms', 'p95 ms', 'max ms')]
+            for name, h in sorted(self.histograms.items()):
+                lines.append('%-36s %7d %9.3f %9.1f %9.1f %9.1f' % (
+                    name, h.count, h.total, 1000 * h.total / h.count,
+                    1000 * h.quantile(0.95), 1000 * h.max))
+            for name, value in sorted(self.counters.items()):
+                lines.append('%-36s %g' % (name, value))
+        return '\n'.join(lines)
+
+
+METRICS = Metrics(enabled=os.getenv('FFIPY_METRICS', '1') != '0')
+
+
+def enable(enabled=True):
+    """Switches recording on or off for the whole process."""
+    METRICS.enabled = enabled
+
+
+def reset():
+    """Clears the process's counters and histograms."""
+    METRICS.reset()
+
+
+def snapshot():
+    """Returns the process's counters and histograms (see `Metrics.snapshot`)."""
+    return METRICS.snapshot()
+
+
+def report():
+    """Returns the process's metrics as a text table (see `Metrics.report`)."""
+    return METRICS.report()
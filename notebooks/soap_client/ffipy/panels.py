@@ -0,0 +1,309 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: collect the Panel of Reporters of many reporting periods into one
+#   typed table partitioned by period
+# Usage: FFIEC_Client.collect_panels(periods, store_dir, ...) or
+#   collect_panels(client, periods, store_dir, ...); then
+#       store = PanelStore(store_dir)
+#       store.read(['12/31/2009', '12/31/2010'], columns=['ID_RSSD', 'State'])
+#       store.counts()  # institutions per period, no SOAP calls
+#   Periods are fetched by a pool of worker processes (each with its own
+#   client and connections); every panel is normalized (`PANEL_SCHEMA`) and
+#   written as one partition as soon as it arrives, so a rerun only fetches
+#   the periods that are missing. Periods that could not be fetched are
+#   reported in the summary and in `failures.json`, never stored as empty.
+# ------------------------------------------------------------------------------
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from .bulk import call_with_retry
+from .sdf import period_key
+from .transport import shared_transport
+
+# Column -> dtype of a normalized panel; 0 (no such number) and blanks are NA
+PANEL_SCHEMA = [('period', 'datetime64[ns]'),
+                ('ID_RSSD', 'int64'),
+                ('FDICCertNumber', 'Int32'),
+                ('OCCChartNumber', 'Int32'),
+                ('OTSDockNumber', 'Int32'),
+                ('PrimaryABARoutNumber', 'Int64'),
+                ('Name', 'string'),
+                ('State', 'category'),
+                ('City', 'string'),
+                ('Address', 'string'),
+                ('ZIP', 'string'),
+                ('FilingType', 'category'),
+                ('HasFiledForReportingPeriod', 'bool')]
+
+QUARTER_ENDS = ['3/31', '6/30', '9/30', '12/31']
+
+# Client of a worker process, created once by `_start_worker`
+_worker_client = None
+
+
+def quarter_ends(first_year, last_year):
+    """Returns the quarterly reporting periods of a range of years.
+
+    Args:
+        first_year (int): first year
+        last_year (int): last year (included)
+
+    Returns:
+        periods (list of strs): e.g. ['3/31/2009', '6/30/2009', ...]
+    """
+    return ['%s/%d' % (end, year) for year in range(first_year, last_year + 1)
+            for end in QUARTER_ENDS]
+
+
+def empty_panel():
+    """Returns a normalized panel without rows."""
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in PANEL_SCHEMA})
+
+
+def normalize_panel(results, reporting_pd_end):
+    """Normalizes the Panel of Reporters of one period into a typed frame.
+
+    Args:
+        results (list): `retrieve_panel_of_reporters` results (zeep objects or
+            dicts)
+        reporting_pd_end (str): the reporting period, e.g. '12/31/2009'
+
+    Returns:
+        panel (DataFrame): one row per institution, sorted by ID_RSSD, with
+            the columns and dtypes of `PANEL_SCHEMA`; names and addresses are
+            stripped, ZIP codes are 5 digit strings (ZIP+4 keeps its first 5)
+    """
+    if not results:
+        return empty_panel()
+    panel = pd.DataFrame({name: [result[name] for result in results]
+                          for name, _ in PANEL_SCHEMA[1:]})
+
+    for name, dtype in PANEL_SCHEMA[1:]:
+        values = panel[name]
+        if dtype in ('Int32', 'Int64'):
+            numbers = pd.to_numeric(values).fillna(0).astype(dtype)
+            panel[name] = numbers.mask(numbers == 0)
+        elif name == 'ZIP':
+            # Leading digits only: ZIP+4 and zero-dropped numbers become 5 digits
+            digits = values.astype('string').str.strip().str.extract(r'^(\d+)', expand=False)
+            zips = digits.str[:5].str.zfill(5)
+            panel[name] = zips.mask(zips == '00000')
+        elif dtype in ('string', 'category'):
+            text = values.astype('string').str.strip()
+            panel[name] = text.mask(text == '').astype(dtype)
+        else:
+            panel[name] = values.fillna(False).astype(dtype)
+
+    panel.insert(0, 'period', pd.Timestamp(str(period_key(reporting_pd_end))))
+    panel['period'] = panel['period'].astype('datetime64[ns]')
+    return panel.sort_values('ID_RSSD', kind='stable').reset_index(drop=True)
+
+
+class PanelStore(object):
+    """Normalized Panels of Reporters, one partition per reporting period.
+
+    Args:
+        path (str): directory of the store; each period is a file
+            `YYYYMMDD.parquet` and `failures.json` maps YYYYMMDD -> error of
+            the periods whose last collection failed
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def partition_path(self, period):
+        """Returns the file of a reporting period (e.g. '12/31/2009')."""
+        return os.path.join(self.path, '%d.parquet' % period_key(period))
+
+    def __contains__(self, period):
+        return os.path.exists(self.partition_path(period))
+
+    def periods(self):
+        """Returns the stored reporting periods (int YYYYMMDD), oldest first."""
+        return sorted(int(name[:-8]) for name in os.listdir(self.path)
+                      if name.endswith('.parquet') and name[:-8].isdigit())
+
+    def write(self, panel, period):
+        """Writes (or replaces) the partition of a period atomically."""
+        path = self.partition_path(period)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        panel.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+
+    def read(self, periods=None, columns=None):
+        """Returns the panels of some or all periods as one frame.
+
+        Args:
+            periods (list): reporting periods ('12/31/2009' or 20091231);
+                default is every stored period
+            columns (list of strs): columns to read (default is all of
+                `PANEL_SCHEMA`)
+
+        Returns:
+            panels (DataFrame): rows of the periods in order; raises
+                FileNotFoundError for a period that is not stored
+        """
+        keys = self.periods() if periods is None else [period_key(period) for period in periods]
+        frames = [pd.read_parquet(self.partition_path(key), columns=columns) for key in keys]
+        if not frames:
+            panels = empty_panel()
+            return panels if columns is None else panels[columns]
+
+        # Partitions have their own categories; the union is applied once
+        panels = pd.concat(frames, ignore_index=True)
+        for name, dtype in PANEL_SCHEMA:
+            if dtype == 'category' and name in panels:
+                panels[name] = panels[name].astype('category')
+        return panels
+
+    def counts(self, periods=None):
+        """Returns the number of institutions of each stored period.
+
+        Args:
+            periods (list): reporting periods (default is every stored period)
+
+        Returns:
+            counts (Series): int counts indexed by period (Timestamp)
+        """
+        keys = self.periods() if periods is None else [period_key(period) for period in periods]
+        counts = [len(pd.read_parquet(self.partition_path(key), columns=['ID_RSSD']))
+                  for key in keys]
+        index = pd.DatetimeIndex([pd.Timestamp(str(key)) for key in keys], name='period')
+        return pd.Series(counts, index=index, name='institutions', dtype='int64')
+
+    def failures(self):
+        """Returns {int YYYYMMDD: error message} of the periods that failed."""
+        try:
+            with open(os.path.join(self.path, 'failures.json')) as f:
+                return {int(key): error for key, error in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def record_failures(self, attempted, failed):
+        """Updates `failures.json` after a collection.
+
+        Args:
+            attempted (list): periods that were fetched; their old failures
+                are cleared
+            failed (dict): period -> error message of those that failed
+        """
+        failures = self.failures()
+        for period in attempted:
+            failures.pop(period_key(period), None)
+        failures.update((period_key(period), error) for period, error in failed.items())
+
+        path = os.path.join(self.path, 'failures.json')
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump({str(key): failures[key] for key in sorted(failures)}, f, indent=1)
+        os.replace(temp_path, path)
+
+
+def _error_message(err):
+    return '%s: %s' % (type(err).__name__, getattr(err, 'message', None) or err)
+
+
+def _collect_period(client, store, ds_name, reporting_pd_end, retries, backoff):
+    # Returns (rows, None) or (None, error message); errors are returned as
+    # text because SOAP faults do not survive the trip back from a process
+    try:
+        # Always ask the server: the response cache would answer a refresh
+        # with the panel it stored the first time
+        data_series = client.get_type('ns0:ReportingDataSeriesName')(ds_name)
+        results = call_with_retry(
+            lambda: client.service.RetrievePanelOfReporters(data_series, reporting_pd_end),
+            retries, backoff)
+        panel = normalize_panel(results, reporting_pd_end)
+        store.write(panel, reporting_pd_end)
+        return len(panel), None
+    except Exception as err:
+        return None, _error_message(err)
+
+
+def _start_worker(wsse, wsdl, cache_dir):
+    global _worker_client
+    from .ffipy import FFIEC_Client
+    _worker_client = FFIEC_Client(wsse=wsse, transport=shared_transport(cache_dir),
+                                  store_login=False, cache=False, wsdl=wsdl,
+                                  check_login=False)
+
+
+def _collect_in_worker(store_path, ds_name, reporting_pd_end, retries, backoff):
+    return _collect_period(_worker_client, PanelStore(store_path), ds_name,
+                           reporting_pd_end, retries, backoff)
+
+
+def collect_panels(client, periods, store_dir, ds_name='Call', workers=4,
+                   retries=5, backoff=1.0, refresh=False, progress=None):
+    """Fetches the Panels of Reporters of many periods in parallel processes.
+
+    Args:
+        client (FFIEC_Client): logged-in client; worker processes open their
+            own clients with its login and WSDL
+        periods (iterable): reporting periods, e.g. `quarter_ends(2001, 2020)`
+        store_dir (str): directory of the `PanelStore` the panels go to
+        ds_name (str): DataSeriesName (default is 'Call')
+        workers (int): worker processes; 1 fetches in this process with
+            `client` (default is 4)
+        retries (int): retries per period on faults / transport errors
+            (default is 5)
+        backoff (float): seconds before the first retry (default is 1.0)
+        refresh (bool): fetch periods that are already stored again
+            (default is False)
+        progress (callable): called as progress(done, total) after each
+            period finishes (default is None)
+
+    Returns:
+        summary (dict): 'collected' (dict of period -> institutions),
+            'skipped' (list of periods already stored) and 'failed' (dict of
+            period -> error message). A failed period is not stored, so it
+            reads as missing rather than as an empty panel.
+    """
+    store = PanelStore(store_dir)
+    summary = {'collected': {}, 'skipped': [], 'failed': {}}
+
+    # Resume: stored periods are skipped
+    pending = []
+    for reporting_pd_end in periods:
+        if not refresh and reporting_pd_end in store:
+            summary['skipped'].append(reporting_pd_end)
+        else:
+            pending.append(reporting_pd_end)
+
+    done = len(summary['skipped'])
+    total = done + len(pending)
+
+    def finished(reporting_pd_end, rows, error):
+        nonlocal done
+        if error is None:
+            summary['collected'][reporting_pd_end] = rows
+        else:
+            summary['failed'][reporting_pd_end] = error
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    if workers <= 1 or len(pending) <= 1:
+        for reporting_pd_end in pending:
+            finished(reporting_pd_end, *_collect_period(client, store, ds_name, reporting_pd_end,
+                                                        retries, backoff))
+    else:
+        wsse = (client.wsse.username, client.wsse.password)
+        cache_dir = client.cache.path if client.cache else None
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_start_worker,
+                                 initargs=(wsse, client.wsdl.location, cache_dir)) as pool:
+            futures = {pool.submit(_collect_in_worker, store_dir, ds_name, reporting_pd_end,
+                                   retries, backoff): reporting_pd_end
+                       for reporting_pd_end in pending}
+            for future in as_completed(futures):
+                try:
+                    rows, error = future.result()
+                except Exception as err:
+                    rows, error = None, _error_message(err)
+                finished(futures[future], rows, error)
+
+    store.record_failures(pending, summary['failed'])
+    return summary
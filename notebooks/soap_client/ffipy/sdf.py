@@ -0,0 +1,227 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: a columnar store of Call report line items parsed from SDF facsimiles
+# Usage: store = CallReportStore(path); store.append_sdf(facsimile); ...
+#   store.flush(); store.item('RCON2170', '12/31/2009')  # total assets
+#   SDF facsimiles (`retrieve_facsimile(facsimile_fmt='SDF')`) are parsed
+#   straight into columns (RSSD, MDRM code, value) without building a
+#   DataFrame per report. Rows are buffered and appended as segments to one
+#   partition per reporting period; MDRM codes are stored as integers, so a
+#   cross-bank query is a single vectorized scan of one partition.
+# ------------------------------------------------------------------------------
+
+import json
+import os
+import numpy as np
+
+# Columns of an SDF facsimile that are stored
+SDF_COLUMNS = {'date': b'Call Date', 'rssd': b'Bank RSSD Identifier',
+               'mdrm': b'MDRM #', 'value': b'Value'}
+
+# One stored line item (the period is the partition)
+ROW_DTYPE = np.dtype([('rssd', '<i8'), ('mdrm', '<i4'), ('value', '<f8')])
+
+
+def period_key(period):
+    """Returns a reporting period ('12/31/2009', '20091231' or 20091231) as int YYYYMMDD."""
+    if isinstance(period, str) and '/' in period:
+        month, day, year = (int(part) for part in period.split('/'))
+        return year * 10000 + month * 100 + day
+    return int(period)
+
+
+def parse_sdf(data):
+    """Parses an SDF facsimile into columns.
+
+    Args:
+        data (bytes): the facsimile, a ';' separated file with a header line
+
+    Returns:
+        columns (dict): 'date' (int YYYYMMDD), 'rssd' (int) and 'mdrm'
+            (bytes) numpy arrays, and 'value' (float; NaN when blank or not
+            numeric, e.g. text items)
+    """
+    lines = bytes(data).splitlines()
+    header = [name.strip().strip(b'"') for name in lines[0].split(b';')]
+    index = {column: header.index(name) for column, name in SDF_COLUMNS.items()}
+    last = max(index.values())
+
+    # Split each line once, only as far as the last column needed
+    fields = [line.split(b';', last + 1) for line in lines[1:] if line.strip()]
+    columns = {column: np.array([row[i].strip().strip(b'"') for row in fields], dtype=bytes)
+               for column, i in index.items()}
+
+    values = columns['value']
+    values[values == b''] = b'nan'
+    try:
+        values = values.astype(np.float64)
+    except ValueError:
+        values = np.array([_to_float(value) for value in values], dtype=np.float64)
+    return {'date': columns['date'].astype(np.int64), 'rssd': columns['rssd'].astype(np.int64),
+            'mdrm': columns['mdrm'], 'value': values}
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+class CallReportStore(object):
+    """An append-only columnar store of Call report line items.
+
+    Args:
+        path (str): directory of the store; `mdrm.json` lists the MDRM codes
+            (a code's integer is its position) and each reporting period is a
+            directory `YYYYMMDD` of `.npy` segments of `ROW_DTYPE` rows
+        flush_rows (int): rows buffered before they are written out (default
+            is 1,000,000)
+
+    Attributes:
+        `mdrm_names` lists the known MDRM codes by integer code.
+    """
+
+    def __init__(self, path, flush_rows=1000000):
+        self.path = path
+        self.flush_rows = flush_rows
+        os.makedirs(path, exist_ok=True)
+        try:
+            with open(os.path.join(path, 'mdrm.json')) as f:
+                self.mdrm_names = json.load(f)
+        except FileNotFoundError:
+            self.mdrm_names = []
+        self._mdrm_codes = {name: code for code, name in enumerate(self.mdrm_names)}
+        self._saved_names = len(self.mdrm_names)
+        self._buffer = {}
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def mdrm_code(self, name, add=False):
+        """Returns the integer code of an MDRM (e.g. 'RCON2170').
+
+        Args:
+            name (str): MDRM code
+            add (bool): if True, assign a code to an unknown MDRM; otherwise
+                an unknown MDRM raises KeyError (default is False)
+        """
+        if name not in self._mdrm_codes and add:
+            self._mdrm_codes[name] = len(self.mdrm_names)
+            self.mdrm_names.append(name)
+        return self._mdrm_codes[name]
+
+    def append_sdf(self, data):
+        """Parses an SDF facsimile and appends its line items.
+
+        Args:
+            data (bytes): the facsimile
+
+        Returns:
+            rows (int): number of line items appended
+        """
+        columns = parse_sdf(data)
+
+        # Encode the MDRM codes (only the distinct ones go through Python)
+        names, inverse = np.unique(columns['mdrm'], return_inverse=True)
+        codes = np.array([self.mdrm_code(name.decode('ascii'), add=True) for name in names],
+                         dtype=np.int32)
+
+        rows = np.empty(len(inverse), dtype=ROW_DTYPE)
+        rows['rssd'] = columns['rssd']
+        rows['mdrm'] = codes[inverse.reshape(-1)]
+        rows['value'] = columns['value']
+        for date in np.unique(columns['date']):
+            self._buffer.setdefault(int(date), []).append(rows[columns['date'] == date])
+        self._buffered += len(rows)
+        if self._buffered >= self.flush_rows:
+            self.flush()
+        return len(rows)
+
+    def flush(self):
+        """Writes the buffered line items as a new segment of each period."""
+        if not self._buffer:
+            return
+        # New MDRM codes are saved before any segment refers to them
+        if len(self.mdrm_names) > self._saved_names:
+            self._write_atomic(os.path.join(self.path, 'mdrm.json'),
+                               lambda f: f.write(json.dumps(self.mdrm_names).encode('ascii')))
+            self._saved_names = len(self.mdrm_names)
+        for date, chunks in self._buffer.items():
+            partition = os.path.join(self.path, str(date))
+            os.makedirs(partition, exist_ok=True)
+            segment = '%06d.npy' % len(self._segments(date))
+            self._write_atomic(os.path.join(partition, segment),
+                               lambda f: np.save(f, np.concatenate(chunks)))
+        self._buffer = {}
+        self._buffered = 0
+
+    @staticmethod
+    def _write_atomic(path, write):
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+
+    def _segments(self, date):
+        partition = os.path.join(self.path, str(date))
+        if not os.path.isdir(partition):
+            return []
+        return sorted(os.path.join(partition, name) for name in os.listdir(partition)
+                      if name.endswith('.npy'))
+
+    def periods(self):
+        """Returns the stored reporting periods (int YYYYMMDD), oldest first."""
+        return sorted(int(name) for name in os.listdir(self.path) if name.isdigit())
+
+    def scan(self, period):
+        """Returns every line item stored for a period (flushed ones only).
+
+        Args:
+            period (str or int): reporting period, e.g. '12/31/2009'
+
+        Returns:
+            rows (numpy array of `ROW_DTYPE`): in the order they were appended
+        """
+        segments = [np.load(path, mmap_mode='r') for path in self._segments(period_key(period))]
+        if not segments:
+            return np.empty(0, dtype=ROW_DTYPE)
+        return np.concatenate(segments)
+
+    def item(self, mdrm, period):
+        """Returns one line item of every bank for a period, e.g. total assets.
+
+        Args:
+            mdrm (str): MDRM code, e.g. 'RCON2170'
+            period (str or int): reporting period, e.g. '12/31/2009'
+
+        Returns:
+            (rssd, value) (tuple of numpy arrays): sorted by RSSD; when a bank
+                was appended more than once (e.g. an amended report) its last
+                value is kept
+        """
+        rows = self.scan(period)
+        if mdrm not in self._mdrm_codes or not len(rows):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        rows = rows[rows['mdrm'] == self._mdrm_codes[mdrm]]
+
+        # Last appended value wins
+        rssd, first = np.unique(rows['rssd'][::-1], return_index=True)
+        return rssd, rows['value'][::-1][first]
+
+    def compact(self, period):
+        """Rewrites the segments of a period as one (latest values only)."""
+        segments = self._segments(period_key(period))
+        if len(segments) < 2:
+            return
+        rows = self.scan(period)
+        keys = rows['rssd'] * (1 << 20) + rows['mdrm']
+        _, first = np.unique(keys[::-1], return_index=True)
+        rows = rows[::-1][first]
+        self._write_atomic(segments[0], lambda f: np.save(f, rows))
+        for path in segments[1:]:
+            os.remove(path)
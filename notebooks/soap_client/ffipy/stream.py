@@ -0,0 +1,102 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: stream facsimiles from the FFIEC SOAP servers to files or buffers
+# Usage: FFIEC_Client.stream_facsimile / stream_ubpr_xbrl_facsimile, or
+#   stream_operation(client, 'RetrieveFacsimile', args, out); see below.
+#   zeep normally parses the response into a tree and decodes the base64
+#   payload into one more copy. Here the raw response is kept as is and the
+#   payload is decoded in chunks straight into the (optionally compressed)
+#   binary output, so a multi-megabyte document is never held decoded.
+# ------------------------------------------------------------------------------
+
+import binascii
+import bz2
+import gzip
+import io
+import lzma
+import re
+
+# Compressors for the `compress` argument
+COMPRESSORS = {'gzip': lambda f: gzip.GzipFile(fileobj=f, mode='wb'),
+               'bz2': lambda f: bz2.BZ2File(f, 'wb'),
+               'xz': lambda f: lzma.LZMAFile(f, 'wb')}
+
+# Base64 characters decoded at a time (a multiple of 4)
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(rb'\s')
+
+
+def _payload(content, operation):
+    """Returns a memoryview of the base64 text of `<operation>Result`, or None."""
+    start = re.compile(rb'<(?:[\w.-]+:)?%sResult(?:\s[^>]*)?(/?)>' % operation.encode('ascii'))
+    match = start.search(content)
+    if match is None:
+        return None
+    if match.group(1):  # empty element
+        return memoryview(b'')
+    end = content.find(b'<', match.end())
+    return memoryview(content)[match.end():end]
+
+
+def write_payload(payload, out, compress=None):
+    """Decodes base64 text in chunks into a binary file object.
+
+    Args:
+        payload (bytes-like): base64 text
+        out (file object): writable binary file or buffer
+        compress (str): 'gzip', 'bz2' or 'xz' to compress on the fly
+            (default is None)
+
+    Returns:
+        size (int): decoded bytes written (before compression)
+    """
+    # Line breaks inside the base64 text would misalign the chunks
+    if _WHITESPACE.search(payload):
+        payload = memoryview(bytes(payload).translate(None, b' \t\r\n'))
+
+    target = COMPRESSORS[compress](out) if compress else out
+    size = 0
+    try:
+        for start in range(0, len(payload), CHUNK_SIZE):
+            size += target.write(binascii.a2b_base64(payload[start:start + CHUNK_SIZE]))
+    finally:
+        if target is not out:
+            target.close()
+    return size
+
+
+def stream_operation(client, operation, args, out=None, compress=None):
+    """Calls a facsimile operation and streams its decoded result.
+
+    Args:
+        client (FFIEC_Client): logged-in client
+        operation (str): SOAP operation, e.g. 'RetrieveFacsimile'
+        args (tuple): the operation's arguments
+        out (str or file object): path to write to, or a writable binary
+            file object / buffer; if None, the facsimile is returned
+        compress (str): 'gzip', 'bz2' or 'xz' to compress on the fly
+            (default is None)
+
+    Returns:
+        result: the number of bytes written if `out` is given, otherwise a
+            `memoryview` of the (compressed, if asked) facsimile
+    """
+    with client.settings(raw_response=True):
+        response = getattr(client.service, operation)(*args)
+
+    # Faults and unexpected replies go through zeep, which raises for them
+    payload = _payload(response.content, operation) if response.status_code == 200 else None
+    if payload is None:
+        binding = client.service._binding
+        binding.process_reply(client, binding.get(operation), response)
+        raise ValueError('%s returned no facsimile' % operation)
+
+    if out is None:
+        buffer = io.BytesIO()
+        write_payload(payload, buffer, compress)
+        return buffer.getbuffer()
+    if isinstance(out, str):
+        with open(out, 'wb') as f:
+            return write_payload(payload, f, compress)
+    return write_payload(payload, out, compress)
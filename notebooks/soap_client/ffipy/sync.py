@@ -0,0 +1,202 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: incremental syncing of FFIEC facsimiles into a local store
+# Usage: FacsimileSync(client, store_dir).sync(periods); see FacsimileSync.
+#   For each (ds_name, period) the store keeps a high-water mark: the latest
+#   submission it holds. A sync only asks the server for filers that filed or
+#   amended since that mark, downloads those facsimiles and upserts them, so a
+#   nightly refresh moves a few dozen reports instead of whole periods.
+# ------------------------------------------------------------------------------
+
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from .bulk import bulk_retrieve_facsimiles, facsimile_path
+
+# Format of the submission datetimes returned by the FFIEC servers
+DATETIME_FMT = '%m/%d/%Y %I:%M:%S %p'
+
+# Last update date used for a period that was never synced (i.e. everything)
+EPOCH = '1/1/1990'
+
+
+def parse_submission(stamp):
+    """Returns a submission datetime (str like '3/31/2017 2:15:10 PM') as datetime."""
+    if isinstance(stamp, datetime):
+        return stamp.replace(tzinfo=None)
+    return datetime.strptime(str(stamp).strip(), DATETIME_FMT)
+
+
+class FacsimileSync(object):
+    """Keeps a local store of facsimiles up to date with the FFIEC servers.
+
+    Args:
+        client (FFIEC_Client): logged-in client
+        store_dir (str): directory of the store; facsimiles are files named as
+            in `ffipy.bulk.facsimile_path` and `sync.sqlite` holds the index
+        ds_name (str): DataSeriesName (default is 'Call')
+        fiID_type (str): Type of Financial Inst ID (default is 'ID_RSSD')
+        facsimile_fmt (str): Format of facsimiles to store (default is 'SDF')
+        **bulk_options: passed to `bulk_retrieve_facsimiles` (e.g. `workers`,
+            `rate`, `retries`)
+
+    Attributes:
+        `marks()` returns the high-water mark of every synced period and
+        `filings(period)` the stored submissions of a period.
+    """
+
+    def __init__(self, client, store_dir, ds_name='Call', fiID_type='ID_RSSD',
+                 facsimile_fmt='SDF', **bulk_options):
+        self.client = client
+        self.store_dir = store_dir
+        self.ds_name = ds_name
+        self.fiID_type = fiID_type
+        self.facsimile_fmt = facsimile_fmt
+        self.bulk_options = bulk_options
+        self._lock = threading.Lock()
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(store_dir, 'sync.sqlite'),
+                                   timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS marks (ds_name TEXT, period TEXT,'
+                         ' mark TEXT, synced REAL, PRIMARY KEY (ds_name, period))')
+        self._db.execute('CREATE TABLE IF NOT EXISTS filings (ds_name TEXT, period TEXT,'
+                         ' fiID INTEGER, submitted TEXT, path TEXT,'
+                         ' PRIMARY KEY (ds_name, period, fiID))')
+
+    def path(self, fiID, period):
+        """Returns the file the facsimile of a filer and period is stored in."""
+        return facsimile_path(self.store_dir, self.ds_name, self.fiID_type, fiID,
+                              period, self.facsimile_fmt)
+
+    def marks(self):
+        """Returns {period: high-water mark (datetime)} of the synced periods."""
+        with self._lock:
+            rows = self._db.execute('SELECT period, mark FROM marks WHERE ds_name = ?',
+                                    (self.ds_name,)).fetchall()
+        return {period: datetime.fromisoformat(mark) for period, mark in rows}
+
+    def filings(self, period):
+        """Returns {fiID: submission datetime} of the facsimiles stored for a period."""
+        with self._lock:
+            rows = self._db.execute('SELECT fiID, submitted FROM filings'
+                                    ' WHERE ds_name = ? AND period = ?',
+                                    (self.ds_name, period)).fetchall()
+        return {fiID: datetime.fromisoformat(submitted) for fiID, submitted in rows}
+
+    def changed_filers(self, period):
+        """Asks the server which filers of a period filed since its mark.
+
+        Args:
+            period (str): reporting period end date, e.g. '12/31/2019'
+
+        Returns:
+            changed (dict): fiID -> submission datetime of the filers whose
+                submission is newer than the stored one
+        """
+        mark = self.marks().get(period)
+        since = EPOCH if mark is None else '%d/%d/%d' % (mark.month, mark.day, mark.year)
+
+        # Always ask the server: the response cache would hide new submissions
+        data_series = self.client.get_type('ns0:ReportingDataSeriesName')(self.ds_name)
+        results = self.client.service.RetrieveFilersSubmissionDateTime(
+            data_series, period, since) or []
+
+        # The server works in whole days, so drop what the store already holds
+        stored = self.filings(period)
+        changed = {}
+        for result in results:
+            submitted = parse_submission(result['DateTime'])
+            fiID = int(result['ID_RSSD'])
+            if fiID not in stored or submitted > stored[fiID]:
+                changed[fiID] = submitted
+        return changed
+
+    def sync_period(self, period, progress=None):
+        """Fetches and upserts the facsimiles of a period changed since its mark.
+
+        Args:
+            period (str): reporting period end date, e.g. '12/31/2019'
+            progress (callable): called as progress(done, total) per facsimile
+
+        Returns:
+            summary (dict): 'period', 'stored' (list of fiIDs), 'failed'
+                (dict of fiID -> error message) and 'mark' (datetime or None)
+        """
+        changed = self.changed_filers(period)
+
+        # Download into a staging directory so a failed download never
+        # replaces a stored facsimile. A file left there by an interrupted run
+        # may be an older submission, so every changed filer is fetched anew
+        staging = os.path.join(self.store_dir, '.staging')
+        for fiID in changed:
+            try:
+                os.remove(facsimile_path(staging, self.ds_name, self.fiID_type, fiID,
+                                         period, self.facsimile_fmt))
+            except FileNotFoundError:
+                pass
+        result = bulk_retrieve_facsimiles(self.client, [(fiID, period) for fiID in changed],
+                                          staging, self.ds_name, self.fiID_type,
+                                          self.facsimile_fmt, progress=progress,
+                                          **self.bulk_options)
+        failed = {fiID: message for (fiID, _), message in result['failed'].items()}
+
+        # Upsert the new facsimiles
+        stored = sorted(fiID for fiID in changed if fiID not in failed)
+        with self._lock:
+            self._db.execute('BEGIN')
+            for fiID in stored:
+                path = self.path(fiID, period)
+                os.replace(facsimile_path(staging, self.ds_name, self.fiID_type, fiID,
+                                          period, self.facsimile_fmt), path)
+                self._db.execute('INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?)',
+                                 (self.ds_name, period, fiID, changed[fiID].isoformat(),
+                                  os.path.basename(path)))
+
+            # Advance the mark to the newest stored submission, but not past
+            # the oldest failure so it is asked for again next time
+            mark = self._db.execute('SELECT mark FROM marks WHERE ds_name = ? AND period = ?',
+                                    (self.ds_name, period)).fetchone()
+            mark = datetime.fromisoformat(mark[0]) if mark else None
+            if stored:
+                newest = max(changed[fiID] for fiID in stored)
+                if failed:
+                    newest = min([newest] + [changed[fiID] for fiID in failed])
+                mark = newest if mark is None else max(mark, newest)
+            if mark is not None:
+                self._db.execute('INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?)',
+                                 (self.ds_name, period, mark.isoformat(),
+                                  datetime.now().timestamp()))
+            self._db.execute('COMMIT')
+
+        return {'period': period, 'stored': stored, 'failed': failed, 'mark': mark}
+
+    def sync(self, periods=None, progress=None):
+        """Syncs several reporting periods.
+
+        Args:
+            periods (list of strs): reporting period end dates (default is
+                every period the server reports)
+            progress (callable): called as progress(period, done, total) per
+                facsimile
+
+        Returns:
+            summaries (list of dicts): one per period, see `sync_period`
+        """
+        if periods is None:
+            periods = self.client.retrieve_reporting_periods(self.ds_name)
+        summaries = []
+        for period in periods:
+            report = None if progress is None else (
+                lambda done, total, period=period: progress(period, done, total))
+            summaries.append(self.sync_period(period, report))
+        shutil.rmtree(os.path.join(self.store_dir, '.staging'), ignore_errors=True)
+        return summaries
+
+    def close(self):
+        """Closes the index."""
+        self._db.close()
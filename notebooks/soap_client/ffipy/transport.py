@@ -0,0 +1,135 @@
+#!/bin/python
+# ------------------------------------------------------------------------------
+# Purpose: fast FFIEC_Client construction
+# Usage: used by FFIEC_Client when no `transport` is passed; see below.
+#   The WSDL and its schemas are kept in an sqlite cache next to the response
+#   cache, so a new process does not download them again, and each process
+#   parses the WSDL once however many clients it creates. All clients of a
+#   process share one keep-alive HTTP session with a connection pool, and
+#   every SOAP round trip is timed per operation (see `ffipy.metrics`).
+# ------------------------------------------------------------------------------
+
+import os
+import threading
+import time
+import requests
+import zeep
+from zeep.cache import SqliteCache
+from zeep.wsdl import Document
+from .cache import default_cache_dir
+from .metrics import METRICS
+
+# Seconds before the cached WSDL / schemas are downloaded again
+WSDL_TTL = 7 * 24 * 3600
+
+# Connections kept open per host (enough for the bulk download workers)
+POOL_SIZE = 16
+
+_lock = threading.Lock()
+_transports = {}
+_documents = {}
+
+
+def soap_operation(headers):
+    """Returns the operation name of a SOAP request from its SOAPAction header."""
+    action = (headers or {}).get('SOAPAction', '').strip('"')
+    return action.rsplit('/', 1)[-1] or 'unknown'
+
+
+class InstrumentedTransport(zeep.Transport):
+    """A `zeep.Transport` timing every SOAP round trip into `METRICS`.
+
+    Each POST is observed in the histogram of its operation, and the bytes
+    sent / received and the failed requests (HTTP errors or no response) are
+    counted.
+    """
+
+    def post(self, address, message, headers):
+        if not METRICS.enabled:
+            return super().post(address, message, headers)
+
+        operation = soap_operation(headers)
+        start = time.perf_counter()
+        try:
+            response = super().post(address, message, headers)
+        except Exception:
+            METRICS.count('soap.errors')
+            METRICS.count('soap.errors.' + operation)
+            raise
+        finally:
+            METRICS.observe(operation, time.perf_counter() - start)
+
+        METRICS.count('soap.bytes_sent', len(message))
+        METRICS.count('soap.bytes_received', len(response.content))
+        if response.status_code != 200:
+            METRICS.count('soap.errors')
+            METRICS.count('soap.errors.' + operation)
+        return response
+
+
+def shared_session(pool_size=POOL_SIZE):
+    """Returns a new keep-alive `requests.Session` with a connection pool.
+
+    Args:
+        pool_size (int): connections kept open per host (default is 16)
+
+    Returns:
+        session (requests.Session)
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                            pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def shared_transport(cache_dir=None, wsdl_ttl=WSDL_TTL, timeout=300):
+    """Returns this process's zeep transport for the given WSDL cache.
+
+    Args:
+        cache_dir (str): directory of `wsdl.sqlite`, the WSDL / schema cache
+            (default is `default_cache_dir()`)
+        wsdl_ttl (int): seconds before cached documents are downloaded again
+            (default is 7 days)
+        timeout (int): seconds to wait for the WSDL / schemas (default is 300)
+
+    Returns:
+        transport (InstrumentedTransport): created once per process (a
+            forked worker gets its own, so pooled connections are never
+            shared)
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    key = (os.getpid(), cache_dir, wsdl_ttl, timeout)
+    with _lock:
+        if key not in _transports:
+            os.makedirs(cache_dir, exist_ok=True)
+            cache = SqliteCache(os.path.join(cache_dir, 'wsdl.sqlite'), timeout=wsdl_ttl)
+            _transports[key] = InstrumentedTransport(cache=cache, timeout=timeout,
+                                                     session=shared_session())
+        return _transports[key]
+
+
+def load_wsdl(location, transport, settings):
+    """Returns the parsed WSDL, parsing it only once per process.
+
+    Args:
+        location (str): URL of the WSDL
+        transport (zeep.Transport): transport to load the WSDL / schemas with
+        settings (zeep.Settings): parser settings (part of the memo key)
+
+    Returns:
+        wsdl (zeep.wsdl.Document)
+    """
+    key = (location, settings.strict, settings.xml_huge_tree)
+    with _lock:
+        if key not in _documents:
+            _documents[key] = Document(location, transport, settings=settings)
+        return _documents[key]
+
+
+def clear_memo():
+    """Forgets this process's transports and parsed WSDLs (e.g. in tests)."""
+    with _lock:
+        _transports.clear()
+        _documents.clear()